@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ucc_a2ui.embed import OpenAICompatibleEmbedder
+from ucc_a2ui.embed.executor import EmbeddingExecutor
+from ucc_a2ui.embed.index_faiss import IndexedChunk
+
+
+def _stand_in_server(latency_s: float, dim: int) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            time.sleep(latency_s)
+            data = [{"embedding": [float(len(text) % 7)] * dim} for text in body["input"]]
+            payload = json.dumps({"data": data}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format: str, *args) -> None:
+            return
+
+    return ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Embedding throughput against a local stand-in server")
+    parser.add_argument("--batches", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--in-flight", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    server = _stand_in_server(args.latency_ms / 1000.0, args.dim)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    embedder = OpenAICompatibleEmbedder(f"http://127.0.0.1:{server.server_address[1]}", "", "stand-in")
+    batches = []
+    for batch_idx in range(args.batches):
+        texts = [f"chunk {batch_idx}-{idx}" for idx in range(args.batch_size)]
+        batches.append(
+            [
+                IndexedChunk(text=text, source="bench.md", chunk_hash=hashlib.sha256(text.encode("utf-8")).hexdigest())
+                for text in texts
+            ]
+        )
+    try:
+        for max_in_flight in args.in_flight:
+            started = time.perf_counter()
+            count = sum(len(batch) for batch, _ in EmbeddingExecutor(embedder, max_in_flight).map(iter(batches)))
+            elapsed = time.perf_counter() - started
+            print(f"max_in_flight={max_in_flight} chunks={count} elapsed={elapsed:.2f}s chunks/s={count / elapsed:.0f}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
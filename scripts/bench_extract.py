@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import time
+from typing import Any
+
+from ucc_a2ui.generator.json_extract import extract_first_json
+
+
+def _legacy_extract(text: str) -> Any:
+    # The previous implementation: strip fences, then retry json.loads from every "{".
+    cleaned = re.sub(r"```json|```", "", text, flags=re.IGNORECASE).strip()
+    try:
+        return json.loads(cleaned)
+    except json.JSONDecodeError:
+        pass
+    start = cleaned.find("{")
+    while start != -1:
+        depth = 0
+        for idx in range(start, len(cleaned)):
+            if cleaned[idx] == "{":
+                depth += 1
+            elif cleaned[idx] == "}":
+                depth -= 1
+                if depth == 0:
+                    try:
+                        return json.loads(cleaned[start : idx + 1])
+                    except json.JSONDecodeError:
+                        break
+        start = cleaned.find("{", start + 1)
+    raise ValueError("No valid JSON object found")
+
+
+def _chatty_output(size_kb: int, fenced: bool) -> str:
+    paragraph = (
+        "先分析需求：页面包含 {标题} 与 {按钮}，按钮文案形如 \"提交 {count} 项\"，"
+        "候选布局 [纵向, 横向] 之一；模板占位符 {{name}} 会在渲染时替换。"
+        "草稿（未写完）：{\"type\": \"label\", \"props\": {\n"
+    )
+    noise = paragraph * (size_kb * 1024 // len(paragraph.encode("utf-8")) + 1)
+    nodes = [{"type": "label", "props": {"text": f"第 {i} 行 }} {{"}, "events": {}, "children": []} for i in range(50)]
+    ir = {"version": "ucc-ui-ir@v0", "theme": {}, "variables": [], "tree": {"type": "panel", "children": nodes}}
+    payload = json.dumps({"plan": {}, "ir": ir}, ensure_ascii=False)
+    if fenced:
+        payload = f"```json\n{payload}\n```"
+    return noise + payload + "\n" + noise
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JSON extraction latency on long chatty completions")
+    parser.add_argument("--sizes-kb", type=int, nargs="+", default=[16, 64, 128, 256])
+    parser.add_argument("--legacy", action="store_true", help="also time the previous quadratic extractor")
+    args = parser.parse_args()
+
+    for size_kb in args.sizes_kb:
+        for fenced in (True, False):
+            text = _chatty_output(size_kb, fenced)
+            candidates = [("extract_first_json", extract_first_json)]
+            if args.legacy:
+                candidates.append(("legacy", _legacy_extract))
+            for label, extract in candidates:
+                started = time.perf_counter()
+                try:
+                    found = "ir" in extract(text)
+                except ValueError:
+                    found = False
+                elapsed = time.perf_counter() - started
+                size = len(text.encode("utf-8")) / 1024
+                style = "fenced" if fenced else "bare"
+                print(f"{label:>18}: {size:7.0f} KB {style:>6} {elapsed * 1000:9.2f}ms found_ir={found}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any, Dict
+
+from ucc_a2ui.generator.validator import IRValidator
+from ucc_a2ui.library import build_whitelist
+from ucc_a2ui.library.json_loader import JSONComponentRecord
+
+
+def _tree(depth: int, fanout: int) -> Dict[str, Any]:
+    children = [_tree(depth - 1, fanout) for _ in range(fanout)] if depth else []
+    return {"type": "panel", "props": {"textBinding": "@title"}, "events": {"onClick": "go"}, "children": children}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="IR validation throughput: fast structural path vs jsonschema")
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    whitelist = build_whitelist([JSONComponentRecord("panel", "基础组件", "Panel", {})])
+    ir = {"version": "ucc-ui-ir@v0", "theme": {}, "variables": [{"name": "title"}], "tree": _tree(args.depth, args.fanout)}
+    nodes = sum(args.fanout**level for level in range(args.depth + 1))
+    for label, validator in (
+        ("jsonschema", IRValidator(whitelist, fast_schema=False)),
+        ("fast", IRValidator(whitelist)),
+    ):
+        validator.validate(ir)
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            validator.validate(ir)
+        elapsed = (time.perf_counter() - started) / args.repeat
+        print(f"{label:>10}: nodes={nodes} {elapsed * 1000:.2f}ms/IR {nodes / elapsed:,.0f} nodes/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,82 @@
 from __future__ import annotations
 
 import argparse
-import gc
-import hashlib
 import json
+import os
 import sys
 from pathlib import Path
-from typing import Iterator
-
-import numpy as np
 
 from .config import Config
-from .docs import generate_docs
-from .embed import build_embedder
-from .embed.chunker import chunk_text
-from .embed.index_faiss import (
-    IndexedChunk,
-    add_vectors,
-    count_chunks,
-    create_empty_index,
-    load_faiss_index,
-    save_faiss_index_parts,
-)
-from .embed.search import search_index
-from .generator import generate_ui, validate_ir
-from .library import build_whitelist, export_library, load_component_schema_json
-
-try:
-    import psutil
-except ImportError:  # pragma: no cover - optional dependency
-    psutil = None
-
-
-def _load_whitelist(config: Config):
+from .library import load_whitelist
+
+# Each subcommand imports its own stack when it runs: shell hooks call
+# `validate` constantly and must not pay for numpy/faiss, requests or the
+# LLM clients. tests/test_cli_startup.py holds the per-command budget.
+
+
+def _load_whitelist(config: Config, refresh: bool = False):
     component_path = config.get("library", "component_path")
     if not component_path:
         raise ValueError("library.component_path is required for JSON schema input.")
-    components, _ = load_component_schema_json(component_path)
-    return build_whitelist(components)
+    snapshot_path = config.get("library", "snapshot_path", default=".cache/whitelist.snapshot")
+    return load_whitelist(component_path, snapshot_path or None, refresh=refresh)
 
 
 def _run_sync(config: Config) -> int:
+    import shutil
+
+    import numpy as np
+
+    from . import embed
+    from .docs import generate_docs
+    from .embed.chunk_store import CHUNKS_FILE, LEGACY_CHUNKS_FILE, ChunkStoreWriter, migrate_jsonl_store
+    from .embed.embed_cache import build_embedding_cache
+    from .embed.executor import EmbeddingExecutor
+    from .embed.index_faiss import (
+        IndexBuilder,
+        IndexedChunk,
+        index_type_of,
+        load_faiss_index,
+        open_chunk_store,
+        save_faiss_index_parts,
+        supports_removal,
+        training_size,
+    )
+    from .embed.index_manifest import IndexManifest, read_index_manifest, write_index_manifest
+    from .embed.index_versions import (
+        DEFAULT_RETENTION,
+        create_version_dir,
+        current_version,
+        gc_versions,
+        publish_version,
+        resolve_index_dir,
+    )
+    from .embed.lexical import LEXICAL_FILE, LexicalIndexWriter
+    from .embed.pipeline import SyncPipeline, chunk_batches, format_stage_report
+    from .library import export_library
+
+    try:
+        import psutil
+    except ImportError:  # pragma: no cover - optional dependency
+        psutil = None
+
     print("[sync] loading library and exporting whitelist")
-    whitelist = _load_whitelist(config)
+    whitelist = _load_whitelist(config, refresh=True)
     output_path = config.get("library", "output_path", default="library.json")
     export_library(output_path, whitelist)
 
     print("[sync] generating docs")
     docs_dir = config.get("docs", "output_dir", default="docs/components")
-    docs = generate_docs(docs_dir, whitelist)
+    docs = generate_docs(docs_dir, whitelist, workers=int(config.get("docs", "workers", default=1)))
+    print(
+        "[sync] docs:",
+        f"written={len(docs.changed)}",
+        f"unchanged={len(docs.unchanged)}",
+        f"removed={len(docs.removed)}",
+    )
 
     embed_config = config.get_resolved("embed", default={})
-    embedder = build_embedder(embed_config)
+    embedder = embed.build_embedder(embed_config)
     embed_mode = str(embed_config.get("mode", "mock"))
     embed_base_url = str(embed_config.get("base_url", ""))
     embed_model = str(embed_config.get("model", ""))
@@ -63,34 +88,50 @@ def _run_sync(config: Config) -> int:
             )
 
     print("[sync] chunking docs")
-    doc_sources = [str(doc) for doc in docs]
     chunk_size = int(embed_config.get("chunk_size", 800))
     chunk_overlap = int(embed_config.get("chunk_overlap", 120))
     batch_size = int(embed_config.get("batch_size", 64))
     index_dir = embed_config.get("index_dir", "index/ucc_docs")
-    index_path = Path(index_dir) / "index.faiss"
-    chunks_path = Path(index_dir) / "chunks.jsonl"
-    offsets_path = Path(index_dir) / "chunks.offsets.npy"
-
-    doc_hashes = {}
-    for source in doc_sources:
-        text = Path(source).read_text(encoding="utf-8")
-        doc_hashes[source] = hashlib.sha256(text.encode("utf-8")).hexdigest()
-
+    # Existing data is read from the published version; changes go into a new one.
+    live_dir = resolve_index_dir(index_dir)
+    index_path = live_dir / "index.faiss"
+    chunks_path = live_dir / CHUNKS_FILE
+    compress_chunks = bool(embed_config.get("compress_chunks", False))
+    index_type = str(embed_config.get("index_type", "flat"))
+    index_params = dict(embed_config.get("index_params") or {})
+
+    # Docgen already knows every doc's content hash; unchanged docs are not read here at all.
+    doc_hashes = docs.doc_hashes
+
+    embed_signature = {"embedder": type(embedder).__name__, "mode": embed_mode, "model": embed_model}
+    chunking = {"chunk_size": chunk_size, "chunk_overlap": chunk_overlap}
     existing_doc_hashes: dict[str, str] = {}
+    existing_index_type = None
+    existing_vectors = 0
     existing_index = None
+    existing_chunks = None
+    existing_lexical = None
     existing_chunk_count = 0
-    if index_path.exists() and chunks_path.exists():
-        faiss_index = load_faiss_index(index_dir)
+    if not chunks_path.exists() and (live_dir / LEGACY_CHUNKS_FILE).exists():
+        migrated = migrate_jsonl_store(live_dir, compress=compress_chunks)
+        print(f"[sync] migrated {migrated} chunks from {LEGACY_CHUNKS_FILE} to {CHUNKS_FILE}")
+    # The manifest answers "what is indexed" without reading index.faiss or the chunk store.
+    manifest = read_index_manifest(live_dir)
+    if manifest is not None:
+        existing_doc_hashes = manifest.doc_hashes()
+        existing_index_type = manifest.index_type
+        existing_vectors = manifest.totals.get("vectors", 0)
+    elif index_path.exists() and chunks_path.exists():
+        faiss_index = load_faiss_index(live_dir)
         existing_index = faiss_index.index
-        existing_chunk_count = count_chunks(chunks_path)
-        with chunks_path.open("r", encoding="utf-8") as handle:
-            for line in handle:
-                payload = json.loads(line)
-                doc_hash = payload.get("doc_hash")
-                source = payload.get("source")
-                if source and doc_hash and source not in existing_doc_hashes:
-                    existing_doc_hashes[source] = doc_hash
+        existing_chunks = faiss_index.chunks
+        existing_lexical = faiss_index.lexical
+        existing_chunk_count = len(existing_chunks)
+        existing_doc_hashes = {
+            source: doc_hash for source, doc_hash in existing_chunks.doc_hashes().items() if doc_hash
+        }
+        existing_index_type = index_type_of(existing_index)
+        existing_vectors = existing_index.ntotal
 
     current_sources = set(doc_hashes.keys())
     existing_sources = set(existing_doc_hashes.keys())
@@ -99,33 +140,34 @@ def _run_sync(config: Config) -> int:
         source for source in current_sources if existing_doc_hashes.get(source) not in (None, doc_hashes[source])
     }
     new_sources = current_sources - existing_sources
+    index_type_changed = existing_index_type is not None and existing_index_type != index_type
+    if index_type_changed and existing_index_type == "flat":
+        # Small indexes fall back to flat when they cannot be trained yet; keep them
+        # until there is enough data to train the configured type.
+        index_type_changed = existing_vectors >= training_size(index_type, index_params)
+    settings_changed = manifest is not None and (
+        {key: manifest.embed.get(key) for key in embed_signature} != embed_signature or manifest.chunking != chunking
+    )
     print(
         "[sync] diff status:",
         f"new={len(new_sources)}",
         f"changed={len(changed_sources)}",
         f"removed={len(removed_sources)}",
     )
-
-    def build_chunks_stream(
-        target_sources: set[str],
-        chunk_size: int,
-        chunk_overlap: int,
-        batch_size: int,
-    ) -> Iterator[list[IndexedChunk]]:
-        batch: list[IndexedChunk] = []
-        for source in target_sources:
-            text = Path(source).read_text(encoding="utf-8")
-            doc_hash = doc_hashes[source]
-            for chunk in chunk_text(text, chunk_size, chunk_overlap):
-                chunk_hash = hashlib.sha256(chunk.encode("utf-8")).hexdigest()
-                batch.append(
-                    IndexedChunk(text=chunk, source=source, doc_hash=doc_hash, chunk_hash=chunk_hash)
-                )
-                if len(batch) >= batch_size:
-                    yield batch
-                    batch = []
-        if batch:
-            yield batch
+    if index_type_changed:
+        print(f"[sync] index type changed {existing_index_type} -> {index_type}")
+    if settings_changed:
+        print("[sync] embedder or chunking settings changed since the index was built")
+    stale_sources = changed_sources | removed_sources
+    if manifest is not None and (new_sources or stale_sources) and not (index_type_changed or settings_changed):
+        faiss_index = load_faiss_index(live_dir)
+        existing_index = faiss_index.index
+        existing_chunks = faiss_index.chunks
+        existing_lexical = faiss_index.lexical
+        existing_chunk_count = len(existing_chunks)
+    needs_rebuild = index_type_changed or settings_changed or bool(
+        stale_sources and (existing_index is None or not supports_removal(existing_index))
+    )
 
     def _format_rss_mb() -> str:
         if psutil is None:
@@ -133,144 +175,173 @@ def _run_sync(config: Config) -> int:
         rss_mb = psutil.Process().memory_info().rss / (1024 * 1024)
         return f"rss={rss_mb:.1f}MB"
 
+    embed_cache = build_embedding_cache(embed_config)
+
+    executor = EmbeddingExecutor(embedder, int(embed_config.get("max_in_flight", 1)), cache=embed_cache)
+
     index = None
     index_status = "rebuilt"
     total_chunks = 0
-
-    def _load_offsets() -> list[int]:
-        if offsets_path.exists():
-            return np.load(offsets_path).tolist()
-        if not chunks_path.exists():
-            return []
-        offsets: list[int] = []
-        with chunks_path.open("rb") as handle:
-            while True:
-                offset = handle.tell()
-                line = handle.readline()
-                if not line:
-                    break
-                offsets.append(offset)
-        if offsets:
-            np.save(offsets_path, np.asarray(offsets, dtype=np.int64))
-        return offsets
-
-    if removed_sources or changed_sources:
-        print("[sync] rebuilding full index")
-        # Releasing vectors alone isn't enough; streaming chunks avoids full-text accumulation.
-        # Tune batch_size/chunk_size/chunk_overlap in config to further reduce peak memory.
-        total_vectors = 0
-        batch_num = 0
-        offsets: list[int] = []
-        current_offset = 0
-        chunks_path.parent.mkdir(parents=True, exist_ok=True)
-        with chunks_path.open("w", encoding="utf-8") as chunk_handle:
-            for batch in build_chunks_stream(current_sources, chunk_size, chunk_overlap, batch_size):
-                batch_num += 1
-                texts = [chunk.text for chunk in batch]
-                vectors = np.asarray(embedder.embed(texts).vectors, dtype="float32")
-                if index is None:
-                    dim = int(vectors.shape[1]) if vectors.ndim > 1 else len(vectors[0])
-                    index = create_empty_index(dim)
-                add_vectors(index, vectors)
-                for chunk in batch:
-                    chunk_record = {
-                        "text": chunk.text,
-                        "source": chunk.source,
-                        "doc_hash": chunk.doc_hash,
-                        "chunk_hash": chunk.chunk_hash,
-                    }
-                    line = json.dumps(chunk_record, ensure_ascii=False) + "\n"
-                    offsets.append(current_offset)
-                    chunk_handle.write(line)
-                    current_offset += len(line.encode("utf-8"))
-                total_vectors += len(batch)
-                total_chunks += len(batch)
-                print(
-                    "[sync] embedding batch",
-                    f"#{batch_num}",
-                    f"size={len(batch)}",
-                    f"total_vectors={total_vectors}",
-                    _format_rss_mb(),
-                )
-                del vectors
-                del texts
-                del batch
-                gc.collect()
-        if offsets:
-            np.save(offsets_path, np.asarray(offsets, dtype=np.int64))
-    elif new_sources:
-        print("[sync] appending new docs to index")
-        if existing_chunk_count:
-            index = existing_index
-        total_vectors = existing_chunk_count
-        total_chunks = existing_chunk_count
+    pipeline_report = None
+    version_dir = None
+    builder = IndexBuilder(index_type, index_params)
+
+    if needs_rebuild or new_sources or stale_sources:
+        stale_rows = np.array([], dtype=np.int64)
+        carried = None
+        if needs_rebuild:
+            print("[sync] rebuilding full index")
+            target_sources = current_sources
+        else:
+            if stale_sources:
+                print("[sync] updating index: removing stale vectors and embedding new/changed docs only")
+            else:
+                print("[sync] appending new docs to index")
+            target_sources = new_sources | changed_sources
+            if existing_chunks is not None and existing_chunk_count:
+                carried = existing_chunks
+                builder = IndexBuilder(index_type, index_params, index=existing_index, next_id=existing_chunk_count)
+                stale_rows = (manifest or existing_chunks).rows_for_sources(stale_sources)
+                removed_vectors = builder.remove_ids(stale_rows)
+                print(f"[sync] removed vectors={removed_vectors} sources={len(stale_sources)}")
+        total_chunks = carried.live_count - len(stale_rows) if carried is not None else 0
         batch_num = 0
-        offsets = _load_offsets()
-        current_offset = chunks_path.stat().st_size if chunks_path.exists() else 0
-        chunks_path.parent.mkdir(parents=True, exist_ok=True)
-        with chunks_path.open("a", encoding="utf-8") as chunk_handle:
-            for batch in build_chunks_stream(new_sources, chunk_size, chunk_overlap, batch_size):
-                batch_num += 1
-                texts = [chunk.text for chunk in batch]
-                vectors = np.asarray(embedder.embed(texts).vectors, dtype="float32")
-                if index is None:
-                    dim = int(vectors.shape[1]) if vectors.ndim > 1 else len(vectors[0])
-                    index = create_empty_index(dim)
-                add_vectors(index, vectors)
-                for chunk in batch:
-                    chunk_record = {
-                        "text": chunk.text,
-                        "source": chunk.source,
-                        "doc_hash": chunk.doc_hash,
-                        "chunk_hash": chunk.chunk_hash,
-                    }
-                    line = json.dumps(chunk_record, ensure_ascii=False) + "\n"
-                    offsets.append(current_offset)
-                    chunk_handle.write(line)
-                    current_offset += len(line.encode("utf-8"))
-                total_vectors += len(batch)
-                total_chunks += len(batch)
-                print(
-                    "[sync] embedding batch",
-                    f"#{batch_num}",
-                    f"size={len(batch)}",
-                    f"total_vectors={total_vectors}",
-                    _format_rss_mb(),
-                )
-                del vectors
-                del texts
-                del batch
-                gc.collect()
-        if offsets:
-            np.save(offsets_path, np.asarray(offsets, dtype=np.int64))
-        index_status = "appended"
+
+        def write_batch(batch: list[IndexedChunk], vectors: np.ndarray) -> None:
+            nonlocal batch_num, total_chunks
+            batch_num += 1
+            builder.add(vectors)
+            writer.add_many(batch)
+            lexical_writer.add_many(chunk.text for chunk in batch)
+            total_chunks += len(batch)
+            print(
+                "[sync] embedding batch",
+                f"#{batch_num}",
+                f"size={len(batch)}",
+                f"total_vectors={total_chunks}",
+                _format_rss_mb(),
+            )
+
+        # Chunking, embedding and writing overlap; bounded queues between them cap
+        # how many batches are alive at once, which is what bounds peak memory.
+        version_dir = create_version_dir(index_dir)
+        writer = ChunkStoreWriter(version_dir / CHUNKS_FILE, compress=compress_chunks)
+        # BM25 postings for lexical / hybrid search, in the same row order as the chunk store.
+        lexical_writer = LexicalIndexWriter(version_dir / LEXICAL_FILE)
+        try:
+            if carried is not None:
+                writer.add_store(carried, delete_rows=stale_rows)
+                lexical_writer.add_store(carried, delete_rows=stale_rows, lexical=existing_lexical)
+            batches = chunk_batches(sorted(target_sources), doc_hashes, chunk_size, chunk_overlap, batch_size)
+            pipeline = SyncPipeline(executor, int(embed_config.get("pipeline_queue_size", 4)))
+            pipeline_report = pipeline.run(batches, write_batch)
+        except BaseException:
+            writer.abort()
+            lexical_writer.abort()
+            shutil.rmtree(version_dir, ignore_errors=True)
+            raise
+        writer.close()
+        lexical_writer.close()
+        index = builder.finish()
+        print("[sync] pipeline:", format_stage_report(pipeline_report))
+        if not needs_rebuild:
+            index_status = "updated" if stale_sources else "appended"
     else:
         print("[sync] no doc changes detected; index unchanged")
-        total_chunks = existing_chunk_count
+        if manifest is not None:
+            total_chunks = manifest.totals.get("live_chunks", 0)
+        else:
+            total_chunks = existing_chunks.live_count if existing_chunks is not None else 0
         index_status = "unchanged"
         index = existing_index
-
-    if index is None:
+        if chunks_path.exists() and not (live_dir / LEXICAL_FILE).exists():
+            # Indexes from before lexical search get their postings added in place; this
+            # only adds a file, so readers of the published version are unaffected.
+            chunk_store = open_chunk_store(live_dir)
+            lexical_writer = LexicalIndexWriter(live_dir / LEXICAL_FILE)
+            lexical_writer.add_store(chunk_store)
+            lexical_writer.close()
+            chunk_store.close()
+            print(f"[sync] built missing {LEXICAL_FILE} for the current index")
+
+    if embed_cache is not None:
+        embed_cache.flush()
+        print(
+            "[sync] embedding cache:",
+            f"hits={embed_cache.hits}",
+            f"misses={embed_cache.misses}",
+            f"entries={len(embed_cache)}",
+        )
+    if index is None and (index_status != "unchanged" or existing_index_type is None):
         raise ValueError("No chunks to index")
-    save_faiss_index_parts(index_dir, index)
-    print("[sync] index saved")
+    if index_status != "unchanged":
+        if builder.fallback_reason:
+            print(f"[sync] warning: {builder.fallback_reason}")
+        save_faiss_index_parts(version_dir, index)
+        print(f"[sync] index saved to {version_dir}")
+        recall = builder.recall_report()
+        if recall is not None:
+            print(
+                "[sync] recall vs flat:",
+                f"index_type={recall['index_type']}",
+                f"recall@{recall['k']}={recall['recall']:.3f}",
+                f"queries={recall['queries']}",
+            )
+    if index_status != "unchanged" or manifest is None:
+        manifest_dir = version_dir or live_dir
+        chunk_store = open_chunk_store(manifest_dir)
+        ranges = chunk_store.source_ranges()
+        write_index_manifest(
+            manifest_dir,
+            IndexManifest(
+                sources={
+                    source: {"doc_hash": doc_hashes[source], "rows": ranges.get(source, [])}
+                    for source in sorted(current_sources)
+                },
+                embed={**embed_signature, "dim": int(index.d)},
+                chunking=chunking,
+                index_type=index_type_of(index),
+                totals={
+                    "rows": len(chunk_store),
+                    "live_chunks": chunk_store.live_count,
+                    "vectors": int(index.ntotal),
+                    "sources": len(current_sources),
+                },
+            ),
+        )
+        chunk_store.close()
+    if version_dir is not None:
+        publish_version(index_dir, version_dir)
+        removed = gc_versions(index_dir, int(embed_config.get("index_retention", DEFAULT_RETENTION)))
+        print(f"[sync] published {version_dir.name}; removed {len(removed)} old version(s)/files")
 
     summary = {
         "components": len(whitelist.components),
-        "docs": len(docs),
+        "docs": len(docs.doc_hashes),
+        "docs_written": len(docs.changed),
+        "docs_removed": len(docs.removed),
         "chunks": total_chunks,
         "index_dir": index_dir,
         "index_status": index_status,
+        "index_version": current_version(index_dir),
+        "index_type": index_type_of(index) if index is not None else existing_index_type,
         "changed_components": len(changed_sources),
         "new_components": len(new_sources),
         "removed_components": len(removed_sources),
+        "embed_cache_hits": embed_cache.hits if embed_cache is not None else 0,
+        "embed_cache_misses": embed_cache.misses if embed_cache is not None else 0,
+        "pipeline": pipeline_report,
     }
     print(json.dumps(summary, ensure_ascii=False, indent=2))
     return 0
 
 
 def _run_generate(args: argparse.Namespace, config: Config) -> int:
+    from .generator.generate import generate_ui
+
     whitelist = _load_whitelist(config)
+    if args.batch:
+        return _run_generate_batch(args, config, whitelist)
     out_dir = args.out or config.get("output", "dir", default="out")
     _, report = generate_ui(
         args.prompt,
@@ -279,29 +350,132 @@ def _run_generate(args: argparse.Namespace, config: Config) -> int:
         out_dir=out_dir,
         print_messages=args.print_messages,
         save_plan=args.save_plan,
+        use_cache=not args.no_cache,
     )
     return 0 if report.get("SchemaPass") and not report.get("errors") else 2
 
 
+def _run_generate_batch(args: argparse.Namespace, config: Config, whitelist) -> int:
+    from .generator.batch import generate_batch, iter_prompts
+    from .generator.context import build_component_retriever
+    from .generator.generate import build_llm
+
+    workers = args.workers or int(config.get("generator", "batch_workers", default=4))
+    llm_config = config.get_resolved("llm", default={})
+    # One client for every worker; keep enough pooled connections for all of them.
+    llm_config["pool_size"] = max(int(llm_config.get("pool_size", 10)), workers)
+    sink_path = args.out or str(Path(config.get("output", "dir", default="out")) / "batch_results.jsonl")
+    stats = generate_batch(
+        iter_prompts(args.batch),
+        config=config,
+        whitelist=whitelist,
+        llm=build_llm(llm_config, whitelist),
+        sink_path=sink_path,
+        workers=workers,
+        max_attempts=int(config.get("generator", "batch_attempts", default=2)),
+        retriever=build_component_retriever(config),
+        use_cache=not args.no_cache,
+    )
+    print(json.dumps(stats, ensure_ascii=False, indent=2))
+    return 0 if stats["failed"] == 0 and stats["errors"] == 0 else 2
+
+
 def _run_validate(args: argparse.Namespace, config: Config) -> int:
+    from .generator.bulk_validate import is_bulk_source
+    from .generator.validator import validate_ir
+
+    strict = bool(config.get("library", "strict_params", default=False))
+    if is_bulk_source(args.input):
+        return _run_validate_bulk(args, config, strict)
     whitelist = _load_whitelist(config)
     ir = json.loads(Path(args.input).read_text(encoding="utf-8"))
-    strict = bool(config.get("library", "strict_params", default=False))
     report = validate_ir(ir, whitelist, strict=strict)
     print(json.dumps(report, ensure_ascii=False, indent=2))
     return 0 if report.get("SchemaPass") and not report.get("errors") else 2
 
 
+def _run_validate_bulk(args: argparse.Namespace, config: Config, strict: bool) -> int:
+    from .generator.bulk_validate import PassRateCounter, iter_ir_items, validate_many
+
+    counter = PassRateCounter()
+    workers = args.workers if args.workers is not None else (os.cpu_count() or 1)
+    sink = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    try:
+        for result in validate_many(
+            iter_ir_items(args.input), config, _load_whitelist, strict=strict, workers=workers
+        ):
+            counter.add(result)
+            sink.write(json.dumps(result, ensure_ascii=False) + "\n")
+    finally:
+        if sink is not sys.stdout:
+            sink.close()
+    summary = json.dumps(counter.summary(), ensure_ascii=False, indent=2)
+    # Keep stdout pure JSONL when the per-item reports go there.
+    print(summary, file=sys.stdout if args.out else sys.stderr)
+    return 0 if counter.total and counter.passed == counter.total else 2
+
+
 def _run_search(args: argparse.Namespace, config: Config) -> int:
+    from .embed import build_embedder
+    from .embed.query_cache import build_query_cache, cache_metadata
+    from .embed.search import search_index, search_many
+
     embed_config = config.get_resolved("embed", default={})
-    embedder = build_embedder(embed_config)
+    embedder, result_cache = build_query_cache(embed_config, build_embedder(embed_config))
     index_dir = embed_config.get("index_dir", "index/ucc_docs")
-    results = search_index(index_dir, args.query, embedder, top_k=args.k)
-    payload = [result.__dict__ for result in results]
+    search_params = dict(embed_config.get("index_params") or {})
+    if args.nprobe is not None:
+        search_params["nprobe"] = args.nprobe
+    if args.ef_search is not None:
+        search_params["ef_search"] = args.ef_search
+    mode = args.mode or str(embed_config.get("search_mode", "vector"))
+    if args.queries_file:
+        batch_size = int(embed_config.get("batch_size", 64))
+        with open(args.queries_file, "r", encoding="utf-8") as handle:
+            queries = (line.strip() for line in handle)
+            for query, results in search_many(
+                index_dir,
+                (query for query in queries if query),
+                embedder,
+                top_k=args.k,
+                search_params=search_params,
+                batch_size=batch_size,
+                result_cache=result_cache,
+                mode=mode,
+            ):
+                record = {
+                    "query": query,
+                    "results": [result.__dict__ for result in results],
+                    "meta": cache_metadata(embedder, result_cache),
+                }
+                print(json.dumps(record, ensure_ascii=False), flush=True)
+        return 0
+    results = search_index(
+        index_dir,
+        args.query,
+        embedder,
+        top_k=args.k,
+        search_params=search_params,
+        result_cache=result_cache,
+        mode=mode,
+    )
+    payload = {
+        "query": args.query,
+        "results": [result.__dict__ for result in results],
+        "meta": cache_metadata(embedder, result_cache),
+    }
     print(json.dumps(payload, ensure_ascii=False, indent=2))
     return 0
 
 
+def _run_serve(args: argparse.Namespace, config: Config) -> int:
+    from .server import serve
+
+    host = args.host or config.get("server", "host", default="127.0.0.1")
+    port = args.port if args.port is not None else int(config.get("server", "port", default=8765))
+    return serve(config, _load_whitelist, host=host, port=port)
+
+
 def _add_shared_config_flag(parser: argparse.ArgumentParser) -> None:
     parser.add_argument("--config", default="config.yaml")
 
@@ -317,19 +491,37 @@ def main() -> None:
 
     gen_parser = subparsers.add_parser("generate")
     _add_shared_config_flag(gen_parser)
-    gen_parser.add_argument("--prompt", required=True)
-    gen_parser.add_argument("--out")
+    gen_input = gen_parser.add_mutually_exclusive_group(required=True)
+    gen_input.add_argument("--prompt")
+    gen_input.add_argument("--batch", help="prompts JSONL ({\"id\": ..., \"prompt\": ...} per line)")
+    gen_parser.add_argument("--out", help="output dir; with --batch, the results JSONL (resumed if it exists)")
+    gen_parser.add_argument("--workers", type=int, help="with --batch: concurrent generations")
     gen_parser.add_argument("--print-messages", action="store_true")
     gen_parser.add_argument("--save-plan", action="store_true")
+    gen_parser.add_argument("--no-cache", action="store_true", help="bypass the llm.cache completion cache")
 
     val_parser = subparsers.add_parser("validate")
     _add_shared_config_flag(val_parser)
-    val_parser.add_argument("--in", dest="input", required=True)
+    val_parser.add_argument("--in", dest="input", required=True, help="IR JSON file, directory, glob or JSONL")
+    val_parser.add_argument("--out", help="bulk mode: write per-item JSONL reports here instead of stdout")
+    val_parser.add_argument("--workers", type=int, help="bulk mode: worker processes (default: CPU count)")
 
     search_parser = subparsers.add_parser("search")
     _add_shared_config_flag(search_parser)
-    search_parser.add_argument("--query", required=True)
+    search_input = search_parser.add_mutually_exclusive_group(required=True)
+    search_input.add_argument("--query")
+    search_input.add_argument("--queries-file", help="one query per line; prints one JSON result per line")
     search_parser.add_argument("--k", type=int, default=5)
+    search_parser.add_argument("--nprobe", type=int)
+    search_parser.add_argument("--ef-search", type=int)
+    search_parser.add_argument(
+        "--mode", choices=("lexical", "vector", "hybrid"), help="defaults to embed.search_mode (vector)"
+    )
+
+    serve_parser = subparsers.add_parser("serve")
+    _add_shared_config_flag(serve_parser)
+    serve_parser.add_argument("--host")
+    serve_parser.add_argument("--port", type=int)
 
     args = parser.parse_args()
     config = Config.load(args.config)
@@ -342,6 +534,8 @@ def main() -> None:
         sys.exit(_run_validate(args, config))
     if args.command == "search":
         sys.exit(_run_search(args, config))
+    if args.command == "serve":
+        sys.exit(_run_serve(args, config))
 
 
 if __name__ == "__main__":
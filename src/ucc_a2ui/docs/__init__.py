@@ -1,3 +1,3 @@
-from .docgen import generate_docs
+from .docgen import DocgenResult, generate_docs
 
-__all__ = ["generate_docs"]
+__all__ = ["DocgenResult", "generate_docs"]
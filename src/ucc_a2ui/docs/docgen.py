@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, List
 
-from ..library.whitelist import EVENT_WHITELIST, LibraryWhitelist
+from ..library.whitelist import EVENT_WHITELIST, ComponentWhitelist, LibraryWhitelist
 from .templates import (
     render_common_errors,
     render_events_section,
@@ -13,6 +17,9 @@ from .templates import (
     render_props_section,
 )
 
+# Bump whenever templates.py or the layout below changes, so every doc re-renders.
+TEMPLATE_VERSION = "ucc-docgen@v1"
+MANIFEST_FILE = ".docgen_manifest.json"
 CATEGORY_BUCKETS = ["Layout", "Style", "Data", "Behavior", "State", "Advanced", "Events", "Unknown/General"]
 
 
@@ -38,24 +45,156 @@ def _build_props(component) -> Dict[str, List[str]]:
     return categories
 
 
-def generate_docs(output_dir: str | Path, whitelist: LibraryWhitelist) -> List[Path]:
+def render_component_doc(component: ComponentWhitelist) -> str:
+    categories = _build_props(component)
+    sample_prop = component.key_params[0] if component.key_params else None
+    return "\n\n".join(
+        [
+            render_header(component.component_type, component.name_cn),
+            render_intro(component.name_cn),
+            render_props_section(categories),
+            render_events_section(EVENT_WHITELIST),
+            render_example_ir(component.component_type, sample_prop),
+            render_common_errors(),
+        ]
+    ).strip() + "\n"
+
+
+def component_fingerprint(component: ComponentWhitelist) -> str:
+    """Hash of everything a component's doc is rendered from."""
+    payload = json.dumps(
+        [
+            TEMPLATE_VERSION,
+            EVENT_WHITELIST,
+            component.component_type,
+            component.name_cn,
+            component.name_en,
+            component.key_params,
+            [list(vars(param).values()) for param in component.strict_params],
+        ],
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class DocgenResult:
+    """Outcome of a docgen run; ``doc_hashes`` maps each current doc path to its content sha256."""
+
+    changed: List[Path] = field(default_factory=list)
+    unchanged: List[Path] = field(default_factory=list)
+    removed: List[Path] = field(default_factory=list)
+    doc_hashes: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def paths(self) -> List[Path]:
+        return [Path(source) for source in self.doc_hashes]
+
+
+def _read_manifest(path: Path) -> Dict[str, Dict[str, Any]]:
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get("template_version") != TEMPLATE_VERSION:
+        return {}
+    docs = manifest.get("docs")
+    return docs if isinstance(docs, dict) else {}
+
+
+def _write_manifest(path: Path, docs: Dict[str, Dict[str, Any]]) -> None:
+    tmp_path = path.with_name(f"{path.name}.tmp{os.getpid()}")
+    payload = {"template_version": TEMPLATE_VERSION, "docs": docs}
+    tmp_path.write_text(json.dumps(payload, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def _stamp(path: Path) -> Dict[str, int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _render_all(components: List[ComponentWhitelist], workers: int) -> List[str]:
+    if workers <= 1 or len(components) <= 1:
+        return [render_component_doc(component) for component in components]
+    # Imported here so a serial run (the default) never loads multiprocessing.
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, len(components) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(render_component_doc, components, chunksize=chunksize))
+
+
+def generate_docs(output_dir: str | Path, whitelist: LibraryWhitelist, workers: int = 1) -> DocgenResult:
+    """Renders one doc per component, rewriting only docs whose inputs changed.
+
+    A manifest next to the docs records each doc's fingerprint, content hash
+    and stat; a doc whose fingerprint and stat both match is not rendered or
+    read again. Docs of components that left the whitelist are deleted; with no
+    manifest, that is every ``.md`` in ``output_dir`` the whitelist did not produce.
+    ``workers`` > 1 renders the outdated docs in a process pool.
+    """
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
-    written: List[Path] = []
+    manifest_path = output_dir / MANIFEST_FILE
+    previous = _read_manifest(manifest_path)
+    result = DocgenResult()
+    entries: Dict[str, Dict[str, Any]] = {}
+    outdated: List[ComponentWhitelist] = []
+    fingerprints: Dict[str, str] = {}
     for component in whitelist.components.values():
-        categories = _build_props(component)
-        sample_prop = component.key_params[0] if component.key_params else None
-        content = "\n\n".join(
-            [
-                render_header(component.component_type, component.name_cn),
-                render_intro(component.name_cn),
-                render_props_section(categories),
-                render_events_section(EVENT_WHITELIST),
-                render_example_ir(component.component_type, sample_prop),
-                render_common_errors(),
-            ]
-        ).strip() + "\n"
+        component_type = component.component_type
+        path = output_dir / f"{component_type}.md"
+        fingerprint = component_fingerprint(component)
+        fingerprints[component_type] = fingerprint
+        entry = previous.get(component_type)
+        if (
+            entry
+            and entry.get("fingerprint") == fingerprint
+            and _stamp(path) == {"mtime_ns": entry.get("mtime_ns"), "size": entry.get("size")}
+        ):
+            entries[component_type] = entry
+            result.unchanged.append(path)
+        else:
+            outdated.append(component)
+
+    for component, content in zip(outdated, _render_all(outdated, workers)):
         path = output_dir / f"{component.component_type}.md"
-        path.write_text(content, encoding="utf-8")
-        written.append(path)
-    return written
+        doc_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        try:
+            current = path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            current = None
+        # Leave identical docs untouched so their mtime (and anything keyed on it) survives.
+        if current == content:
+            result.unchanged.append(path)
+        else:
+            path.write_text(content, encoding="utf-8")
+            result.changed.append(path)
+        entries[component.component_type] = {
+            "fingerprint": fingerprints[component.component_type],
+            "sha256": doc_hash,
+            **(_stamp(path) or {}),
+        }
+
+    stale = previous.keys() - entries.keys()
+    if not previous:
+        # Without a manifest (first run, or it was lost) nothing says which docs an
+        # older whitelist wrote, so any other .md in the directory counts as stale.
+        stale = {path.stem for path in output_dir.glob("*.md")} - entries.keys()
+    for component_type in sorted(stale):
+        path = output_dir / f"{component_type}.md"
+        path.unlink(missing_ok=True)
+        result.removed.append(path)
+
+    result.doc_hashes = {
+        str(output_dir / f"{component_type}.md"): entries[component_type]["sha256"]
+        for component_type in whitelist.components
+    }
+    if entries != previous:
+        _write_manifest(manifest_path, entries)
+    return result
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from typing import Any, Dict
 
+from ..transport import build_transport
 from .embedder_base import EmbedderBase
 from .embedder_dashscope_qwen import DashScopeQwenEmbedder
 from .embedder_mock import MockEmbedder
@@ -10,17 +11,20 @@ from .embedder_openai_compat import OpenAICompatibleEmbedder
 
 def build_embedder(config: Dict[str, Any]) -> EmbedderBase:
     mode = config.get("mode", "mock")
+    # Keep at least one pooled connection per in-flight sync request.
+    transport = build_transport(config, pool_size=max(10, int(config.get("max_in_flight", 1))))
     if mode == "openai_compatible":
         return OpenAICompatibleEmbedder(
             base_url=config.get("base_url", ""),
             api_key=config.get("api_key", ""),
             model=config.get("model", ""),
+            transport=transport,
         )
     if mode == "dashscope_qwen":
         api_key = config.get("api_key", "")
         if not api_key:
             return MockEmbedder()
-        return DashScopeQwenEmbedder(api_key=api_key, model=config.get("model", ""))
+        return DashScopeQwenEmbedder(api_key=api_key, model=config.get("model", ""), transport=transport)
     return MockEmbedder()
 
 __all__ = [
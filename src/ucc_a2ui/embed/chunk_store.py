@@ -0,0 +1,426 @@
+from __future__ import annotations
+
+import functools
+import json
+import mmap
+import os
+import struct
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+import numpy as np
+
+from .index_versions import resolve_index_dir
+
+CHUNKS_FILE = "chunks.bin"
+LEGACY_CHUNKS_FILE = "chunks.jsonl"
+LEGACY_OFFSETS_FILE = "chunks.offsets.npy"
+
+# chunks.bin layout (little endian), every section 8-byte aligned:
+#   header | text | sources (JSON list) | doc hashes (n_sources x 32B) | source ids (u32)
+#   | chunk hashes (n_chunks x 32B) | text offsets (u64, n_chunks + 1)
+#   | block offsets (u64, n_blocks + 1) | block starts (u64, n_blocks + 1)
+#   | tombstones (u8, n_chunks; version 2+)
+# Text offsets index the uncompressed text stream. With FLAG_ZLIB the stream is
+# stored as zlib blocks; block offsets locate them in the text section and block
+# starts give the first chunk of each block. Without it n_blocks is 0.
+# A chunk's row number is its stable vector id in the FAISS index. Rows whose
+# vectors were removed stay in place as tombstones with their text dropped.
+_MAGIC = b"UCCCHNK1"
+_VERSION = 2
+FLAG_ZLIB = 1
+_HEADER_V1 = struct.Struct("<8sIIQQQ8Q")
+_HEADER = struct.Struct("<8sIIQQQ9Q")
+_HASH_SIZE = 32
+_EMPTY_HASH = bytes(_HASH_SIZE)
+
+
+@dataclass
+class IndexedChunk:
+    text: str
+    source: str
+    doc_hash: str | None = None
+    chunk_hash: str | None = None
+
+
+def _encode_hash(value: str | None) -> bytes:
+    if not value:
+        return _EMPTY_HASH
+    return bytes.fromhex(value)
+
+
+def _decode_hash(value: bytes) -> str | None:
+    if value == _EMPTY_HASH:
+        return None
+    return value.hex()
+
+
+def _pad(handle) -> None:
+    remainder = handle.tell() % 8
+    if remainder:
+        handle.write(bytes(8 - remainder))
+
+
+class ChunkStore:
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        with self.path.open("rb") as handle:
+            self._buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = struct.unpack_from("<8sI", self._buffer, 0)
+        if magic != _MAGIC or version not in (1, _VERSION):
+            raise ValueError(f"{self.path} is not a chunk store (magic={magic!r}, version={version})")
+        header = (_HEADER if version == _VERSION else _HEADER_V1).unpack_from(self._buffer, 0)
+        (
+            self.flags,
+            self._count,
+            n_sources,
+            n_blocks,
+            text_off,
+            sources_off,
+            doc_hashes_off,
+            source_ids_off,
+            chunk_hashes_off,
+            text_offsets_off,
+            block_offsets_off,
+            block_starts_off,
+        ) = header[2:14]
+        buffer = self._buffer
+        self._text_off = text_off
+        self.sources: List[str] = json.loads(bytes(buffer[sources_off:doc_hashes_off]).rstrip(b"\0"))
+        self._doc_hashes = np.frombuffer(buffer, np.uint8, n_sources * _HASH_SIZE, doc_hashes_off)
+        self._source_ids = np.frombuffer(buffer, np.uint32, self._count, source_ids_off)
+        self._chunk_hashes = np.frombuffer(buffer, np.uint8, self._count * _HASH_SIZE, chunk_hashes_off)
+        # Views straight into the mapping: opening a store costs the same for any chunk count.
+        self._text_offsets = np.frombuffer(buffer, np.uint64, self._count + 1, text_offsets_off)
+        self._block_offsets = np.frombuffer(buffer, np.uint64, n_blocks + 1, block_offsets_off)
+        self._block_starts = np.frombuffer(buffer, np.uint64, n_blocks + 1, block_starts_off)
+        if version == _VERSION:
+            self._deleted = np.frombuffer(buffer, np.bool_, self._count, header[14])
+        else:
+            self._deleted = np.zeros(self._count, dtype=bool)
+        self._block = functools.lru_cache(maxsize=16)(self._decompress_block)
+
+    def __len__(self) -> int:
+        return int(self._count)
+
+    @property
+    def compressed(self) -> bool:
+        return bool(self.flags & FLAG_ZLIB)
+
+    @property
+    def live_count(self) -> int:
+        return int(self._count - np.count_nonzero(self._deleted))
+
+    def deleted_mask(self) -> np.ndarray:
+        return self._deleted
+
+    def doc_hashes(self) -> Dict[str, str | None]:
+        hashes = self._doc_hashes.reshape(-1, _HASH_SIZE)
+        live_sources = np.unique(self._source_ids[~self._deleted])
+        return {self.sources[idx]: _decode_hash(hashes[idx].tobytes()) for idx in live_sources.tolist()}
+
+    def rows_for_sources(self, sources: Iterable[str]) -> np.ndarray:
+        wanted = set(sources)
+        source_ids = [idx for idx, source in enumerate(self.sources) if source in wanted]
+        mask = np.isin(self._source_ids, np.asarray(source_ids, dtype=np.uint32)) & ~self._deleted
+        return np.flatnonzero(mask).astype(np.int64)
+
+    def source_ranges(self) -> Dict[str, List[List[int]]]:
+        """Live rows of each source as [start, end) runs; a source's chunks are written consecutively."""
+        live = np.flatnonzero(~self._deleted)
+        if not live.size:
+            return {}
+        ids = self._source_ids[live]
+        breaks = np.flatnonzero((np.diff(ids) != 0) | (np.diff(live) != 1)) + 1
+        ranges: Dict[str, List[List[int]]] = {}
+        for start, end in zip([0, *breaks.tolist()], [*breaks.tolist(), live.size]):
+            ranges.setdefault(self.sources[int(ids[start])], []).append([int(live[start]), int(live[end - 1]) + 1])
+        return ranges
+
+    def _decompress_block(self, block: int) -> bytes:
+        start = self._text_off + int(self._block_offsets[block])
+        end = self._text_off + int(self._block_offsets[block + 1])
+        return zlib.decompress(self._buffer[start:end])
+
+    def _texts(self, idx: np.ndarray) -> List[str]:
+        starts = self._text_offsets[idx].astype(np.int64)
+        ends = self._text_offsets[idx + 1].astype(np.int64)
+        if not self.compressed:
+            base = self._text_off
+            buffer = self._buffer
+            return [
+                buffer[base + start : base + end].decode("utf-8") for start, end in zip(starts.tolist(), ends.tolist())
+            ]
+        blocks = np.searchsorted(self._block_starts, idx.astype(np.uint64), side="right").astype(np.int64) - 1
+        bases = self._text_offsets[self._block_starts[blocks]].astype(np.int64)
+        texts: List[str] = []
+        for block, start, end in zip(blocks.tolist(), (starts - bases).tolist(), (ends - bases).tolist()):
+            texts.append(self._block(block)[start:end].decode("utf-8"))
+        return texts
+
+    def get(self, index: int) -> IndexedChunk:
+        return self.get_many([index])[0]
+
+    def get_many(self, indices: Sequence[int] | np.ndarray) -> List[IndexedChunk]:
+        idx = np.asarray(indices, dtype=np.int64)
+        if not idx.size:
+            return []
+        texts = self._texts(idx)
+        source_ids = self._source_ids[idx].tolist()
+        doc_hashes = self._doc_hashes.reshape(-1, _HASH_SIZE)
+        chunk_hashes = self._chunk_hashes.reshape(-1, _HASH_SIZE)[idx]
+        sources = self.sources
+        return [
+            IndexedChunk(
+                text=text,
+                source=sources[source_id],
+                doc_hash=_decode_hash(doc_hashes[source_id].tobytes()),
+                chunk_hash=_decode_hash(chunk_hashes[row].tobytes()),
+            )
+            for row, (text, source_id) in enumerate(zip(texts, source_ids))
+        ]
+
+    def iter_chunks(self, batch_size: int = 1024) -> Iterator[IndexedChunk]:
+        for start in range(0, len(self), batch_size):
+            yield from self.get_many(np.arange(start, min(start + batch_size, len(self))))
+
+    def close(self) -> None:
+        self._block.cache_clear()
+        # Views into the mapping must be released before it can be closed.
+        self._doc_hashes = self._source_ids = self._chunk_hashes = np.empty(0)
+        self._text_offsets = self._block_offsets = self._block_starts = self._deleted = np.empty(0)
+        self._buffer.close()
+
+
+class JSONLChunkStore:
+    def __init__(self, chunks_path: str | Path, offsets_path: str | Path) -> None:
+        self.chunks_path = Path(chunks_path)
+        self.offsets_path = Path(offsets_path)
+        self._offsets = self._load_offsets()
+        self._buffer, self._ends = self._map_chunks()
+
+    def _load_offsets(self) -> np.ndarray:
+        if self.offsets_path.exists():
+            return np.load(self.offsets_path, mmap_mode="r")
+        if not self.chunks_path.exists():
+            return np.array([], dtype=np.int64)
+        offsets: list[int] = []
+        with self.chunks_path.open("rb") as handle:
+            while True:
+                offset = handle.tell()
+                line = handle.readline()
+                if not line:
+                    break
+                offsets.append(offset)
+        return np.asarray(offsets, dtype=np.int64)
+
+    def _map_chunks(self) -> tuple[mmap.mmap | bytes, np.ndarray]:
+        if not self._offsets.size or not self.chunks_path.exists() or not self.chunks_path.stat().st_size:
+            return b"", np.array([], dtype=np.int64)
+        with self.chunks_path.open("rb") as handle:
+            buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        # Line i ends where line i+1 starts; only the last line needs a scan, since
+        # records appended after the offsets were saved must not leak into it.
+        last_end = buffer.find(b"\n", int(self._offsets[-1]))
+        ends = np.empty(self._offsets.size, dtype=np.int64)
+        ends[:-1] = self._offsets[1:]
+        ends[-1] = last_end if last_end != -1 else len(buffer)
+        return buffer, ends
+
+    def __len__(self) -> int:
+        return int(self._offsets.size)
+
+    def get(self, index: int) -> IndexedChunk:
+        return self.get_many([index])[0]
+
+    def get_many(self, indices: Sequence[int] | np.ndarray) -> List[IndexedChunk]:
+        idx = np.asarray(indices, dtype=np.int64)
+        if not idx.size:
+            return []
+        starts = np.asarray(self._offsets[idx], dtype=np.int64).tolist()
+        ends = self._ends[idx].tolist()
+        buffer = self._buffer
+        payload = b"[" + b",".join([buffer[start:end] for start, end in zip(starts, ends)]) + b"]"
+        return [IndexedChunk(**item) for item in json.loads(payload)]
+
+    def iter_chunks(self, batch_size: int = 1024) -> Iterator[IndexedChunk]:
+        for start in range(0, len(self), batch_size):
+            yield from self.get_many(np.arange(start, min(start + batch_size, len(self))))
+
+    def close(self) -> None:
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._buffer = b""
+
+
+class InMemoryChunkStore:
+    def __init__(self, chunks: List[IndexedChunk]) -> None:
+        self._chunks = chunks
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def get(self, index: int) -> IndexedChunk:
+        return self._chunks[index]
+
+    def get_many(self, indices: Sequence[int] | np.ndarray) -> List[IndexedChunk]:
+        return [self._chunks[int(index)] for index in indices]
+
+    def iter_chunks(self, batch_size: int = 1024) -> Iterator[IndexedChunk]:
+        return iter(self._chunks)
+
+
+class ChunkStoreWriter:
+    def __init__(self, path: str | Path, compress: bool = False, block_chunks: int = 64) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self._handle = self._tmp_path.open("wb")
+        self._handle.write(bytes(_HEADER.size))
+        self.compress = compress
+        self.block_chunks = max(1, block_chunks)
+        self._source_index: Dict[str, int] = {}
+        self._doc_hashes: List[bytes] = []
+        self._source_ids: List[int] = []
+        self._chunk_hashes = bytearray()
+        self._text_offsets: List[int] = [0]
+        self._block: List[bytes] = []
+        self._block_offsets: List[int] = [0]
+        self._block_starts: List[int] = [0]
+        self._deleted = bytearray()
+
+    def __len__(self) -> int:
+        return len(self._source_ids)
+
+    def add(self, chunk: IndexedChunk, deleted: bool = False) -> None:
+        if deleted:
+            chunk = IndexedChunk(text="", source=chunk.source, doc_hash=chunk.doc_hash, chunk_hash=chunk.chunk_hash)
+        self._deleted.append(1 if deleted else 0)
+        source_id = self._source_index.get(chunk.source)
+        if source_id is None:
+            source_id = self._source_index[chunk.source] = len(self._doc_hashes)
+            self._doc_hashes.append(_encode_hash(chunk.doc_hash))
+        elif not deleted and chunk.doc_hash:
+            # A changed doc's tombstoned rows are copied in first with the old hash;
+            # its re-embedded chunks carry the current one.
+            self._doc_hashes[source_id] = _encode_hash(chunk.doc_hash)
+        self._source_ids.append(source_id)
+        self._chunk_hashes += _encode_hash(chunk.chunk_hash)
+        data = chunk.text.encode("utf-8")
+        self._text_offsets.append(self._text_offsets[-1] + len(data))
+        if not self.compress:
+            self._handle.write(data)
+            return
+        self._block.append(data)
+        if len(self._block) >= self.block_chunks:
+            self._flush_block()
+
+    def add_many(self, chunks: Iterable[IndexedChunk]) -> None:
+        for chunk in chunks:
+            self.add(chunk)
+
+    def add_store(self, store: ChunkStore, delete_rows: Iterable[int] = (), batch_size: int = 1024) -> None:
+        deleted = store.deleted_mask().copy()
+        deleted[np.asarray(list(delete_rows), dtype=np.int64)] = True
+        for start in range(0, len(store), batch_size):
+            rows = np.arange(start, min(start + batch_size, len(store)))
+            for row, chunk in zip(rows.tolist(), store.get_many(rows)):
+                self.add(chunk, deleted=bool(deleted[row]))
+
+    def _flush_block(self) -> None:
+        if not self._block:
+            return
+        data = zlib.compress(b"".join(self._block))
+        self._handle.write(data)
+        self._block_offsets.append(self._block_offsets[-1] + len(data))
+        self._block_starts.append(len(self._source_ids))
+        self._block = []
+
+    def close(self) -> Path:
+        handle = self._handle
+        self._flush_block()
+        _pad(handle)
+        sections = []
+        sources = list(self._source_index)
+        for payload in (
+            json.dumps(sources, ensure_ascii=False).encode("utf-8"),
+            b"".join(self._doc_hashes),
+            np.asarray(self._source_ids, dtype=np.uint32).tobytes(),
+            bytes(self._chunk_hashes),
+            np.asarray(self._text_offsets, dtype=np.uint64).tobytes(),
+            np.asarray(self._block_offsets if self.compress else [0], dtype=np.uint64).tobytes(),
+            np.asarray(self._block_starts if self.compress else [0], dtype=np.uint64).tobytes(),
+            bytes(self._deleted),
+        ):
+            sections.append(handle.tell())
+            handle.write(payload)
+            _pad(handle)
+        n_blocks = len(self._block_offsets) - 1 if self.compress else 0
+        handle.seek(0)
+        handle.write(
+            _HEADER.pack(
+                _MAGIC,
+                _VERSION,
+                FLAG_ZLIB if self.compress else 0,
+                len(self._source_ids),
+                len(sources),
+                n_blocks,
+                _HEADER.size,
+                *sections,
+            )
+        )
+        handle.flush()
+        os.fsync(handle.fileno())
+        handle.close()
+        # Swap in atomically: searchers may hold the previous file memory-mapped.
+        os.replace(self._tmp_path, self.path)
+        return self.path
+
+    def abort(self) -> None:
+        self._handle.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+def write_chunk_store(
+    path: str | Path, chunks: Iterable[IndexedChunk], compress: bool = False
+) -> Path:
+    writer = ChunkStoreWriter(path, compress=compress)
+    writer.add_many(chunks)
+    return writer.close()
+
+
+def migrate_jsonl_store(index_dir: str | Path, compress: bool = False) -> int:
+    index_dir = Path(index_dir)
+    legacy_path = index_dir / LEGACY_CHUNKS_FILE
+    if not legacy_path.exists():
+        return 0
+    legacy = JSONLChunkStore(legacy_path, index_dir / LEGACY_OFFSETS_FILE)
+    count = len(legacy)
+    write_chunk_store(index_dir / CHUNKS_FILE, legacy.iter_chunks(), compress=compress)
+    legacy.close()
+    legacy_path.unlink()
+    (index_dir / LEGACY_OFFSETS_FILE).unlink(missing_ok=True)
+    return count
+
+
+def count_chunks(chunks_path: str | Path) -> int:
+    chunks_path = Path(chunks_path)
+    if not chunks_path.exists():
+        return 0
+    with chunks_path.open("rb") as handle:
+        head = handle.read(_HEADER.size)
+        if head.startswith(_MAGIC):
+            return int(struct.unpack_from("<8sIIQ", head)[3])
+        count = head.count(b"\n")
+        for block in iter(lambda: handle.read(1024 * 1024), b""):
+            count += block.count(b"\n")
+    return count
+
+
+def open_chunk_store(index_dir: str | Path) -> ChunkStore | JSONLChunkStore:
+    index_dir = resolve_index_dir(index_dir)
+    if (index_dir / CHUNKS_FILE).exists():
+        return ChunkStore(index_dir / CHUNKS_FILE)
+    return JSONLChunkStore(index_dir / LEGACY_CHUNKS_FILE, index_dir / LEGACY_OFFSETS_FILE)
@@ -12,6 +12,8 @@ def chunk_text(text: str, chunk_size: int, chunk_overlap: int) -> List[str]:
     while start < length:
         end = min(start + chunk_size, length)
         chunks.append(text[start:end])
+        if end >= length:
+            break
         start = end - chunk_overlap if chunk_overlap > 0 else end
         if start < 0:
             start = 0
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from .embedder_base import EmbedderBase
+
+_KEY_SIZE = 32
+_MIN_CAPACITY = 1024
+
+
+@dataclass
+class CacheLookup:
+    keys: List[bytes]
+    found: np.ndarray
+    missing: np.ndarray
+    vectors: np.ndarray | None
+
+
+def _namespace(mode: str, model: str) -> str:
+    return re.sub(r"[^0-9A-Za-z._-]+", "_", f"{mode}__{model}") or "default"
+
+
+class EmbeddingCache:
+    """Vectors keyed by chunk sha256, stored per embedder (mode, model, dim).
+
+    Each row of ``vectors.bin`` holds the key next to its vector, so the
+    hash -> row map is rebuilt from the file itself on open. Recency ticks are
+    kept beside it and drive LRU eviction once ``max_entries`` is reached.
+    """
+
+    def __init__(self, cache_dir: str | Path, mode: str, model: str, max_entries: int = 100_000) -> None:
+        self.root = Path(cache_dir) / _namespace(mode, model)
+        self.mode = mode
+        self.model = model
+        self.max_entries = max(1, int(max_entries))
+        self.hits = 0
+        self.misses = 0
+        self.dim: int | None = None
+        self._rows: np.memmap | None = None
+        self._index: Dict[bytes, int] = {}
+        self._free: List[int] = []
+        self._ticks = np.zeros(0, dtype=np.int64)
+        self._tick = 0
+        self._open()
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.root / "meta.json"
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _row_dtype(self, dim: int) -> np.dtype:
+        return np.dtype([("key", np.uint8, _KEY_SIZE), ("vec", np.float32, dim)])
+
+    def _open(self) -> None:
+        if not self._meta_path.exists():
+            return
+        meta = json.loads(self._meta_path.read_text(encoding="utf-8"))
+        self.dim = int(meta["dim"])
+        capacity = int(meta["capacity"])
+        self._rows = np.memmap(self.root / "vectors.bin", dtype=self._row_dtype(self.dim), mode="r+", shape=(capacity,))
+        occupied = self._rows["key"].any(axis=1)
+        keys = self._rows["key"]
+        self._index = {keys[row].tobytes(): int(row) for row in np.flatnonzero(occupied)}
+        self._free = np.flatnonzero(~occupied)[::-1].tolist()
+        ticks_path = self.root / "ticks.npy"
+        ticks = np.load(ticks_path) if ticks_path.exists() else np.zeros(0, dtype=np.int64)
+        self._ticks = ticks if ticks.shape == (capacity,) else np.zeros(capacity, dtype=np.int64)
+        self._tick = int(self._ticks.max()) if capacity else 0
+
+    def _create(self, dim: int) -> None:
+        if self.root.exists():
+            shutil.rmtree(self.root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self._rows = None
+        self._index = {}
+        self._free = []
+        self._ticks = np.zeros(0, dtype=np.int64)
+        self._resize(min(_MIN_CAPACITY, self.max_entries))
+
+    def _resize(self, capacity: int) -> None:
+        old_capacity = 0 if self._rows is None else self._rows.shape[0]
+        path = self.root / "vectors.bin"
+        if self._rows is not None:
+            self._rows.flush()
+            self._rows = None
+        with path.open("ab") as handle:
+            handle.truncate(capacity * self._row_dtype(self.dim).itemsize)
+        self._rows = np.memmap(path, dtype=self._row_dtype(self.dim), mode="r+", shape=(capacity,))
+        self._free = list(range(capacity - 1, old_capacity - 1, -1)) + self._free
+        self._ticks = np.concatenate([self._ticks, np.zeros(capacity - old_capacity, dtype=np.int64)])
+        self._meta_path.write_text(
+            json.dumps({"mode": self.mode, "model": self.model, "dim": self.dim, "capacity": capacity}),
+            encoding="utf-8",
+        )
+
+    def _reserve(self, count: int) -> None:
+        if len(self._free) >= count:
+            return
+        capacity = self._rows.shape[0]
+        if capacity < self.max_entries:
+            target = capacity
+            while target - len(self._index) < count and target < self.max_entries:
+                target *= 2
+            self._resize(min(target, self.max_entries))
+        shortfall = count - len(self._free)
+        if shortfall <= 0:
+            return
+        occupied = np.fromiter(self._index.values(), dtype=np.int64, count=len(self._index))
+        oldest = occupied[np.argpartition(self._ticks[occupied], shortfall - 1)[:shortfall]]
+        keys = self._rows["key"]
+        for row in oldest.tolist():
+            del self._index[keys[row].tobytes()]
+            keys[row] = 0
+            self._free.append(row)
+
+    def _put(self, keys: Sequence[bytes], vectors: np.ndarray) -> None:
+        fresh = {}
+        for key, vector in zip(keys, vectors):
+            if key not in self._index:
+                fresh[key] = vector
+        items = list(fresh.items())[-self.max_entries :]
+        if not items:
+            return
+        self._reserve(len(items))
+        rows = [self._free.pop() for _ in items]
+        self._rows["vec"][rows] = np.stack([vector for _, vector in items])
+        self._rows["key"][rows] = np.frombuffer(b"".join(key for key, _ in items), dtype=np.uint8).reshape(-1, _KEY_SIZE)
+        self._ticks[rows] = self._tick
+        for (key, _), row in zip(items, rows):
+            self._index[key] = row
+
+    def lookup(self, hashes: Sequence[str]) -> CacheLookup:
+        self._tick += 1
+        keys = [bytes.fromhex(value) for value in hashes]
+        rows = np.fromiter((self._index.get(key, -1) for key in keys), dtype=np.int64, count=len(keys))
+        found = np.flatnonzero(rows >= 0)
+        vectors = None
+        if found.size:
+            hit_rows = rows[found]
+            # Copied out now: rows may be evicted before the misses come back.
+            vectors = np.array(self._rows["vec"][hit_rows])
+            self._ticks[hit_rows] = self._tick
+        return CacheLookup(keys=keys, found=found, missing=np.flatnonzero(rows < 0), vectors=vectors)
+
+    def fill(
+        self,
+        lookup: CacheLookup,
+        fresh: np.ndarray | None,
+        texts: Sequence[str],
+        embedder: EmbedderBase,
+    ) -> np.ndarray:
+        found = lookup.found
+        missing = lookup.missing
+        dim = int(fresh.shape[1]) if fresh is not None and missing.size else self.dim
+        if dim != self.dim:
+            # A different dimension means a different model behind the same name.
+            self._create(dim)
+        if found.size and lookup.vectors.shape[1] != dim:
+            stale = np.asarray(embedder.embed([texts[idx] for idx in found.tolist()]).vectors, dtype="float32")
+            if missing.size:
+                order = np.concatenate([missing, found])
+                stale = np.concatenate([fresh, stale])[np.argsort(order, kind="stable")]
+            fresh = stale
+            missing = np.arange(len(lookup.keys))
+            found = missing[:0]
+        self.hits += int(found.size)
+        self.misses += int(missing.size)
+        out = np.empty((len(lookup.keys), self.dim), dtype="float32")
+        if found.size:
+            out[found] = lookup.vectors
+        if missing.size:
+            out[missing] = fresh
+            self._put([lookup.keys[idx] for idx in missing.tolist()], fresh)
+        return out
+
+    def embed(self, embedder: EmbedderBase, texts: Sequence[str], hashes: Sequence[str]) -> np.ndarray:
+        lookup = self.lookup(hashes)
+        fresh = None
+        if lookup.missing.size:
+            fresh = np.asarray(embedder.embed([texts[idx] for idx in lookup.missing.tolist()]).vectors, dtype="float32")
+        return self.fill(lookup, fresh, texts, embedder)
+
+    def flush(self) -> None:
+        if self._rows is None:
+            return
+        self._rows.flush()
+        tmp_path = self.root / "ticks.npy.tmp"
+        with tmp_path.open("wb") as handle:
+            np.save(handle, self._ticks)
+        os.replace(tmp_path, self.root / "ticks.npy")
+
+
+def build_embedding_cache(config: Dict[str, Any]) -> EmbeddingCache | None:
+    max_entries = int(config.get("cache_max_entries", 100_000))
+    cache_dir = config.get("cache_dir", "index/embed_cache")
+    if max_entries <= 0 or not cache_dir:
+        return None
+    return EmbeddingCache(
+        cache_dir,
+        mode=str(config.get("mode", "mock")),
+        model=str(config.get("model", "")),
+        max_entries=max_entries,
+    )
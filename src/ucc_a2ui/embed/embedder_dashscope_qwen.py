@@ -2,16 +2,16 @@ from __future__ import annotations
 
 from typing import List
 
-import requests
-
+from ..transport import HTTPTransport
 from .embedder_base import EmbeddingResult, EmbedderBase
 
 
 class DashScopeQwenEmbedder(EmbedderBase):
-    def __init__(self, api_key: str, model: str, timeout_s: int = 60) -> None:
+    def __init__(self, api_key: str, model: str, timeout_s: int = 60, transport: HTTPTransport | None = None) -> None:
         self.api_key = api_key
         self.model = model
         self.timeout_s = timeout_s
+        self.transport = transport or HTTPTransport()
         self.base_url = "https://dashscope.aliyuncs.com/api/v1/embeddings"
 
     def embed(self, texts: List[str]) -> EmbeddingResult:
@@ -23,8 +23,6 @@ class DashScopeQwenEmbedder(EmbedderBase):
             "model": self.model,
             "input": {"texts": texts},
         }
-        response = requests.post(self.base_url, headers=headers, json=payload, timeout=self.timeout_s)
-        response.raise_for_status()
-        data = response.json()
+        data = self.transport.post_json(self.base_url, payload, headers, self.timeout_s)
         vectors = [item["embedding"] for item in data.get("output", {}).get("embeddings", [])]
         return EmbeddingResult(vectors=vectors)
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from .chunk_store import IndexedChunk
+from .embed_cache import CacheLookup, EmbeddingCache
+from .embedder_base import EmbedderBase
+
+_Slot = Tuple[Future, int]
+
+
+class EmbeddingExecutor:
+    """Keeps up to ``max_in_flight`` embedding requests running and yields
+    batches in submission order, so vectors line up with chunk-store rows.
+
+    Cache lookups and stores stay on the calling thread; only the misses of
+    each batch are sent to the worker threads, and a text already on its way
+    in an earlier batch is not sent again.
+    """
+
+    def __init__(self, embedder: EmbedderBase, max_in_flight: int = 1, cache: EmbeddingCache | None = None) -> None:
+        self.embedder = embedder
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.cache = cache
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.embedder.embed(texts).vectors, dtype="float32")
+
+    def map(self, batches: Iterable[List[IndexedChunk]]) -> Iterator[Tuple[List[IndexedChunk], np.ndarray]]:
+        pending: Deque[Tuple[List[IndexedChunk], CacheLookup | None, Future | None, List[_Slot], List[str]]] = deque()
+        # Chunk hashes already sent in a batch that is not collected (and cached) yet,
+        # with where their vector lands; later batches wait for it instead of resending.
+        in_flight: Dict[str, _Slot] = {}
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="embed") as pool:
+            try:
+                for batch in batches:
+                    texts = [chunk.text for chunk in batch]
+                    lookup = None
+                    slots: List[_Slot] = []
+                    sent: Dict[str, int] = {}
+                    if self.cache is not None:
+                        lookup = self.cache.lookup([chunk.chunk_hash for chunk in batch])
+                        missing = lookup.missing.tolist()
+                        hashes = [batch[idx].chunk_hash for idx in missing]
+                        request: List[str] = []
+                        for idx, chunk_hash in zip(missing, hashes):
+                            if chunk_hash not in in_flight and chunk_hash not in sent:
+                                sent[chunk_hash] = len(request)
+                                request.append(texts[idx])
+                        texts = request
+                    future = pool.submit(self._embed, texts) if texts else None
+                    if lookup is not None:
+                        in_flight.update((chunk_hash, (future, pos)) for chunk_hash, pos in sent.items())
+                        slots = [in_flight[chunk_hash] for chunk_hash in hashes]
+                    pending.append((batch, lookup, future, slots, list(sent)))
+                    if len(pending) >= self.max_in_flight:
+                        yield self._collect(*pending.popleft(), in_flight)
+                while pending:
+                    yield self._collect(*pending.popleft(), in_flight)
+            finally:
+                for _, _, future, _, _ in pending:
+                    if future is not None:
+                        future.cancel()
+
+    def _collect(
+        self,
+        batch: List[IndexedChunk],
+        lookup: CacheLookup | None,
+        future: Future | None,
+        slots: List[_Slot],
+        sent: List[str],
+        in_flight: Dict[str, _Slot],
+    ) -> Tuple[List[IndexedChunk], np.ndarray]:
+        if lookup is None:
+            return batch, future.result() if future is not None else None
+        fresh = None
+        if slots:
+            # Batches are collected in order, so borrowed slots belong to batches already done.
+            fresh = np.stack([slot_future.result()[pos] for slot_future, pos in slots])
+        vectors = self.cache.fill(lookup, fresh, [chunk.text for chunk in batch], self.embedder)
+        # Cached now: later lookups hit instead of borrowing.
+        for chunk_hash in sent:
+            del in_flight[chunk_hash]
+        return batch, vectors
@@ -1,79 +1,59 @@
 from __future__ import annotations
 
-import json
+import shutil
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Sequence
+from typing import Any, Dict, List, Sequence
 
 import faiss
 import numpy as np
 
-
-@dataclass
-class IndexedChunk:
-    text: str
-    source: str
-    doc_hash: str | None = None
-    chunk_hash: str | None = None
-
-
-class ChunkStore:
-    def __init__(self, chunks_path: str | Path, offsets_path: str | Path) -> None:
-        self.chunks_path = Path(chunks_path)
-        self.offsets_path = Path(offsets_path)
-        self._offsets = self._load_offsets()
-
-    def _load_offsets(self) -> np.ndarray:
-        if self.offsets_path.exists():
-            return np.load(self.offsets_path)
-        if not self.chunks_path.exists():
-            return np.array([], dtype=np.int64)
-        offsets: list[int] = []
-        with self.chunks_path.open("rb") as handle:
-            while True:
-                offset = handle.tell()
-                line = handle.readline()
-                if not line:
-                    break
-                offsets.append(offset)
-        arr = np.asarray(offsets, dtype=np.int64)
-        if offsets:
-            np.save(self.offsets_path, arr)
-        return arr
-
-    def __len__(self) -> int:
-        return int(self._offsets.size)
-
-    def get(self, index: int) -> IndexedChunk:
-        offset = int(self._offsets[index])
-        with self.chunks_path.open("rb") as handle:
-            handle.seek(offset)
-            line = handle.readline()
-        payload = json.loads(line.decode("utf-8"))
-        return IndexedChunk(**payload)
-
-
-class InMemoryChunkStore:
-    def __init__(self, chunks: List[IndexedChunk]) -> None:
-        self._chunks = chunks
-
-    def __len__(self) -> int:
-        return len(self._chunks)
-
-    def get(self, index: int) -> IndexedChunk:
-        return self._chunks[index]
+from .chunk_store import (
+    CHUNKS_FILE,
+    ChunkStore,
+    ChunkStoreWriter,
+    IndexedChunk,
+    InMemoryChunkStore,
+    JSONLChunkStore,
+    count_chunks,
+    migrate_jsonl_store,
+    open_chunk_store,
+    write_chunk_store,
+)
+from .index_versions import (
+    DEFAULT_RETENTION,
+    create_version_dir,
+    current_version,
+    gc_versions,
+    publish_version,
+)
+from .lexical import LEXICAL_FILE, LexicalIndex, LexicalIndexWriter, open_lexical_index
 
 
 @dataclass
 class FaissIndex:
     index: faiss.Index
-    chunks: ChunkStore | InMemoryChunkStore
+    chunks: ChunkStore | JSONLChunkStore | InMemoryChunkStore
+    version: str = ""
+    lexical: LexicalIndex | None = None
+
+
+def index_version(index_dir: str | Path) -> str:
+    """Name of the published version; flat (unversioned) dirs fall back to the index file's stat."""
+    version = current_version(index_dir)
+    if version:
+        return version
+    try:
+        stat = (Path(index_dir) / "index.faiss").stat()
+    except OSError:
+        return ""
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
 
 
 def build_faiss_index(
     vectors: Sequence[Sequence[float]] | np.ndarray, chunks: List[IndexedChunk]
 ) -> FaissIndex:
-    if not vectors:
+    if len(vectors) == 0:
         raise ValueError("No vectors to index")
     dim = len(vectors[0])
     index = faiss.IndexFlatL2(dim)
@@ -82,31 +62,188 @@ def build_faiss_index(
     return FaissIndex(index=index, chunks=InMemoryChunkStore(chunks))
 
 
-def create_empty_index(dim: int) -> faiss.Index:
-    return faiss.IndexFlatL2(dim)
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw", "sq8")
 
 
-def add_vectors(index: faiss.Index, vectors: Sequence[Sequence[float]] | np.ndarray) -> None:
-    if not vectors:
+def _index_factory_string(dim: int, index_type: str, params: Dict[str, Any]) -> str:
+    nlist = int(params.get("nlist", 256))
+    if index_type == "flat":
+        return "Flat"
+    if index_type == "ivf_flat":
+        return f"IVF{nlist},Flat"
+    if index_type == "ivf_pq":
+        m = int(params.get("pq_m", 16))
+        nbits = int(params.get("pq_nbits", 8))
+        if dim % m:
+            raise ValueError(f"embed.index_params.pq_m={m} must divide the embedding dim {dim}")
+        return f"IVF{nlist},PQ{m}x{nbits}"
+    if index_type == "hnsw":
+        return f"HNSW{int(params.get('hnsw_m', 32))}"
+    if index_type == "sq8":
+        return "SQ8"
+    raise ValueError(f"Unknown embed.index_type {index_type!r}; expected one of {', '.join(INDEX_TYPES)}")
+
+
+def create_empty_index(dim: int, index_type: str = "flat", params: Dict[str, Any] | None = None) -> faiss.Index:
+    params = params or {}
+    index = faiss.index_factory(dim, _index_factory_string(dim, index_type, params))
+    if index_type == "hnsw":
+        faiss.downcast_index(index).hnsw.efConstruction = int(params.get("ef_construction", 40))
+    return index
+
+
+def _base_index(index: faiss.Index) -> faiss.Index:
+    concrete = faiss.downcast_index(index)
+    if isinstance(concrete, faiss.IndexIDMap):
+        return faiss.downcast_index(concrete.index)
+    return concrete
+
+
+def supports_removal(index: faiss.Index) -> bool:
+    # Vectors are addressed by chunk-store row ids through IndexIDMap2; HNSW graphs
+    # cannot drop nodes, so those indexes still need a rebuild.
+    return isinstance(faiss.downcast_index(index), faiss.IndexIDMap2) and index_type_of(index) != "hnsw"
+
+
+def index_type_of(index: faiss.Index) -> str:
+    concrete = _base_index(index)
+    if isinstance(concrete, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(concrete, faiss.IndexIVFFlat):
+        return "ivf_flat"
+    if isinstance(concrete, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(concrete, faiss.IndexScalarQuantizer):
+        return "sq8"
+    return "flat"
+
+
+def training_size(index_type: str, params: Dict[str, Any]) -> int:
+    if "train_size" in params:
+        return int(params["train_size"])
+    nlist = int(params.get("nlist", 256))
+    if index_type == "ivf_flat":
+        return 39 * nlist
+    if index_type == "ivf_pq":
+        return 39 * max(nlist, 2 ** int(params.get("pq_nbits", 8)))
+    if index_type == "sq8":
+        return 1000
+    return 0
+
+
+def apply_search_params(index: faiss.Index, params: Dict[str, Any] | None) -> None:
+    if not params:
         return
-    arr = np.asarray(vectors, dtype="float32")
-    index.add(arr)
+    space = faiss.ParameterSpace()
+    index_type = index_type_of(index)
+    if index_type in ("ivf_flat", "ivf_pq") and params.get("nprobe") is not None:
+        space.set_index_parameter(index, "nprobe", int(params["nprobe"]))
+    if index_type == "hnsw" and params.get("ef_search") is not None:
+        space.set_index_parameter(index, "efSearch", int(params["ef_search"]))
 
 
-def count_chunks(chunks_path: str | Path) -> int:
-    chunks_path = Path(chunks_path)
-    if not chunks_path.exists():
-        return 0
-    count = 0
-    with chunks_path.open("rb") as handle:
-        for block in iter(lambda: handle.read(1024 * 1024), b""):
-            count += block.count(b"\n")
-    return count
+class IndexBuilder:
+    def __init__(
+        self,
+        index_type: str = "flat",
+        params: Dict[str, Any] | None = None,
+        index: faiss.Index | None = None,
+        next_id: int = 0,
+    ) -> None:
+        self.index_type = index_type
+        self.params = dict(params or {})
+        self.index = index
+        self.next_id = next_id
+        self.fallback_reason: str | None = None
+        self._pending: List[np.ndarray] = []
+        self._pending_ids: List[np.ndarray] = []
+        self._pending_rows = 0
+        # A flat copy of everything added in this run; only kept when the whole
+        # index is built here, so recall against exact search can be measured.
+        self._reference: faiss.Index | None = None
+        self._track_recall = index is None and index_type != "flat" and int(self.params.get("recall_queries", 100)) > 0
 
+    def add(self, vectors: np.ndarray) -> None:
+        vectors = np.asarray(vectors, dtype="float32")
+        if not len(vectors):
+            return
+        if self.index is None:
+            dim = int(vectors.shape[1])
+            self.index = faiss.IndexIDMap2(create_empty_index(dim, self.index_type, self.params))
+            if self._track_recall:
+                self._reference = faiss.IndexFlatL2(dim)
+        ids = np.arange(self.next_id, self.next_id + len(vectors), dtype=np.int64)
+        self.next_id += len(vectors)
+        if self._reference is not None:
+            self._reference.add(vectors)
+        if self.index.is_trained:
+            self._add_with_ids(vectors, ids)
+            return
+        self._pending.append(vectors)
+        self._pending_ids.append(ids)
+        self._pending_rows += len(vectors)
+        if self._pending_rows >= training_size(self.index_type, self.params):
+            self._train_and_flush()
 
-def open_chunk_store(index_dir: str | Path) -> ChunkStore:
-    index_dir = Path(index_dir)
-    return ChunkStore(index_dir / "chunks.jsonl", index_dir / "chunks.offsets.npy")
+    def _add_with_ids(self, vectors: np.ndarray, ids: np.ndarray) -> None:
+        if isinstance(faiss.downcast_index(self.index), faiss.IndexIDMap):
+            self.index.add_with_ids(vectors, ids)
+        else:
+            # Indexes written before chunk ids existed use positional ids, which
+            # match chunk-store rows as long as nothing was removed.
+            self.index.add(vectors)
+
+    def remove_ids(self, ids: np.ndarray) -> int:
+        if self.index is None or not len(ids):
+            return 0
+        return int(self.index.remove_ids(np.asarray(ids, dtype=np.int64)))
+
+    def _train_and_flush(self) -> None:
+        pending = np.concatenate(self._pending)
+        pending_ids = np.concatenate(self._pending_ids)
+        self._pending = []
+        self._pending_ids = []
+        self._pending_rows = 0
+        try:
+            self.index.train(pending)
+        except RuntimeError as exc:
+            # Too few vectors for the requested clustering; exact search is fine at this size.
+            self.fallback_reason = f"{self.index_type} training failed on {len(pending)} vectors ({exc}); using flat"
+            self.index = faiss.IndexIDMap2(faiss.IndexFlatL2(int(pending.shape[1])))
+            self.index_type = "flat"
+            self._reference = None
+        self._add_with_ids(pending, pending_ids)
+
+    def finish(self) -> faiss.Index | None:
+        if self._pending:
+            self._train_and_flush()
+        return self.index
+
+    def recall_report(self, top_k: int = 10) -> Dict[str, Any] | None:
+        if self._reference is None or self.index is None or not self._reference.ntotal:
+            return None
+        queries_count = min(int(self.params.get("recall_queries", 100)), self._reference.ntotal)
+        rng = np.random.default_rng(0)
+        rows = rng.choice(self._reference.ntotal, size=queries_count, replace=False)
+        queries = self._reference.reconstruct_batch(rows)
+        apply_search_params(self.index, self.params)
+        k = min(top_k, self._reference.ntotal)
+        _, expected = self._reference.search(queries, k)
+        _, actual = self.index.search(queries, k)
+        hits = sum(len(set(exp.tolist()) & set(act.tolist())) for exp, act in zip(expected, actual))
+        return {
+            "index_type": self.index_type,
+            "k": k,
+            "queries": queries_count,
+            "recall": hits / float(queries_count * k),
+        }
+
+
+def add_vectors(index: faiss.Index, vectors: Sequence[Sequence[float]] | np.ndarray) -> None:
+    if len(vectors) == 0:
+        return
+    arr = np.asarray(vectors, dtype="float32")
+    index.add(arr)
 
 
 def save_faiss_index_parts(index_dir: str | Path, index: faiss.Index) -> None:
@@ -115,14 +252,56 @@ def save_faiss_index_parts(index_dir: str | Path, index: faiss.Index) -> None:
     faiss.write_index(index, str(index_dir / "index.faiss"))
 
 
-def save_faiss_index(index_dir: str | Path, faiss_index: FaissIndex) -> None:
-    index_dir = Path(index_dir)
-    index_dir.mkdir(parents=True, exist_ok=True)
-    faiss.write_index(faiss_index.index, str(index_dir / "index.faiss"))
+def write_chunks(
+    index_dir: str | Path, chunks: ChunkStore | JSONLChunkStore | InMemoryChunkStore, compress: bool = False
+) -> None:
+    write_chunk_store(Path(index_dir) / CHUNKS_FILE, chunks.iter_chunks(), compress=compress)
+
+
+def save_faiss_index(index_dir: str | Path, faiss_index: FaissIndex, keep: int = DEFAULT_RETENTION) -> Path:
+    """Publishes the index and its chunks as a new version of ``index_dir``; returns the version dir."""
+    version_dir = create_version_dir(index_dir)
+    try:
+        lexical = LexicalIndexWriter(version_dir / LEXICAL_FILE)
+        if isinstance(faiss_index.chunks, ChunkStore):
+            # Copy with tombstones so vector ids keep matching chunk rows.
+            writer = ChunkStoreWriter(version_dir / CHUNKS_FILE, compress=faiss_index.chunks.compressed)
+            writer.add_store(faiss_index.chunks)
+            writer.close()
+            lexical.add_store(faiss_index.chunks, lexical=faiss_index.lexical)
+        else:
+            write_chunks(version_dir, faiss_index.chunks)
+            lexical.add_many(chunk.text for chunk in faiss_index.chunks.iter_chunks())
+        lexical.close()
+        faiss.write_index(faiss_index.index, str(version_dir / "index.faiss"))
+    except BaseException:
+        shutil.rmtree(version_dir, ignore_errors=True)
+        raise
+    publish_version(index_dir, version_dir)
+    gc_versions(index_dir, keep)
+    return version_dir
 
 
-def load_faiss_index(index_dir: str | Path) -> FaissIndex:
+def load_faiss_index(index_dir: str | Path, search_params: Dict[str, Any] | None = None) -> FaissIndex:
+    """Loads the current version; every file comes from that one version directory."""
     index_dir = Path(index_dir)
-    index = faiss.read_index(str(index_dir / "index.faiss"))
-    chunk_store = open_chunk_store(index_dir)
-    return FaissIndex(index=index, chunks=chunk_store)
+    for attempt in range(3):
+        # Read CURRENT once; the label and every file come from that one answer.
+        published = current_version(index_dir)
+        version_dir = index_dir / published if published else index_dir
+        version = published or index_version(index_dir)
+        try:
+            index = faiss.read_index(str(version_dir / "index.faiss"))
+            # A version dir always has chunks.bin; the legacy fallback would read a collected one as empty.
+            chunk_store = ChunkStore(version_dir / CHUNKS_FILE) if published else open_chunk_store(version_dir)
+            lexical = open_lexical_index(version_dir)
+            if lexical is None and published and current_version(index_dir) != published:
+                # Versions from before lexical.bin have none; a superseded one may have lost it to gc.
+                raise FileNotFoundError(version_dir / LEXICAL_FILE)
+            break
+        except (OSError, RuntimeError):
+            # Collected by a publish that landed between resolving and opening: resolve again.
+            if attempt == 2 or current_version(index_dir) == published:
+                raise
+    apply_search_params(index, search_params)
+    return FaissIndex(index=index, chunks=chunk_store, version=version, lexical=lexical)
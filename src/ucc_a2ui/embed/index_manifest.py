@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+from .chunk_store import CHUNKS_FILE
+from .index_versions import resolve_index_dir
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_FORMAT = "ucc-index-manifest@v1"
+INDEX_FILE = "index.faiss"
+
+# The manifest describes what the index dir holds (per-source doc hash and
+# chunk rows, embedder, chunking, totals) so sync can diff docs against it
+# without loading index.faiss or scanning the chunk store. It records the
+# stat of both files and is ignored once either changes behind its back.
+
+
+def _file_stamps(index_dir: Path) -> Dict[str, Dict[str, int]] | None:
+    stamps = {}
+    for name in (INDEX_FILE, CHUNKS_FILE):
+        try:
+            stat = (index_dir / name).stat()
+        except OSError:
+            return None
+        stamps[name] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+    return stamps
+
+
+@dataclass
+class IndexManifest:
+    sources: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    embed: Dict[str, Any] = field(default_factory=dict)
+    chunking: Dict[str, Any] = field(default_factory=dict)
+    index_type: str = "flat"
+    totals: Dict[str, int] = field(default_factory=dict)
+
+    def doc_hashes(self) -> Dict[str, str]:
+        return {source: entry["doc_hash"] for source, entry in self.sources.items()}
+
+    def rows_for_sources(self, sources: Iterable[str]) -> np.ndarray:
+        runs: List[np.ndarray] = [
+            np.arange(start, end, dtype=np.int64)
+            for source in sources
+            for start, end in self.sources.get(source, {}).get("rows", [])
+        ]
+        return np.concatenate(runs) if runs else np.array([], dtype=np.int64)
+
+
+def read_index_manifest(index_dir: str | Path) -> IndexManifest | None:
+    """Returns the manifest, or None when it is missing, corrupt or out of date with the index files."""
+    index_dir = resolve_index_dir(index_dir)
+    try:
+        payload = json.loads((index_dir / MANIFEST_FILE).read_text(encoding="utf-8"))
+        if payload.get("format") != MANIFEST_FORMAT or payload.get("files") != _file_stamps(index_dir):
+            return None
+        return IndexManifest(
+            sources=payload["sources"],
+            embed=payload["embed"],
+            chunking=payload["chunking"],
+            index_type=payload["index_type"],
+            totals=payload["totals"],
+        )
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def write_index_manifest(index_dir: str | Path, manifest: IndexManifest) -> None:
+    """Writes the manifest atomically; call it after index.faiss and the chunk store are in place."""
+    index_dir = Path(index_dir)
+    payload = {
+        "format": MANIFEST_FORMAT,
+        "files": _file_stamps(index_dir),
+        "embed": manifest.embed,
+        "chunking": manifest.chunking,
+        "index_type": manifest.index_type,
+        "totals": manifest.totals,
+        "sources": manifest.sources,
+    }
+    path = index_dir / MANIFEST_FILE
+    tmp_path = path.with_name(f"{path.name}.tmp{os.getpid()}")
+    tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, path)
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import List, Tuple
+
+CURRENT_FILE = "CURRENT"
+DEFAULT_RETENTION = 3
+_VERSION_DIR = re.compile(r"v(\d{6,})")
+# Files of the flat pre-versioning layout, removed once a version is published.
+_FLAT_LAYOUT_FILES = (
+    "index.faiss",
+    "chunks.bin",
+    "chunks.jsonl",
+    "chunks.offsets.npy",
+    "manifest.json",
+    "lexical.bin",
+)
+
+# Layout: every sync builds a complete index into a fresh vNNNNNN/ directory,
+# fsyncs it and then atomically replaces CURRENT, a one-line file naming the
+# live version. Readers resolve CURRENT once and read every file from that
+# directory, so a query never mixes two versions. Superseded versions are
+# kept for a few more publishes (mmapped readers may still use them) and
+# then removed. A directory without CURRENT is read as the old flat layout.
+
+
+def current_version(index_dir: str | Path) -> str | None:
+    index_dir = Path(index_dir)
+    try:
+        name = (index_dir / CURRENT_FILE).read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    if not _VERSION_DIR.fullmatch(name) or not (index_dir / name).is_dir():
+        return None
+    return name
+
+
+def resolve_index_dir(index_dir: str | Path) -> Path:
+    """The directory holding the live index files: the current version, or ``index_dir`` itself."""
+    index_dir = Path(index_dir)
+    version = current_version(index_dir)
+    return index_dir / version if version else index_dir
+
+
+def list_versions(index_dir: str | Path) -> List[Tuple[int, Path]]:
+    index_dir = Path(index_dir)
+    if not index_dir.is_dir():
+        return []
+    versions = []
+    for path in index_dir.iterdir():
+        match = _VERSION_DIR.fullmatch(path.name)
+        if match and path.is_dir():
+            versions.append((int(match.group(1)), path))
+    return sorted(versions)
+
+
+def create_version_dir(index_dir: str | Path) -> Path:
+    """Creates the next unused vNNNNNN directory; concurrent writers never get the same one."""
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    number = max((number for number, _ in list_versions(index_dir)), default=0) + 1
+    while True:
+        path = index_dir / f"v{number:06d}"
+        try:
+            path.mkdir()
+            return path
+        except FileExistsError:
+            number += 1
+
+
+def _fsync(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:  # directories cannot be opened on Windows
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def publish_version(index_dir: str | Path, version_dir: str | Path) -> None:
+    """Makes ``version_dir`` durable, then points CURRENT at it in one atomic rename."""
+    index_dir = Path(index_dir)
+    version_dir = Path(version_dir)
+    for path in version_dir.iterdir():
+        if path.is_file():
+            _fsync(path)
+    _fsync(version_dir)
+    tmp_path = index_dir / f"{CURRENT_FILE}.tmp{os.getpid()}"
+    with tmp_path.open("w", encoding="utf-8") as handle:
+        handle.write(version_dir.name + "\n")
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, index_dir / CURRENT_FILE)
+    _fsync(index_dir)
+
+
+def gc_versions(index_dir: str | Path, keep: int = DEFAULT_RETENTION) -> List[Path]:
+    """Removes versions older than the newest ``keep`` (counting CURRENT) and the flat-layout files.
+
+    Versions newer than CURRENT belong to a sync still in progress and are left alone.
+    """
+    index_dir = Path(index_dir)
+    current = current_version(index_dir)
+    if current is None:
+        return []
+    current_number = int(current[1:])
+    older = [path for number, path in list_versions(index_dir) if number < current_number]
+    removed = older[: max(0, len(older) - max(0, keep - 1))]
+    for path in removed:
+        # An open mmap keeps a removed file's data alive on POSIX; on Windows the
+        # delete fails while a reader still holds it, and the next publish retries.
+        shutil.rmtree(path, ignore_errors=True)
+    for name in _FLAT_LAYOUT_FILES:
+        try:
+            (index_dir / name).unlink()
+        except OSError:
+            continue
+        removed.append(index_dir / name)
+    return removed
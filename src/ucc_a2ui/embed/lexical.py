@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import functools
+import json
+import math
+import mmap
+import os
+import re
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from .chunk_store import ChunkStore, _pad
+
+LEXICAL_FILE = "lexical.bin"
+
+# lexical.bin layout (little endian), every section 8-byte aligned:
+#   header | terms (JSON list) | term offsets (u64, n_terms + 1)
+#   | posting rows (u32, n_postings) | posting term frequencies (u16, n_postings)
+#   | token count per row (u32, n_rows)
+# Postings of term t are rows [offsets[t], offsets[t+1]), sorted by row. Rows are
+# chunk-store rows, so a hit maps to the same chunk as a FAISS id. Deleted rows
+# have no postings and length 0.
+_MAGIC = b"UCCLEX01"
+_VERSION = 1
+_HEADER = struct.Struct("<8sIIQQQQQ5Q")
+_MAX_TF = np.iinfo(np.uint16).max
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"  # kana, CJK ideographs, hangul
+_TOKEN = re.compile(rf"[{_CJK}]+|[^\W{_CJK}]+")
+_CJK_CHAR = re.compile(rf"[{_CJK}]")
+# Splits textBinding -> text|Binding and HTMLParser -> HTML|Parser.
+_CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+
+
+@functools.lru_cache(maxsize=65536)
+def _word_tokens(word: str) -> Tuple[str, ...]:
+    if _CJK_CHAR.match(word):
+        # CJK has no spaces to split on; character bigrams match words of any
+        # length, unigrams keep single-character queries working.
+        return (*word, *(word[idx : idx + 2] for idx in range(len(word) - 1)))
+    parts = [part.lower() for piece in word.split("_") for part in _CAMEL.split(piece) if part]
+    return (word.lower(), *parts) if len(parts) > 1 else (word.lower(),)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms: identifiers whole and split on ``_`` / camelCase, CJK runs as 1- and 2-grams."""
+    # Doc text repeats the same prop and component names; expanding each distinct word once is most of the speed.
+    return [token for word in _TOKEN.findall(text) for token in _word_tokens(word)]
+
+
+class LexicalIndex:
+    """BM25 over the postings in lexical.bin, read through a memory mapping."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        with self.path.open("rb") as handle:
+            self._buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        header = _HEADER.unpack_from(self._buffer, 0)
+        magic, version = header[:2]
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{self.path} is not a lexical index (magic={magic!r}, version={version})")
+        self._rows, self.live_rows, n_terms, n_postings, total_len = header[3:8]
+        terms_off, term_offsets_off, doc_ids_off, tfs_off, doc_lens_off = header[8:13]
+        buffer = self._buffer
+        self.terms: List[str] = json.loads(bytes(buffer[terms_off:term_offsets_off]).rstrip(b"\0"))
+        self._term_ids = {term: idx for idx, term in enumerate(self.terms)}
+        self._term_offsets = np.frombuffer(buffer, np.uint64, n_terms + 1, term_offsets_off)
+        self._doc_ids = np.frombuffer(buffer, np.uint32, n_postings, doc_ids_off)
+        self._tfs = np.frombuffer(buffer, np.uint16, n_postings, tfs_off)
+        self._doc_lens = np.frombuffer(buffer, np.uint32, self._rows, doc_lens_off)
+        self.avg_len = total_len / self.live_rows if self.live_rows else 0.0
+
+    def __len__(self) -> int:
+        return int(self._rows)
+
+    def postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        term_id = self._term_ids.get(term)
+        if term_id is None:
+            return np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.uint16)
+        start, end = int(self._term_offsets[term_id]), int(self._term_offsets[term_id + 1])
+        return self._doc_ids[start:end], self._tfs[start:end]
+
+    def search(self, query: str, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows and BM25 scores of the best ``top_k`` matches, best first."""
+        rows_parts: List[np.ndarray] = []
+        score_parts: List[np.ndarray] = []
+        for term in dict.fromkeys(tokenize(query)):
+            rows, tfs = self.postings(term)
+            if not rows.size:
+                continue
+            idf = math.log(1.0 + (self.live_rows - rows.size + 0.5) / (rows.size + 0.5))
+            tf = tfs.astype(np.float32)
+            norm = BM25_K1 * (1.0 - BM25_B + BM25_B * self._doc_lens[rows] / self.avg_len)
+            rows_parts.append(rows)
+            score_parts.append(idf * tf * (BM25_K1 + 1.0) / (tf + norm))
+        if not rows_parts or top_k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        # Only rows that match some term are scored, so cost follows the postings read, not the row count.
+        rows, inverse = np.unique(np.concatenate(rows_parts), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_parts)).astype(np.float32)
+        if scores.size > top_k:
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            top = np.arange(scores.size)
+        # Ties go to the lower row, which keeps results stable across runs.
+        top = top[np.lexsort((rows[top], -scores[top]))]
+        return rows[top].astype(np.int64), scores[top]
+
+    def close(self) -> None:
+        self._term_offsets = self._doc_ids = self._tfs = self._doc_lens = np.empty(0)
+        self._buffer.close()
+
+
+class LexicalIndexWriter:
+    """Builds lexical.bin row by row, in the same row order as the chunk store beside it."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self._term_ids: Dict[str, int] = {}
+        self._posting_terms: List[np.ndarray] = []
+        self._posting_rows: List[np.ndarray] = []
+        self._posting_tfs: List[np.ndarray] = []
+        self._doc_lens: List[np.ndarray] = []
+        self._rows = 0
+        self._live_rows = 0
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def add_many(self, texts: Iterable[str]) -> None:
+        token_lists = [tokenize(text) for text in texts]
+        if not token_lists:
+            return
+        term_ids = self._term_ids
+        lens = np.fromiter(map(len, token_lists), dtype=np.int64, count=len(token_lists))
+        ids = np.fromiter(
+            (term_ids.setdefault(token, len(term_ids)) for tokens in token_lists for token in tokens),
+            dtype=np.int64,
+            count=int(lens.sum()),
+        )
+        rows = np.repeat(np.arange(self._rows, self._rows + len(token_lists), dtype=np.int64), lens)
+        # One (row, term) pair per posting, counted in numpy rather than per token in Python.
+        pairs, tfs = np.unique(rows * len(term_ids) + ids, return_counts=True)
+        self._append(
+            (pairs % len(term_ids)).astype(np.uint32),
+            (pairs // len(term_ids)).astype(np.uint32),
+            np.minimum(tfs, _MAX_TF).astype(np.uint16),
+            lens.astype(np.uint32),
+        )
+        self._rows += len(token_lists)
+        self._live_rows += len(token_lists)
+
+    def add_deleted(self, count: int) -> None:
+        self._doc_lens.append(np.zeros(count, dtype=np.uint32))
+        self._rows += count
+
+    def add_store(
+        self, store: ChunkStore, delete_rows: Iterable[int] = (), lexical: LexicalIndex | None = None
+    ) -> None:
+        """Adds every row of ``store``, reusing ``lexical``'s postings instead of re-tokenizing when it matches."""
+        deleted = store.deleted_mask().copy()
+        deleted[np.asarray(list(delete_rows), dtype=np.int64)] = True
+        if lexical is not None and len(lexical) == len(store) and not self._rows:
+            self._term_ids = {term: idx for idx, term in enumerate(lexical.terms)}
+            counts = np.diff(lexical._term_offsets.astype(np.int64))
+            terms = np.repeat(np.arange(len(lexical.terms), dtype=np.uint32), counts)
+            keep = ~deleted[lexical._doc_ids]
+            doc_lens = np.where(deleted, 0, lexical._doc_lens).astype(np.uint32)
+            self._append(terms[keep], lexical._doc_ids[keep], lexical._tfs[keep], doc_lens)
+            self._rows = len(store)
+            self._live_rows = int(np.count_nonzero(~deleted))
+            return
+        batch_size = 1024
+        for start in range(0, len(store), batch_size):
+            rows = np.arange(start, min(start + batch_size, len(store)))
+            live = ~deleted[rows]
+            chunks = iter(store.get_many(rows[live]))
+            # Runs of deleted rows are added as empty rows so row numbers stay aligned.
+            for is_live, run in _runs(live):
+                if is_live:
+                    self.add_many(next(chunks).text for _ in range(run))
+                else:
+                    self.add_deleted(run)
+
+    def _append(self, terms: np.ndarray, rows: np.ndarray, tfs: np.ndarray, doc_lens: np.ndarray) -> None:
+        self._posting_terms.append(terms)
+        self._posting_rows.append(rows)
+        self._posting_tfs.append(tfs)
+        self._doc_lens.append(doc_lens)
+
+    def close(self) -> Path:
+        terms = _concat(self._posting_terms, np.uint32)
+        rows = _concat(self._posting_rows, np.uint32)
+        tfs = _concat(self._posting_tfs, np.uint16)
+        doc_lens = _concat(self._doc_lens, np.uint32)
+        # Postings are added in row order; a stable sort by term keeps each list sorted by row.
+        order = np.argsort(terms, kind="stable")
+        counts = np.bincount(terms, minlength=len(self._term_ids))
+        # Terms left without postings (only deleted rows had them) are dropped; ids
+        # keep their order, so the sort above already matches the new numbering.
+        used = counts > 0
+        vocabulary = [term for term, keep in zip(self._term_ids, used.tolist()) if keep]
+        term_offsets = np.zeros(len(vocabulary) + 1, dtype=np.uint64)
+        np.cumsum(counts[used], out=term_offsets[1:])
+        with self._tmp_path.open("wb") as handle:
+            handle.write(bytes(_HEADER.size))
+            sections = []
+            for payload in (
+                json.dumps(vocabulary, ensure_ascii=False).encode("utf-8"),
+                term_offsets.tobytes(),
+                rows[order].tobytes(),
+                tfs[order].tobytes(),
+                doc_lens.tobytes(),
+            ):
+                sections.append(handle.tell())
+                handle.write(payload)
+                _pad(handle)
+            handle.seek(0)
+            handle.write(
+                _HEADER.pack(
+                    _MAGIC,
+                    _VERSION,
+                    0,
+                    self._rows,
+                    self._live_rows,
+                    len(vocabulary),
+                    len(rows),
+                    int(doc_lens.sum(dtype=np.uint64)),
+                    *sections,
+                )
+            )
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(self._tmp_path, self.path)
+        return self.path
+
+    def abort(self) -> None:
+        self._tmp_path.unlink(missing_ok=True)
+
+
+def _concat(parts: List[np.ndarray], dtype: type) -> np.ndarray:
+    return np.concatenate(parts).astype(dtype, copy=False) if parts else np.empty(0, dtype=dtype)
+
+
+def _runs(mask: np.ndarray) -> Iterable[Tuple[bool, int]]:
+    if not mask.size:
+        return []
+    breaks = np.flatnonzero(np.diff(mask.astype(np.int8))) + 1
+    starts = [0, *breaks.tolist()]
+    ends = [*breaks.tolist(), mask.size]
+    return [(bool(mask[start]), end - start) for start, end in zip(starts, ends)]
+
+
+def open_lexical_index(index_dir: str | Path) -> LexicalIndex | None:
+    """The lexical index stored in ``index_dir`` (a version dir), or None for indexes built without one."""
+    path = Path(index_dir) / LEXICAL_FILE
+    if not path.exists():
+        return None
+    return LexicalIndex(path)
+
+
+def write_lexical_index(path: str | Path, texts: Iterable[str]) -> Path:
+    writer = LexicalIndexWriter(path)
+    writer.add_many(texts)
+    return writer.close()
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import hashlib
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping
+
+import numpy as np
+
+from .chunk_store import IndexedChunk
+from .chunker import chunk_text
+from .executor import EmbeddingExecutor
+
+_DONE = object()
+_POLL_S = 0.1
+
+
+@dataclass
+class StageStats:
+    name: str
+    batches: int = 0
+    items: int = 0
+    busy_s: float = 0.0
+    starved_s: float = 0.0
+    blocked_s: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "busy_s": round(self.busy_s, 3),
+            "items_per_s": round(self.items / self.busy_s, 1) if self.busy_s > 0 else None,
+            # Waiting on the stage before it / on the stage after it (backpressure).
+            "starved_s": round(self.starved_s, 3),
+            "blocked_s": round(self.blocked_s, 3),
+        }
+
+
+class _Failed:
+    def __init__(self, exc: BaseException) -> None:
+        self.exc = exc
+
+
+def chunk_batches(
+    sources: Iterable[str],
+    doc_hashes: Mapping[str, str],
+    chunk_size: int,
+    chunk_overlap: int,
+    batch_size: int,
+) -> Iterator[List[IndexedChunk]]:
+    """Reads, chunks and hashes docs one at a time, so each source's chunks stay contiguous."""
+    batch: List[IndexedChunk] = []
+    for source in sources:
+        text = Path(source).read_text(encoding="utf-8")
+        doc_hash = doc_hashes[source]
+        for chunk in chunk_text(text, chunk_size, chunk_overlap):
+            chunk_hash = hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+            batch.append(IndexedChunk(text=chunk, source=source, doc_hash=doc_hash, chunk_hash=chunk_hash))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+class SyncPipeline:
+    """Runs chunking, embedding and writing as three overlapping stages.
+
+    Chunking and embedding each get a thread; ``write`` runs on the calling
+    thread, in chunk order. The queues between stages hold at most
+    ``queue_size`` batches, so a slow stage stalls the ones before it instead
+    of letting batches pile up in memory.
+    """
+
+    def __init__(self, executor: EmbeddingExecutor, queue_size: int = 4) -> None:
+        self.executor = executor
+        self.queue_size = max(1, int(queue_size))
+        self.stages = {name: StageStats(name) for name in ("chunk", "embed", "write")}
+        self.wall_s = 0.0
+        self._stop = threading.Event()
+
+    def _put(self, target: queue.Queue, item: Any, stats: StageStats) -> bool:
+        started = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                try:
+                    target.put(item, timeout=_POLL_S)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            stats.blocked_s += time.perf_counter() - started
+
+    def _get(self, source: queue.Queue, stats: StageStats) -> Any:
+        started = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                try:
+                    return source.get(timeout=_POLL_S)
+                except queue.Empty:
+                    continue
+            return _DONE
+        finally:
+            stats.starved_s += time.perf_counter() - started
+
+    def _chunk_stage(self, batches: Iterable[List[IndexedChunk]], out: queue.Queue) -> None:
+        stats = self.stages["chunk"]
+        try:
+            iterator = iter(batches)
+            while True:
+                started = time.perf_counter()
+                batch = next(iterator, None)
+                stats.busy_s += time.perf_counter() - started
+                if batch is None:
+                    break
+                stats.batches += 1
+                stats.items += len(batch)
+                if not self._put(out, batch, stats):
+                    return
+            self._put(out, _DONE, stats)
+        except BaseException as exc:  # handed to the writer thread, which re-raises it
+            self._put(out, _Failed(exc), stats)
+
+    def _embed_stage(self, source: queue.Queue, out: queue.Queue) -> None:
+        stats = self.stages["embed"]
+
+        def incoming() -> Iterator[List[IndexedChunk]]:
+            while True:
+                item = self._get(source, stats)
+                if item is _DONE:
+                    return
+                if isinstance(item, _Failed):
+                    raise item.exc
+                yield item
+
+        try:
+            results = self.executor.map(incoming())
+            while True:
+                started = time.perf_counter()
+                starved_before = stats.starved_s
+                result = next(results, None)
+                # Time spent waiting for the chunk stage is not embedding work.
+                stats.busy_s += time.perf_counter() - started - (stats.starved_s - starved_before)
+                if result is None:
+                    break
+                stats.batches += 1
+                stats.items += len(result[0])
+                if not self._put(out, result, stats):
+                    results.close()
+                    return
+            self._put(out, _DONE, stats)
+        except BaseException as exc:
+            self._put(out, _Failed(exc), stats)
+
+    def run(
+        self,
+        batches: Iterable[List[IndexedChunk]],
+        write: Callable[[List[IndexedChunk], np.ndarray], None],
+    ) -> Dict[str, Any]:
+        """Feeds every batch through the stages; returns per-stage throughput."""
+        chunked: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        embedded: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        threads = [
+            threading.Thread(target=self._chunk_stage, args=(batches, chunked), name="sync-chunk", daemon=True),
+            threading.Thread(target=self._embed_stage, args=(chunked, embedded), name="sync-embed", daemon=True),
+        ]
+        stats = self.stages["write"]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                item = self._get(embedded, stats)
+                if item is _DONE:
+                    break
+                if isinstance(item, _Failed):
+                    raise item.exc
+                batch, vectors = item
+                write_started = time.perf_counter()
+                write(batch, vectors)
+                stats.busy_s += time.perf_counter() - write_started
+                stats.batches += 1
+                stats.items += len(batch)
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            self.wall_s = time.perf_counter() - started
+        return self.report()
+
+    def report(self) -> Dict[str, Any]:
+        busiest = max(self.stages.values(), key=lambda stage: stage.busy_s)
+        return {
+            "wall_s": round(self.wall_s, 3),
+            "bottleneck": busiest.name if busiest.busy_s > 0 else None,
+            "stages": {name: stage.as_dict() for name, stage in self.stages.items()},
+        }
+
+
+def format_stage_report(report: Dict[str, Any]) -> str:
+    parts = [f"wall={report['wall_s']}s", f"bottleneck={report['bottleneck']}"]
+    for name, stage in report["stages"].items():
+        parts.append(f"{name}={stage['items_per_s']}/s (busy {stage['busy_s']}s)")
+    return " ".join(parts)
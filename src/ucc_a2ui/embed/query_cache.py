@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Tuple
+
+import numpy as np
+
+from .embed_cache import EmbeddingCache
+from .embedder_base import EmbeddingResult, EmbedderBase
+
+
+def _hit_rate(hits: int, misses: int) -> float:
+    total = hits + misses
+    return hits / total if total else 0.0
+
+
+class CachedQueryEmbedder(EmbedderBase):
+    """Query vectors from an in-memory LRU, then the optional disk cache, then the embedder."""
+
+    def __init__(self, embedder: EmbedderBase, max_entries: int = 1024, disk: EmbeddingCache | None = None) -> None:
+        self.embedder = embedder
+        self.max_entries = max(1, int(max_entries))
+        self.disk = disk
+        self.hits = 0
+        self.misses = 0
+        self._vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+
+    def embed(self, texts: List[str]) -> EmbeddingResult:
+        with self._lock:
+            cached = [self._vectors.get(text) for text in texts]
+            for text, vector in zip(texts, cached):
+                if vector is not None:
+                    self._vectors.move_to_end(text)
+            missing = [idx for idx, vector in enumerate(cached) if vector is None]
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        if missing:
+            fresh = self._embed_missing([texts[idx] for idx in missing])
+            with self._lock:
+                for idx, vector in zip(missing, fresh):
+                    cached[idx] = vector
+                    self._vectors[texts[idx]] = vector
+                while len(self._vectors) > self.max_entries:
+                    self._vectors.popitem(last=False)
+        return EmbeddingResult(vectors=np.stack(cached) if cached else np.empty((0, 0), dtype="float32"))
+
+    def _embed_missing(self, texts: List[str]) -> np.ndarray:
+        if self.disk is None:
+            return np.asarray(self.embedder.embed(texts).vectors, dtype="float32")
+        hashes = [hashlib.sha256(text.encode("utf-8")).hexdigest() for text in texts]
+        with self._disk_lock:
+            vectors = self.disk.embed(self.embedder, texts, hashes)
+            self.disk.flush()
+        return vectors
+
+
+class ResultCache:
+    """Search results keyed by (query, k, search mode, index version); a new version drops everything."""
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.hits = 0
+        self.misses = 0
+        self._version: str | None = None
+        self._results: "OrderedDict[Tuple[Hashable, ...], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, query: str, k: int, version: str, mode: str = "vector") -> Any | None:
+        with self._lock:
+            if version != self._version:
+                self._results.clear()
+                self._version = version
+            results = self._results.get((query, k, mode, version))
+            if results is None:
+                self.misses += 1
+                return None
+            self._results.move_to_end((query, k, mode, version))
+            self.hits += 1
+            return results
+
+    def put(self, query: str, k: int, version: str, results: Any, mode: str = "vector") -> None:
+        with self._lock:
+            if version != self._version:
+                return
+            self._results[(query, k, mode, version)] = results
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+
+def build_query_cache(
+    config: Dict[str, Any], embedder: EmbedderBase
+) -> Tuple[EmbedderBase, ResultCache | None]:
+    query_cache_size = int(config.get("query_cache_size", 1024))
+    result_cache_size = int(config.get("result_cache_size", 1024))
+    if query_cache_size > 0:
+        disk = None
+        if config.get("query_cache_disk", False) and config.get("cache_dir", "index/embed_cache"):
+            # Kept apart from the sync cache so search processes never write its files.
+            disk = EmbeddingCache(
+                Path(config.get("cache_dir", "index/embed_cache")) / "queries",
+                mode=str(config.get("mode", "mock")),
+                model=str(config.get("model", "")),
+                max_entries=int(config.get("cache_max_entries", 100_000)),
+            )
+        embedder = CachedQueryEmbedder(embedder, max_entries=query_cache_size, disk=disk)
+    return embedder, ResultCache(result_cache_size) if result_cache_size > 0 else None
+
+
+def cache_metadata(embedder: EmbedderBase, result_cache: ResultCache | None) -> Dict[str, Any]:
+    meta: Dict[str, Any] = {}
+    if isinstance(embedder, CachedQueryEmbedder):
+        meta["query_vector_hits"] = embedder.hits
+        meta["query_vector_misses"] = embedder.misses
+        meta["query_vector_hit_rate"] = round(_hit_rate(embedder.hits, embedder.misses), 4)
+    if result_cache is not None:
+        meta["result_hits"] = result_cache.hits
+        meta["result_misses"] = result_cache.misses
+        meta["result_hit_rate"] = round(_hit_rate(result_cache.hits, result_cache.misses), 4)
+    return meta
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
 
 import numpy as np
 
 from .embedder_base import EmbedderBase
 from .index_faiss import FaissIndex, load_faiss_index
+from .query_cache import ResultCache
 
 
 @dataclass
@@ -16,16 +17,140 @@ class SearchResult:
     source: str
 
 
-def search_index(index_dir: str, query: str, embedder: EmbedderBase, top_k: int = 5) -> List[SearchResult]:
-    faiss_index = load_faiss_index(index_dir)
-    query_vec = embedder.embed([query]).vectors[0]
-    query_arr = np.array([query_vec], dtype="float32")
+SEARCH_MODES = ("vector", "lexical", "hybrid")
+# Reciprocal rank fusion constant; 60 is the value from the original RRF paper.
+RRF_K = 60
+
+Hits = Tuple[np.ndarray, np.ndarray]
+
+
+def _vector_hits(faiss_index: FaissIndex, query_arr: np.ndarray, top_k: int) -> List[Hits]:
     distances, indices = faiss_index.index.search(query_arr, top_k)
-    results: List[SearchResult] = []
-    for rank, idx in enumerate(indices[0]):
-        if idx < 0 or idx >= len(faiss_index.chunks):
-            continue
-        chunk = faiss_index.chunks.get(idx)
-        score = float(distances[0][rank])
-        results.append(SearchResult(score=score, text=chunk.text, source=chunk.source))
-    return results
+    valid = (indices >= 0) & (indices < len(faiss_index.chunks))
+    return [(indices[idx][valid[idx]], distances[idx][valid[idx]]) for idx in range(len(query_arr))]
+
+
+def _fuse(ranked: Sequence[Hits], top_k: int) -> Hits:
+    """Reciprocal rank fusion: each list adds 1 / (RRF_K + rank) to a row's score."""
+    scores: Dict[int, float] = {}
+    for rows, _ in ranked:
+        for rank, row in enumerate(rows.tolist(), start=1):
+            scores[row] = scores.get(row, 0.0) + 1.0 / (RRF_K + rank)
+    best = sorted(scores.items(), key=lambda item: -item[1])[:top_k]
+    return np.asarray([row for row, _ in best], dtype=np.int64), np.asarray([score for _, score in best])
+
+
+def _results(faiss_index: FaissIndex, hits: List[Hits]) -> List[List[SearchResult]]:
+    rows = np.concatenate([row_ids for row_ids, _ in hits]) if hits else np.empty(0, dtype=np.int64)
+    chunks = iter(faiss_index.chunks.get_many(rows))
+    return [
+        [SearchResult(score=float(score), text=chunk.text, source=chunk.source) for score, chunk in zip(row, chunks)]
+        for row in (scores.tolist() for _, scores in hits)
+    ]
+
+
+def _search(
+    faiss_index: FaissIndex, queries: List[str], embedder: EmbedderBase, top_k: int, mode: str
+) -> List[List[SearchResult]]:
+    # Fusion needs more than top_k from each side: a row ranked low by both can still win.
+    depth = max(top_k * 4, 20) if mode == "hybrid" else top_k
+    ranked: List[List[Hits]] = []
+    if mode != "lexical":
+        query_arr = np.asarray(embedder.embed(queries).vectors, dtype="float32")
+        ranked.append(_vector_hits(faiss_index, query_arr, depth))
+    if mode != "vector":
+        ranked.append([faiss_index.lexical.search(query, depth) for query in queries])
+    if mode == "hybrid":
+        return _results(faiss_index, [_fuse(per_query, top_k) for per_query in zip(*ranked)])
+    return _results(faiss_index, ranked[0])
+
+
+def _check_mode(faiss_index: FaissIndex, mode: str) -> None:
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode {mode!r}; expected one of {', '.join(SEARCH_MODES)}")
+    if mode != "vector" and faiss_index.lexical is None:
+        raise ValueError(f"{mode} search needs a lexical index; run sync to build one")
+
+
+def search_loaded_index(
+    faiss_index: FaissIndex,
+    query: str,
+    embedder: EmbedderBase,
+    top_k: int = 5,
+    result_cache: ResultCache | None = None,
+    mode: str = "vector",
+) -> List[SearchResult]:
+    return next(
+        search_loaded_many(faiss_index, [query], embedder, top_k=top_k, result_cache=result_cache, mode=mode)
+    )[1]
+
+
+def search_loaded_many(
+    faiss_index: FaissIndex,
+    queries: Iterable[str],
+    embedder: EmbedderBase,
+    top_k: int = 5,
+    batch_size: int = 64,
+    result_cache: ResultCache | None = None,
+    mode: str = "vector",
+) -> Iterator[Tuple[str, List[SearchResult]]]:
+    """Scores by L2 distance (vector, lower is better), BM25 (lexical) or fused rank (hybrid)."""
+    _check_mode(faiss_index, mode)
+    # One embed call and one index.search per batch; results stream per query.
+    for batch in _batched(queries, batch_size):
+        found: Dict[int, List[SearchResult]] = {}
+        if result_cache is not None:
+            for idx, query in enumerate(batch):
+                cached = result_cache.get(query, top_k, faiss_index.version, mode)
+                if cached is not None:
+                    found[idx] = cached
+        pending = [query for idx, query in enumerate(batch) if idx not in found]
+        if pending:
+            fresh = iter(_search(faiss_index, pending, embedder, top_k, mode))
+            for idx, query in enumerate(batch):
+                if idx not in found:
+                    found[idx] = next(fresh)
+                    if result_cache is not None:
+                        result_cache.put(query, top_k, faiss_index.version, found[idx], mode)
+        for idx, query in enumerate(batch):
+            yield query, found[idx]
+
+
+def _batched(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    batch: List[str] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def search_index(
+    index_dir: str,
+    query: str,
+    embedder: EmbedderBase,
+    top_k: int = 5,
+    search_params: Dict[str, Any] | None = None,
+    result_cache: ResultCache | None = None,
+    mode: str = "vector",
+) -> List[SearchResult]:
+    faiss_index = load_faiss_index(index_dir, search_params)
+    return search_loaded_index(faiss_index, query, embedder, top_k=top_k, result_cache=result_cache, mode=mode)
+
+
+def search_many(
+    index_dir: str,
+    queries: Iterable[str],
+    embedder: EmbedderBase,
+    top_k: int = 5,
+    search_params: Dict[str, Any] | None = None,
+    batch_size: int = 64,
+    result_cache: ResultCache | None = None,
+    mode: str = "vector",
+) -> Iterator[Tuple[str, List[SearchResult]]]:
+    faiss_index = load_faiss_index(index_dir, search_params)
+    yield from search_loaded_many(
+        faiss_index, queries, embedder, top_k=top_k, batch_size=batch_size, result_cache=result_cache, mode=mode
+    )
@@ -1,4 +1,17 @@
-from .generate import generate_ui
-from .validator import validate_ir
+from __future__ import annotations
 
-__all__ = ["generate_ui", "validate_ir"]
+from typing import Any
+
+from .validator import IRValidator, compile_validator, validate_ir
+
+__all__ = ["generate_ui", "validate_ir", "IRValidator", "compile_validator"]
+
+
+def __getattr__(name: str) -> Any:
+    # generate_ui pulls in the LLM clients, requests and the FAISS retriever;
+    # importing the validator alone should not pay for them.
+    if name == "generate_ui":
+        from .generate import generate_ui
+
+        return generate_ui
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
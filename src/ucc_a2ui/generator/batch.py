@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, Set, Tuple
+
+from ..config import Config
+from ..library.whitelist import LibraryWhitelist
+from .context import ComponentRetriever
+from .generate import generate_ui
+from .llm_client_base import LLMClientBase
+
+
+def iter_prompts(path: str | Path) -> Iterator[Tuple[str, str]]:
+    with open(path, "r", encoding="utf-8") as handle:
+        for line_no, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"prompt": record}
+            yield str(record.get("id", f"line-{line_no}")), str(record["prompt"])
+
+
+def load_completed_ids(sink_path: str | Path) -> Set[str]:
+    """Ids already written to the sink; a torn last line from a killed run is cut off."""
+    sink_path = Path(sink_path)
+    if not sink_path.exists():
+        return set()
+    done: Set[str] = set()
+    valid_bytes = 0
+    with sink_path.open("rb") as handle:
+        for line in handle:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                done.add(str(json.loads(line)["id"]))
+            except (ValueError, KeyError, TypeError):
+                break
+            valid_bytes += len(line)
+    if valid_bytes != sink_path.stat().st_size:
+        with sink_path.open("r+b") as handle:
+            handle.truncate(valid_bytes)
+    return done
+
+
+def _generate_one(
+    prompt_id: str,
+    prompt: str,
+    config: Config,
+    whitelist: LibraryWhitelist,
+    llm: LLMClientBase,
+    max_attempts: int,
+    retriever: ComponentRetriever | None,
+    use_cache: bool,
+) -> Dict[str, Any]:
+    started = time.perf_counter()
+    record: Dict[str, Any] = {"id": prompt_id, "prompt": prompt}
+    for attempt in range(1, max_attempts + 1):
+        record["attempts"] = attempt
+        try:
+            ir, report = generate_ui(
+                prompt,
+                config=config,
+                whitelist=whitelist,
+                out_dir=None,
+                llm=llm,
+                retriever=retriever,
+                # A retry wants a fresh sample, not the cached one that just failed.
+                use_cache=use_cache and attempt == 1,
+            )
+        except Exception as exc:
+            record.update(ir=None, report=None, error=f"{type(exc).__name__}: {exc}")
+            continue
+        record.pop("error", None)
+        record.update(ir=ir, report=report)
+        # An unparseable completion is worth another sample; a parsed IR with
+        # validation errors is a result.
+        if not any(error["code"] == "E_JSON_PARSE" for error in report.get("errors", [])):
+            break
+    record["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return record
+
+
+def generate_batch(
+    prompts: Iterable[Tuple[str, str]],
+    config: Config,
+    whitelist: LibraryWhitelist,
+    llm: LLMClientBase,
+    sink_path: str | Path,
+    workers: int = 4,
+    max_attempts: int = 2,
+    retriever: ComponentRetriever | None = None,
+    use_cache: bool = True,
+) -> Dict[str, Any]:
+    sink_path = Path(sink_path)
+    sink_path.parent.mkdir(parents=True, exist_ok=True)
+    completed = load_completed_ids(sink_path)
+    workers = max(1, int(workers))
+    stats: Dict[str, Any] = {
+        "written": 0,
+        "passed": 0,
+        "failed": 0,
+        "errors": 0,
+        "skipped": 0,
+        "prompt_tokens_est": 0,
+        "cache_hits": 0,
+    }
+    latencies = []
+    pending: Deque[Future] = deque()
+
+    def write(record: Dict[str, Any]) -> None:
+        sink.write(json.dumps(record, ensure_ascii=False) + "\n")
+        sink.flush()
+        stats["written"] += 1
+        latencies.append(record["latency_ms"])
+        report = record.get("report")
+        if report is None:
+            stats["errors"] += 1
+            return
+        stats["prompt_tokens_est"] += report.get("usage", {}).get("prompt_tokens_est", 0)
+        stats["cache_hits"] += bool(report.get("cache_hit"))
+        if report.get("SchemaPass") and not report.get("errors"):
+            stats["passed"] += 1
+        else:
+            stats["failed"] += 1
+
+    with sink_path.open("a", encoding="utf-8") as sink, ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="generate"
+    ) as pool:
+        for prompt_id, prompt in prompts:
+            if prompt_id in completed:
+                stats["skipped"] += 1
+                continue
+            completed.add(prompt_id)
+            pending.append(
+                pool.submit(
+                    _generate_one, prompt_id, prompt, config, whitelist, llm, max_attempts, retriever, use_cache
+                )
+            )
+            while len(pending) >= workers * 2 or (pending and pending[0].done()):
+                write(pending.popleft().result())
+        while pending:
+            write(pending.popleft().result())
+        os.fsync(sink.fileno())
+
+    latencies.sort()
+    if latencies:
+        stats["latency_ms_p50"] = latencies[len(latencies) // 2]
+        stats["latency_ms_p95"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    stats["sink"] = str(sink_path)
+    return stats
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import glob
+import json
+from collections import deque
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Tuple
+
+from ..config import Config
+from ..library.whitelist import LibraryWhitelist
+from .validator import IRValidator, compile_validator
+
+REPORT_FLAGS = (
+    "SchemaPass",
+    "ComponentWhitelistPass",
+    "PropsWhitelistPass",
+    "EventsWhitelistPass",
+    "BindingSanity",
+    "ThemePass",
+)
+
+_GLOB_CHARS = set("*?[")
+
+_worker_validator: IRValidator | None = None
+_worker_strict = False
+
+
+def iter_ir_items(source: str) -> Iterator[Tuple[str, str]]:
+    """Yields (item id, raw JSON) from a directory, glob, JSONL file or single JSON file."""
+    path = Path(source)
+    if path.is_dir():
+        files: Iterable[Path] = sorted(path.rglob("*.json"))
+    elif _GLOB_CHARS & set(source):
+        files = (Path(match) for match in sorted(glob.glob(source, recursive=True)))
+    else:
+        files = [path]
+    for file_path in files:
+        if file_path.suffix == ".jsonl":
+            with file_path.open("r", encoding="utf-8") as handle:
+                for line_no, line in enumerate(handle, start=1):
+                    if line.strip():
+                        yield f"{file_path}:{line_no}", line
+        elif file_path.is_file():
+            yield str(file_path), file_path.read_text(encoding="utf-8")
+
+
+def is_bulk_source(source: str) -> bool:
+    return Path(source).is_dir() or bool(_GLOB_CHARS & set(source)) or source.endswith(".jsonl")
+
+
+def _validate_item(validator: IRValidator, strict: bool, item_id: str, raw: str) -> Dict[str, Any]:
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError as exc:
+        return {"id": item_id, "error": f"invalid JSON: {exc}"}
+    # JSONL records written by `generate --batch` carry the IR under "ir".
+    if isinstance(data, dict) and "ir" in data and "tree" not in data:
+        item_id = str(data.get("id", item_id))
+        data = data["ir"]
+    if not isinstance(data, dict):
+        return {"id": item_id, "error": "IR must be a JSON object"}
+    return {"id": item_id, "report": validator.validate(data, strict=strict)}
+
+
+def _init_worker(config: Config, load_whitelist: Callable[[Config], LibraryWhitelist], strict: bool) -> None:
+    global _worker_validator, _worker_strict
+    _worker_validator = compile_validator(load_whitelist(config))
+    _worker_strict = strict
+
+
+def _validate_chunk(items: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    return [_validate_item(_worker_validator, _worker_strict, item_id, raw) for item_id, raw in items]
+
+
+def _chunked(items: Iterable[Tuple[str, str]], size: int) -> Iterator[List[Tuple[str, str]]]:
+    chunk: List[Tuple[str, str]] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def validate_many(
+    items: Iterable[Tuple[str, str]],
+    config: Config,
+    load_whitelist: Callable[[Config], LibraryWhitelist],
+    strict: bool = False,
+    workers: int = 1,
+    chunk_size: int = 64,
+) -> Iterator[Dict[str, Any]]:
+    if workers <= 1:
+        validator = compile_validator(load_whitelist(config))
+        for item_id, raw in items:
+            yield _validate_item(validator, strict, item_id, raw)
+        return
+    # Importing the process pool loads multiprocessing; single-process runs skip it.
+    from concurrent.futures import ProcessPoolExecutor
+
+    pending: Deque[Future] = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(config, load_whitelist, strict)
+    ) as pool:
+        for chunk in _chunked(items, chunk_size):
+            pending.append(pool.submit(_validate_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+class PassRateCounter:
+    def __init__(self) -> None:
+        self.total = 0
+        self.passed = 0
+        self.invalid = 0
+        self.flags = {flag: 0 for flag in REPORT_FLAGS}
+
+    def add(self, result: Dict[str, Any]) -> None:
+        self.total += 1
+        report = result.get("report")
+        if report is None:
+            self.invalid += 1
+            return
+        for flag in REPORT_FLAGS:
+            if report.get(flag):
+                self.flags[flag] += 1
+        if report.get("SchemaPass") and not report.get("errors"):
+            self.passed += 1
+
+    def summary(self) -> Dict[str, Any]:
+        def rate(count: int) -> float:
+            return round(count / self.total, 4) if self.total else 0.0
+
+        return {
+            "total": self.total,
+            "passed": self.passed,
+            "pass_rate": rate(self.passed),
+            "invalid": self.invalid,
+            "flags": {flag: {"pass": count, "rate": rate(count)} for flag, count in self.flags.items()},
+        }
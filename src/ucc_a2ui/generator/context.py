@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List
+
+from ..config import Config
+from ..library.whitelist import ComponentWhitelist, LibraryWhitelist
+
+if TYPE_CHECKING:
+    from ..embed.embedder_base import EmbedderBase
+    from ..embed.index_faiss import FaissIndex
+    from ..embed.query_cache import ResultCache
+
+# The index stack (faiss, numpy, embedders) is imported on first retrieval, so
+# generate with context_mode: whitelist never loads it.
+
+CONTEXT_MODES = ("retrieval", "whitelist")
+
+
+class IndexLoader:
+    """Loads the docs index on first use and again whenever sync rewrites it."""
+
+    def __init__(self, index_dir: str | Path, search_params: Dict[str, Any] | None = None) -> None:
+        self.index_dir = Path(index_dir)
+        self.search_params = search_params
+        self._lock = threading.Lock()
+        self._index: FaissIndex | None = None
+
+    def __call__(self) -> FaissIndex | None:
+        from ..embed.index_faiss import index_version, load_faiss_index
+
+        version = index_version(self.index_dir)
+        if not version:
+            return None
+        with self._lock:
+            if self._index is None or self._index.version != version:
+                self._index = load_faiss_index(self.index_dir, self.search_params)
+            return self._index
+
+
+class ComponentRetriever:
+    """Picks the whitelist components whose docs best match a prompt.
+
+    Docs are written one file per component (``<type>.md``), so a chunk's
+    source names its component. Returns None when no index is available or
+    nothing retrieved is in the whitelist, so callers use the whitelist context.
+    """
+
+    def __init__(
+        self,
+        load_index: Callable[[], FaissIndex | None],
+        embedder: EmbedderBase,
+        top_k: int = 12,
+        result_cache: ResultCache | None = None,
+        mode: str = "vector",
+    ) -> None:
+        self.load_index = load_index
+        self.embedder = embedder
+        self.top_k = top_k
+        self.result_cache = result_cache
+        self.mode = mode
+
+    def retrieve(self, prompt: str, whitelist: LibraryWhitelist) -> List[ComponentWhitelist] | None:
+        from ..embed.search import search_loaded_index
+
+        faiss_index = self.load_index()
+        if faiss_index is None or not len(faiss_index.chunks):
+            return None
+        # Several chunks come from the same doc; over-fetch so top_k components survive dedup.
+        # Indexes synced before lexical search existed can still serve vector results.
+        mode = self.mode if faiss_index.lexical is not None else "vector"
+        results = search_loaded_index(
+            faiss_index, prompt, self.embedder, top_k=self.top_k * 3, result_cache=self.result_cache, mode=mode
+        )
+        picked: Dict[str, ComponentWhitelist] = {}
+        for result in results:
+            component = whitelist.components.get(Path(result.source).stem)
+            if component is not None and component.component_type not in picked:
+                picked[component.component_type] = component
+                if len(picked) >= self.top_k:
+                    break
+        return list(picked.values()) or None
+
+
+def build_component_retriever(
+    config: Config,
+    embedder: EmbedderBase | None = None,
+    load_index: Callable[[], FaissIndex | None] | None = None,
+    result_cache: ResultCache | None = None,
+) -> ComponentRetriever | None:
+    mode = config.get("generator", "context_mode", default="retrieval")
+    if mode not in CONTEXT_MODES:
+        raise ValueError(f"Unknown generator.context_mode {mode!r}; expected one of {', '.join(CONTEXT_MODES)}")
+    if mode != "retrieval":
+        return None
+    from ..embed import build_embedder
+    from ..embed.query_cache import build_query_cache
+
+    embed_config = config.get_resolved("embed", default={})
+    if embedder is None:
+        embedder, result_cache = build_query_cache(embed_config, build_embedder(embed_config))
+    if load_index is None:
+        load_index = IndexLoader(
+            embed_config.get("index_dir", "index/ucc_docs"), dict(embed_config.get("index_params") or {})
+        )
+    top_k = int(config.get("generator", "context_top_k", default=12))
+    mode = str(embed_config.get("search_mode", "vector"))
+    return ComponentRetriever(load_index, embedder, top_k=top_k, result_cache=result_cache, mode=mode)
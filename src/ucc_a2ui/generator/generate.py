@@ -2,21 +2,25 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterator, Tuple
 
 from ..config import Config
 from ..library.theme import merge_theme_tokens
 from ..library.whitelist import LibraryWhitelist
+from ..transport import build_transport
+from .context import ComponentRetriever, build_component_retriever
 from .json_extract import JSONExtractError, extract_first_json
+from .llm_cache import CachedLLM, build_completion_cache
 from .llm_client_base import LLMClientBase
 from .llm_dashscope_qwen import DashScopeQwenLLM
 from .llm_mock import MockLLM
 from .llm_openai_compat import OpenAICompatibleLLM
-from .prompt_builder import build_prompt_messages
-from .validator import validate_ir
+from .prompt_builder import build_prompt_messages, estimate_tokens, select_components
+from .stream_check import StreamingIRChecker
+from .validator import ValidationError, build_report, compile_validator, validate_ir
 
 
-def build_llm(config: Dict[str, Any], whitelist: LibraryWhitelist) -> LLMClientBase:
+def _build_client(config: Dict[str, Any], whitelist: LibraryWhitelist) -> LLMClientBase:
     mode = config.get("mode", "mock")
     if mode == "openai_compatible":
         return OpenAICompatibleLLM(
@@ -26,6 +30,7 @@ def build_llm(config: Dict[str, Any], whitelist: LibraryWhitelist) -> LLMClientB
             temperature=float(config.get("temperature", 0.2)),
             max_tokens=int(config.get("max_tokens", 2000)),
             timeout_s=int(config.get("timeout_s", 60)),
+            transport=build_transport(config),
         )
     if mode == "dashscope_qwen":
         return DashScopeQwenLLM(
@@ -34,17 +39,52 @@ def build_llm(config: Dict[str, Any], whitelist: LibraryWhitelist) -> LLMClientB
             temperature=float(config.get("temperature", 0.2)),
             max_tokens=int(config.get("max_tokens", 2000)),
             timeout_s=int(config.get("timeout_s", 60)),
+            transport=build_transport(config),
         )
     return MockLLM(whitelist)
 
 
+def build_llm(config: Dict[str, Any], whitelist: LibraryWhitelist) -> LLMClientBase:
+    llm = _build_client(config, whitelist)
+    cache = build_completion_cache(config)
+    if cache is None:
+        return llm
+    params = {
+        "mode": config.get("mode", "mock"),
+        "model": config.get("model", ""),
+        "temperature": float(config.get("temperature", 0.2)),
+        "max_tokens": int(config.get("max_tokens", 2000)),
+    }
+    return CachedLLM(llm, cache, params)
+
+
+def _complete_streaming(stream: Iterator[str], checker: StreamingIRChecker, abort_on_fatal: bool) -> str:
+    try:
+        for piece in stream:
+            if checker.feed(piece) and abort_on_fatal:
+                break
+    finally:
+        # Closing the generator drops the connection and cancels the completion.
+        stream.close()
+    return checker.text
+
+
+def _write_output(out_dir: Path | None, name: str, content: str) -> None:
+    if out_dir is None:
+        return
+    (out_dir / name).write_text(content, encoding="utf-8")
+
+
 def generate_ui(
     prompt: str,
     config: Config,
     whitelist: LibraryWhitelist,
-    out_dir: str | Path,
+    out_dir: str | Path | None,
     print_messages: bool = False,
     save_plan: bool = False,
+    llm: LLMClientBase | None = None,
+    retriever: ComponentRetriever | None = None,
+    use_cache: bool = True,
 ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
     defaults = {
         "width": config.get("generator", "default_width", default=1366),
@@ -54,23 +94,74 @@ def generate_ui(
         "padding": config.get("generator", "default_padding", default=16),
     }
     theme = merge_theme_tokens(whitelist.theme_tokens)
-    messages = build_prompt_messages(prompt, whitelist, theme, defaults)
+    context_error = None
+    try:
+        if retriever is None:
+            retriever = build_component_retriever(config)
+        retrieved = retriever.retrieve(prompt, whitelist) if retriever is not None else None
+    except Exception as exc:
+        # Retrieval only narrows the context; a broken embedder or index falls back to the whitelist.
+        retrieved = None
+        context_error = f"{type(exc).__name__}: {exc}"
+    token_budget = config.get("generator", "context_token_budget", default=1200)
+    # The budget bounds retrieved context only; the whitelist fallback stays as it always was.
+    if retrieved is not None and token_budget:
+        components = select_components(whitelist, retrieved, token_budget=int(token_budget))
+    else:
+        components = select_components(whitelist, retrieved)
+    messages = build_prompt_messages(prompt, whitelist, theme, defaults, components=components)
+    usage: Dict[str, Any] = {
+        "context": "whitelist" if retrieved is None else "retrieval",
+        "context_components": len(components),
+        "prompt_tokens_est": sum(estimate_tokens(message["content"]) for message in messages),
+    }
+    if context_error is not None:
+        usage["context_error"] = context_error
     if print_messages:
         for message in messages:
             print(f"[{message['role']}]\n{message['content']}\n")
 
-    llm_config = config.get_resolved("llm", default={})
-    llm = build_llm(llm_config, whitelist)
-    response = llm.complete(messages)
+    if llm is None:
+        llm_config = config.get_resolved("llm", default={})
+        llm = build_llm(llm_config, whitelist)
+    if isinstance(llm, CachedLLM) and not use_cache:
+        llm = llm.llm
+    strict = bool(config.get("library", "strict_params", default=False))
+    checker = None
+    abort_on_fatal = bool(config.get("llm", "stream_abort", default=True))
+    cached = llm.lookup(messages) if isinstance(llm, CachedLLM) else None
+    if cached is not None:
+        content = cached.content
+        if cached.prompt_tokens is not None:
+            usage["prompt_tokens"] = cached.prompt_tokens
+    elif config.get("llm", "stream", default=False):
+        checker = StreamingIRChecker(compile_validator(whitelist), strict=strict)
+        stream = llm.stream_and_store(messages) if isinstance(llm, CachedLLM) else llm.complete_stream(messages)
+        content = _complete_streaming(stream, checker, abort_on_fatal)
+    else:
+        response = llm.complete_and_store(messages) if isinstance(llm, CachedLLM) else llm.complete(messages)
+        content = response.content
+        if response.prompt_tokens is not None:
+            usage["prompt_tokens"] = response.prompt_tokens
+    cache_hit = cached is not None
+
+    if out_dir is not None:
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
 
-    out_dir = Path(out_dir)
-    out_dir.mkdir(parents=True, exist_ok=True)
-    raw_path = out_dir / "raw.txt"
+    if checker is not None and checker.fatal is not None and abort_on_fatal:
+        _write_output(out_dir, "raw.txt", content)
+        aborted = ValidationError("E_STREAM_ABORTED", "$", f"Completion cancelled after {len(content)} chars")
+        report = build_report(checker.errors + [aborted], schema_pass=False)
+        report["usage"] = usage
+        report["cache_hit"] = cache_hit
+        _write_output(out_dir, "ui_report.json", json.dumps(report, ensure_ascii=False, indent=2))
+        return {}, report
 
     try:
-        data = extract_first_json(response.content)
+        data = extract_first_json(content, allow_arrays=False)
     except JSONExtractError:
-        raw_path.write_text(response.content, encoding="utf-8")
+        _write_output(out_dir, "raw.txt", content)
         report = {
             "SchemaPass": False,
             "ComponentWhitelistPass": False,
@@ -79,19 +170,22 @@ def generate_ui(
             "BindingSanity": False,
             "ThemePass": False,
             "errors": [{"code": "E_JSON_PARSE", "path": "$", "message": "Failed to parse JSON"}],
+            "usage": usage,
+            "cache_hit": cache_hit,
         }
-        (out_dir / "ui_report.json").write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        _write_output(out_dir, "ui_report.json", json.dumps(report, ensure_ascii=False, indent=2))
         return {}, report
 
     plan = data.get("plan") if isinstance(data, dict) else None
     ir = data.get("ir") if isinstance(data, dict) else data
 
     if save_plan and plan is not None:
-        (out_dir / "plan.json").write_text(json.dumps(plan, ensure_ascii=False, indent=2), encoding="utf-8")
+        _write_output(out_dir, "plan.json", json.dumps(plan, ensure_ascii=False, indent=2))
 
-    (out_dir / "ui_ir.json").write_text(json.dumps(ir, ensure_ascii=False, indent=2), encoding="utf-8")
+    _write_output(out_dir, "ui_ir.json", json.dumps(ir, ensure_ascii=False, indent=2))
 
-    strict = bool(config.get("library", "strict_params", default=False))
     report = validate_ir(ir, whitelist, strict=strict)
-    (out_dir / "ui_report.json").write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    report["usage"] = usage
+    report["cache_hit"] = cache_hit
+    _write_output(out_dir, "ui_report.json", json.dumps(report, ensure_ascii=False, indent=2))
     return ir, report
@@ -1,3 +1,7 @@
+from __future__ import annotations
+
+from typing import Any
+
 IR_SCHEMA = {
     "$schema": "http://json-schema.org/draft-07/schema#",
     "type": "object",
@@ -21,3 +25,30 @@ IR_SCHEMA = {
         }
     },
 }
+
+_NODE_FIELDS = (("type", str), ("props", dict), ("events", dict), ("children", list))
+
+
+def is_valid_ir_structure(ir: Any) -> bool:
+    """Hand-specialised equivalent of validating against IR_SCHEMA.
+
+    True exactly when Draft7Validator(IR_SCHEMA) reports no errors, so the
+    generic engine is only needed to describe a failure.
+    """
+    if not isinstance(ir, dict):
+        return False
+    for key in ("version", "theme", "variables", "tree"):
+        if key not in ir:
+            return False
+    if not isinstance(ir["version"], str) or not isinstance(ir["theme"], dict) or not isinstance(ir["variables"], list):
+        return False
+    stack = [ir["tree"]]
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, dict):
+            return False
+        for key, expected in _NODE_FIELDS:
+            if key not in node or not isinstance(node[key], expected):
+                return False
+        stack.extend(node["children"])
+    return True
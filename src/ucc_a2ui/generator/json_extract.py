@@ -2,35 +2,157 @@ from __future__ import annotations
 
 import json
 import re
-from typing import Any
+from typing import Any, Dict, Iterator, List, Tuple
+
+_DECODER = json.JSONDecoder()
+_FENCE = "```"
+_INFO_STRING = re.compile(r"[\w+-]*")
+# A container can only start where its first token is valid: a key or "}" after
+# "{", a value or "]" after "[", so "{name}" or "[[[" never reach the decoder.
+_OBJECT_START = re.compile(r'\{(?=\s*["}])')
+_VALUE_START = re.compile(r'\{(?=\s*["}])|\[(?=\s*[-0-9"{\[\]tfn])')
+_SIGNIFICANT = re.compile(r'["\\{}\[\]]')
+_CLOSERS = {"{": "}", "[": "]"}
 
 
 class JSONExtractError(Exception):
     pass
 
 
-def extract_first_json(text: str) -> Any:
+def _fenced_blocks(text: str) -> Iterator[Tuple[int, int]]:
+    """Yields (start, end) of each fenced block body; an unclosed last fence runs to the end."""
+    pos = text.find(_FENCE)
+    while pos != -1:
+        # Skip the info string (```json); the body may start on the same line.
+        body = _INFO_STRING.match(text, pos + len(_FENCE)).end()
+        end = text.find(_FENCE, body)
+        yield body, len(text) if end == -1 else end
+        if end == -1:
+            return
+        pos = text.find(_FENCE, end + len(_FENCE))
+
+
+def _scan_prefix(text: str, start: int, end: int, openers: str) -> Tuple[int, int]:
+    """For a prefix text[start:end] the decoder already accepted, returns two starts (-1 if none).
+
+    The first is the earliest container that opens and closes in the prefix:
+    strings and brackets there are well formed, so it is valid JSON. The second
+    is the first opener inside a string literal; read from there instead, the
+    text may still hold a valid container the failed candidate swallowed.
+    """
+    stack = []
+    first = -1
+    quoted = -1
+    in_string = False
+    escape = False
+    for idx in range(start, end):
+        char = text[idx]
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+            elif quoted == -1 and char in openers:
+                quoted = idx
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append(idx)
+        elif char in "}]" and stack:
+            opened = stack.pop()
+            if text[opened] in openers and (first == -1 or opened < first):
+                first = opened
+    return first, quoted
+
+
+def _match_brackets(text: str, start: int) -> Dict[int, int]:
+    """Maps each opener outside strings in text[start:] to its closer (-1 if never closed).
+
+    Reading starts outside a string. Stray closers are ignored, so a container
+    that is valid JSON always maps to its own end.
+    """
+    ends: Dict[int, int] = {}
+    stack: List[int] = []
+    in_string = False
+    escaped = -1
+    for match in _SIGNIFICANT.finditer(text, start):
+        idx = match.start()
+        if idx == escaped:
+            continue
+        char = text[idx]
+        if in_string:
+            if char == "\\":
+                escaped = idx + 1
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(idx)
+            ends[idx] = -1
+        elif stack and _CLOSERS[text[stack[-1]]] == char:
+            ends[stack.pop()] = idx
+    return ends
+
+
+def _scan(text: str, start: int, end: int, allow_arrays: bool) -> Tuple[bool, Any]:
+    """Returns the first JSON container in text[start:end].
+
+    Brackets are matched once per reading of the string quotes, so a candidate
+    that never closes is skipped and a closed one is decoded from its own slice:
+    a failure costs the candidate's span, not its offset. When decoding fails at
+    ``pos``, everything before it was a valid JSON prefix: a container nested in
+    it that already closed is the answer. Openers outside strings that were
+    still open fail the same way, so scanning resumes at ``pos``, or at the first
+    opener inside one of the prefix's strings when there is one.
+    """
+    openers = "{[" if allow_arrays else "{"
+    pattern = _VALUE_START if allow_arrays else _OBJECT_START
+    window = text[start:end]
+    # One map per way of pairing the quotes; a candidate inside a string in
+    # every known reading starts a new one.
+    readings = [_match_brackets(window, 0)]
+    match = pattern.search(window)
+    while match is not None:
+        candidate = match.start()
+        closer = next((ends[candidate] for ends in readings if candidate in ends), None)
+        if closer is None:
+            readings.append(_match_brackets(window, candidate))
+            closer = readings[-1][candidate]
+        if closer == -1:
+            match = pattern.search(window, candidate + 1)
+            continue
+        span = window[candidate : closer + 1]
+        try:
+            return True, _DECODER.raw_decode(span)[0]
+        except json.JSONDecodeError as exc:
+            failed_at = candidate + max(exc.pos, 1)
+        except RecursionError:
+            failed_at = candidate + 1
+        nested, quoted = _scan_prefix(window, candidate + 1, failed_at, openers)
+        resume = quoted if quoted != -1 else failed_at
+        if nested != -1 and nested < resume:
+            closer = next(ends[nested] for ends in readings if nested in ends)
+            return True, _DECODER.raw_decode(window[nested : closer + 1])[0]
+        match = pattern.search(window, resume)
+    return False, None
+
+
+def extract_first_json(text: str, allow_arrays: bool = True) -> Any:
+    """Returns the first JSON object (or array) in an LLM completion.
+
+    Fenced code blocks are tried first, in order; the whole text is the fallback.
+    Ignores braces inside JSON strings and runs in time linear in the text.
+    """
     if not text:
         raise JSONExtractError("Empty output")
-    cleaned = re.sub(r"```json|```", "", text, flags=re.IGNORECASE).strip()
-    try:
-        return json.loads(cleaned)
-    except json.JSONDecodeError:
-        pass
-
-    start = cleaned.find("{")
-    while start != -1:
-        depth = 0
-        for idx in range(start, len(cleaned)):
-            if cleaned[idx] == "{":
-                depth += 1
-            elif cleaned[idx] == "}":
-                depth -= 1
-                if depth == 0:
-                    snippet = cleaned[start : idx + 1]
-                    try:
-                        return json.loads(snippet)
-                    except json.JSONDecodeError:
-                        break
-        start = cleaned.find("{", start + 1)
+    for start, end in _fenced_blocks(text):
+        found, value = _scan(text, start, end, allow_arrays)
+        if found:
+            return value
+    found, value = _scan(text, 0, len(text), allow_arrays)
+    if found:
+        return value
     raise JSONExtractError("No valid JSON object found")
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from .llm_client_base import LLMClientBase, LLMResponse
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS completions (
+    key TEXT PRIMARY KEY,
+    content TEXT NOT NULL,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS completions_accessed ON completions (accessed);
+"""
+
+
+class CompletionCache:
+    """SQLite store of completions with a TTL and an LRU size cap.
+
+    One connection shared across threads; WAL lets several processes (batch
+    runs, serve) read and write the same file.
+    """
+
+    def __init__(self, path: str | Path, ttl_s: float = 7 * 24 * 3600, max_entries: int = 10000) -> None:
+        self.path = Path(path)
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        if self.ttl_s:
+            self._conn.execute("DELETE FROM completions WHERE created < ?", (time.time() - self.ttl_s,))
+        self._count = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def get(self, key: str) -> LLMResponse | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, prompt_tokens, completion_tokens, created FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl_s and row[3] < now - self.ttl_s:
+                self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                self._count -= 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE completions SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return LLMResponse(content=row[0], prompt_tokens=row[1], completion_tokens=row[2], cache_hit=True)
+
+    def put(self, key: str, response: LLMResponse) -> None:
+        now = time.time()
+        with self._lock:
+            exists = self._conn.execute("SELECT 1 FROM completions WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?, ?, ?)",
+                (key, response.content, response.prompt_tokens, response.completion_tokens, now, now),
+            )
+            if exists is None:
+                self._count += 1
+            if self.max_entries and self._count > self.max_entries:
+                # Evict a tenth at a time so steady-state writes do not delete on every put.
+                evict = self._count - self.max_entries + max(1, self.max_entries // 10)
+                self._conn.execute(
+                    "DELETE FROM completions WHERE key IN "
+                    "(SELECT key FROM completions ORDER BY accessed LIMIT ?)",
+                    (evict,),
+                )
+                self._count = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedLLM(LLMClientBase):
+    """Serves byte-identical requests from a CompletionCache.
+
+    The key covers the request parameters that change the completion, so a
+    different model or temperature never hits another one's entries.
+    """
+
+    def __init__(self, llm: LLMClientBase, cache: CompletionCache, params: Dict[str, Any]) -> None:
+        self.llm = llm
+        self.cache = cache
+        self.params = params
+
+    def cache_key(self, messages: List[dict]) -> str:
+        payload = json.dumps({"params": self.params, "messages": messages}, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def lookup(self, messages: List[dict]) -> LLMResponse | None:
+        return self.cache.get(self.cache_key(messages))
+
+    def complete(self, messages: List[dict]) -> LLMResponse:
+        cached = self.lookup(messages)
+        if cached is not None:
+            return cached
+        return self.complete_and_store(messages)
+
+    def complete_and_store(self, messages: List[dict]) -> LLMResponse:
+        response = self.llm.complete(messages)
+        self.cache.put(self.cache_key(messages), response)
+        return response
+
+    def complete_stream(self, messages: List[dict]) -> Iterator[str]:
+        cached = self.lookup(messages)
+        if cached is not None:
+            yield cached.content
+            return
+        yield from self.stream_and_store(messages)
+
+    def stream_and_store(self, messages: List[dict]) -> Iterator[str]:
+        """Streams from the wrapped client and stores the completion once it has fully arrived."""
+        pieces: List[str] = []
+        stream = self.llm.complete_stream(messages)
+        try:
+            for piece in stream:
+                pieces.append(piece)
+                yield piece
+        finally:
+            stream.close()
+        # Not reached when the consumer closes the stream early; a cancelled completion is not stored.
+        self.cache.put(self.cache_key(messages), LLMResponse(content="".join(pieces)))
+
+
+def build_completion_cache(config: Dict[str, Any]) -> CompletionCache | None:
+    if not config.get("cache", False):
+        return None
+    return CompletionCache(
+        config.get("cache_path", ".cache/llm_completions.sqlite"),
+        ttl_s=float(config.get("cache_ttl_s", 7 * 24 * 3600)),
+        max_entries=int(config.get("cache_max_entries", 10000)),
+    )
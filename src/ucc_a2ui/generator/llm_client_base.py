@@ -1,14 +1,22 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List
+from typing import Iterator, List
 
 
 @dataclass
 class LLMResponse:
     content: str
+    # Token counts reported by the API, when it reports them.
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+    cache_hit: bool = False
 
 
 class LLMClientBase:
     def complete(self, messages: List[dict]) -> LLMResponse:
         raise NotImplementedError
+
+    def complete_stream(self, messages: List[dict]) -> Iterator[str]:
+        # Clients without a streaming API deliver the whole completion as one piece.
+        yield self.complete(messages).content
@@ -1,22 +1,31 @@
 from __future__ import annotations
 
-from typing import List
-
-import requests
+import json
+from typing import Iterator, List
 
+from ..transport import HTTPTransport, iter_sse_data
 from .llm_client_base import LLMClientBase, LLMResponse
 
 
 class DashScopeQwenLLM(LLMClientBase):
-    def __init__(self, api_key: str, model: str, temperature: float, max_tokens: int, timeout_s: int) -> None:
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        timeout_s: int,
+        transport: HTTPTransport | None = None,
+    ) -> None:
         self.api_key = api_key
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
         self.timeout_s = timeout_s
+        self.transport = transport or HTTPTransport()
         self.base_url = "https://dashscope.aliyuncs.com/api/v1/services/aigc/text-generation/generation"
 
-    def complete(self, messages: List[dict]) -> LLMResponse:
+    def _request(self, messages: List[dict]) -> tuple[dict, dict]:
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}",
@@ -29,8 +38,28 @@ class DashScopeQwenLLM(LLMClientBase):
                 "max_tokens": self.max_tokens,
             },
         }
-        response = requests.post(self.base_url, headers=headers, json=payload, timeout=self.timeout_s)
-        response.raise_for_status()
-        data = response.json()
+        return headers, payload
+
+    def complete(self, messages: List[dict]) -> LLMResponse:
+        headers, payload = self._request(messages)
+        data = self.transport.post_json(self.base_url, payload, headers, self.timeout_s)
         content = data.get("output", {}).get("text", "")
-        return LLMResponse(content=content)
+        usage = data.get("usage") or {}
+        return LLMResponse(
+            content=content,
+            prompt_tokens=usage.get("input_tokens"),
+            completion_tokens=usage.get("output_tokens"),
+        )
+
+    def complete_stream(self, messages: List[dict]) -> Iterator[str]:
+        headers, payload = self._request(messages)
+        headers["X-DashScope-SSE"] = "enable"
+        payload["parameters"]["incremental_output"] = True
+        lines = self.transport.post_stream(self.base_url, payload, headers, self.timeout_s)
+        try:
+            for data in iter_sse_data(lines):
+                piece = json.loads(data).get("output", {}).get("text")
+                if piece:
+                    yield piece
+        finally:
+            lines.close()
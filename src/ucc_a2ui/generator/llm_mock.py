@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import json
-from typing import List
+from typing import Iterator, List
 
 from ..library.whitelist import LibraryWhitelist
 from .llm_client_base import LLMClientBase, LLMResponse
@@ -34,3 +34,8 @@ class MockLLM(LLMClientBase):
         }
         content = json.dumps({"plan": plan, "ir": ir}, ensure_ascii=False, indent=2)
         return LLMResponse(content=content)
+
+    def complete_stream(self, messages: List[dict]) -> Iterator[str]:
+        content = self.complete(messages).content
+        for start in range(0, len(content), 16):
+            yield content[start : start + 16]
@@ -1,22 +1,32 @@
 from __future__ import annotations
 
-from typing import List
-
-import requests
+import json
+from typing import Iterator, List
 
+from ..transport import HTTPTransport, iter_sse_data
 from .llm_client_base import LLMClientBase, LLMResponse
 
 
 class OpenAICompatibleLLM(LLMClientBase):
-    def __init__(self, base_url: str, api_key: str, model: str, temperature: float, max_tokens: int, timeout_s: int) -> None:
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        timeout_s: int,
+        transport: HTTPTransport | None = None,
+    ) -> None:
         self.base_url = base_url.rstrip("/")
         self.api_key = api_key
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
         self.timeout_s = timeout_s
+        self.transport = transport or HTTPTransport()
 
-    def complete(self, messages: List[dict]) -> LLMResponse:
+    def _request(self, messages: List[dict]) -> tuple[str, dict, dict]:
         url = f"{self.base_url}/chat/completions"
         headers = {"Content-Type": "application/json"}
         if self.api_key:
@@ -27,8 +37,28 @@ class OpenAICompatibleLLM(LLMClientBase):
             "max_tokens": self.max_tokens,
             "messages": messages,
         }
-        response = requests.post(url, headers=headers, json=payload, timeout=self.timeout_s)
-        response.raise_for_status()
-        data = response.json()
+        return url, headers, payload
+
+    def complete(self, messages: List[dict]) -> LLMResponse:
+        url, headers, payload = self._request(messages)
+        data = self.transport.post_json(url, payload, headers, self.timeout_s)
         content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-        return LLMResponse(content=content)
+        usage = data.get("usage") or {}
+        return LLMResponse(
+            content=content,
+            prompt_tokens=usage.get("prompt_tokens"),
+            completion_tokens=usage.get("completion_tokens"),
+        )
+
+    def complete_stream(self, messages: List[dict]) -> Iterator[str]:
+        url, headers, payload = self._request(messages)
+        payload["stream"] = True
+        lines = self.transport.post_stream(url, payload, headers, self.timeout_s)
+        try:
+            for data in iter_sse_data(lines):
+                choices = json.loads(data).get("choices") or [{}]
+                piece = (choices[0].get("delta") or {}).get("content")
+                if piece:
+                    yield piece
+        finally:
+            lines.close()
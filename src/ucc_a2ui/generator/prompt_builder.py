@@ -1,16 +1,56 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+import re
+from typing import Any, Dict, Iterable, List
 
-from ..library.whitelist import EVENT_WHITELIST, LibraryWhitelist
+from ..library.whitelist import EVENT_WHITELIST, ComponentWhitelist, LibraryWhitelist
 
+# CJK characters are roughly one token each in Qwen/GPT tokenizers; other text ~4 chars per token.
+_CJK = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+_SUMMARY_HEADER = "组件白名单摘要："
 
-def build_library_summary(whitelist: LibraryWhitelist, limit: int = 20) -> str:
-    lines = ["组件白名单摘要："]
-    for component in list(whitelist.components.values())[:limit]:
-        key_params = ", ".join(component.key_params[:8])
-        lines.append(f"- {component.component_type} ({component.name_cn}) | KeyParams: {key_params}")
-    return "\n".join(lines)
+
+def estimate_tokens(text: str) -> int:
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _component_line(component: ComponentWhitelist) -> str:
+    key_params = ", ".join(component.key_params[:8])
+    return f"- {component.component_type} ({component.name_cn}) | KeyParams: {key_params}"
+
+
+def select_components(
+    whitelist: LibraryWhitelist,
+    components: Iterable[ComponentWhitelist] | None = None,
+    limit: int = 20,
+    token_budget: int | None = None,
+) -> List[ComponentWhitelist]:
+    """Keeps components in order until their summary lines would exceed ``token_budget``.
+
+    Without an explicit component list the first ``limit`` whitelist entries are used.
+    """
+    if components is None:
+        components = list(whitelist.components.values())[:limit]
+    selected: List[ComponentWhitelist] = []
+    used = estimate_tokens(_SUMMARY_HEADER)
+    for component in components:
+        cost = estimate_tokens(_component_line(component)) + 1
+        if token_budget is not None and used + cost > token_budget and selected:
+            break
+        selected.append(component)
+        used += cost
+    return selected
+
+
+def build_library_summary(
+    whitelist: LibraryWhitelist,
+    limit: int = 20,
+    components: Iterable[ComponentWhitelist] | None = None,
+    token_budget: int | None = None,
+) -> str:
+    selected = select_components(whitelist, components, limit=limit, token_budget=token_budget)
+    return "\n".join([_SUMMARY_HEADER] + [_component_line(component) for component in selected])
 
 
 def build_prompt_messages(
@@ -18,6 +58,7 @@ def build_prompt_messages(
     whitelist: LibraryWhitelist,
     theme_tokens: Dict[str, str],
     defaults: Dict[str, Any],
+    components: Iterable[ComponentWhitelist] | None = None,
 ) -> List[Dict[str, str]]:
     system_message = (
         "你是 A2UI 方案 A 的 UI IR 生成器。只能使用白名单组件与 props。"
@@ -26,7 +67,7 @@ def build_prompt_messages(
         "事件只能来自允许事件列表。"
     )
     context_message = (
-        f"{build_library_summary(whitelist)}\n"
+        f"{build_library_summary(whitelist, components=components)}\n"
         f"允许事件：{', '.join(EVENT_WHITELIST)}\n"
         f"默认主题 tokens：{theme_tokens}\n"
     )
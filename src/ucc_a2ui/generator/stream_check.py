@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, FrozenSet, List, Optional
+
+from .validator import IRValidator, ValidationError
+
+DEFAULT_FATAL_CODES = frozenset({"E_UNKNOWN_COMPONENT"})
+
+
+@dataclass
+class _Frame:
+    kind: str
+    start: int
+    key: Optional[str] = None
+    expect_key: bool = True
+    is_node: bool = False
+    # Arrays that are a property of a node object.
+    in_node: bool = False
+    # (parent path, child index) links as used by IRValidator, for nodes and their arrays.
+    path: Any = None
+    check: bool = True
+    type_checked: bool = False
+    child_count: int = 0
+
+
+class StreamingIRChecker:
+    """Scans a completion as it streams and checks IR nodes as soon as they are complete.
+
+    Scanning starts at the first ``{`` after the latest code fence. Until an
+    ``ir`` or ``tree`` key shows up the text may still be prose: a fence starts
+    over after it, and a root object that closes without either key is skipped.
+    Objects under ``tree`` or in a node's ``children`` array are treated as
+    nodes: ``type`` is checked when its string value closes, props/events when
+    the node object closes. The final report still comes from the full
+    validator once the completion is done.
+    """
+
+    def __init__(
+        self,
+        validator: IRValidator,
+        strict: bool = False,
+        fatal_codes: FrozenSet[str] = DEFAULT_FATAL_CODES,
+    ) -> None:
+        self.validator = validator
+        self.strict = strict
+        self.fatal_codes = fatal_codes
+        self.errors: List[ValidationError] = []
+        self.fatal: ValidationError | None = None
+        self._chunks: List[str] = []
+        self._length = 0
+        self._stack: List[_Frame] = []
+        self._started = False
+        self._anchored = False
+        self._backticks = 0
+        self._done = False
+        self._in_string = False
+        self._escape = False
+        self._string_chars: List[str] = []
+
+    @property
+    def text(self) -> str:
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def feed(self, chunk: str) -> bool:
+        """Consumes the next piece of the completion; True once a fatal error was seen."""
+        offset = self._length
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+        if self._done or self.fatal is not None:
+            return self.fatal is not None
+        for idx, char in enumerate(chunk):
+            if char != "`":
+                self._backticks = 0
+            elif not self._anchored:
+                self._backticks += 1
+                if self._backticks == 3:
+                    self._restart()
+                    continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._on_string("".join(self._string_chars))
+                    continue
+                self._string_chars.append(char)
+            elif not self._started:
+                if char == "{":
+                    self._started = True
+                    self._stack.append(_Frame("{", offset + idx))
+            elif char == '"':
+                self._in_string = True
+                self._string_chars = []
+            elif char in "{[":
+                self._open(char, offset + idx)
+            elif char in "}]":
+                frame = self._stack.pop()
+                if frame.is_node:
+                    self._on_node_end(frame, offset + idx + 1)
+                if not self._stack:
+                    if self._anchored:
+                        self._done = True
+                    else:
+                        self._restart()
+            elif char == ":":
+                self._stack[-1].expect_key = False
+            elif char == "," and self._stack[-1].kind == "{":
+                self._stack[-1].expect_key = True
+                self._stack[-1].key = None
+            if self.fatal is not None or self._done:
+                break
+        return self.fatal is not None
+
+    def _restart(self) -> None:
+        """Drops what was read so far as prose; the next ``{`` starts a new root."""
+        self._stack = []
+        self._started = False
+        self._in_string = False
+        self._escape = False
+
+    def _open(self, kind: str, start: int) -> None:
+        parent = self._stack[-1]
+        frame = _Frame(kind, start)
+        if kind == "[":
+            if parent.kind == "{":
+                frame.key = parent.key
+                frame.in_node = parent.is_node
+                frame.path = parent.path
+                frame.check = parent.check
+        elif parent.kind == "{" and parent.key == "tree" and not parent.expect_key:
+            frame.is_node = True
+        elif parent.kind == "[" and parent.key == "children" and parent.in_node:
+            frame.is_node = True
+            frame.path = (parent.path, parent.child_count)
+            frame.check = parent.check
+            parent.child_count += 1
+        self._stack.append(frame)
+
+    def _on_string(self, raw: str) -> None:
+        frame = self._stack[-1]
+        if frame.kind != "{":
+            return
+        try:
+            value = json.loads(f'"{raw}"')
+        except ValueError:
+            value = raw
+        if frame.expect_key:
+            frame.key = value
+            if value in ("ir", "tree"):
+                self._anchored = True
+        elif frame.is_node and frame.key == "type" and frame.check and not frame.type_checked:
+            frame.type_checked = True
+            errors = self.validator.node_errors({"type": value}, frame.path, strict=self.strict)
+            if errors:
+                frame.check = False
+                self._report(errors)
+
+    def _on_node_end(self, frame: _Frame, end: int) -> None:
+        if not frame.check:
+            return
+        try:
+            node = json.loads(self.text[frame.start : end])
+        except ValueError:
+            return
+        if not isinstance(node, dict) or "type" not in node:
+            return
+        errors = self.validator.node_errors(node, frame.path, strict=self.strict)
+        if frame.type_checked:
+            errors = [error for error in errors if error.code != "E_UNKNOWN_COMPONENT"]
+        self._report(errors)
+
+    def _report(self, errors: List[ValidationError]) -> None:
+        self.errors.extend(errors)
+        if self.fatal is None:
+            self.fatal = next((error for error in errors if error.code in self.fatal_codes), None)
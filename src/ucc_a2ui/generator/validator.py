@@ -1,12 +1,13 @@
 from __future__ import annotations
 
+import functools
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any, Dict, List, Set
-
-from jsonschema import Draft7Validator
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
 
 from ..library.whitelist import EVENT_WHITELIST, LibraryWhitelist
-from .ir_schema import IR_SCHEMA
+from .ir_schema import IR_SCHEMA, is_valid_ir_structure
 
 BINDING_KEYS = {
     "textBinding",
@@ -46,92 +47,147 @@ def _normalize_binding(value: str) -> str:
     return value
 
 
-def _validate_node(
-    node: Dict[str, Any],
-    whitelist: LibraryWhitelist,
-    strict: bool,
-    errors: List[ValidationError],
-    path: List[Any],
-) -> None:
-    component_type = node.get("type")
-    component = whitelist.components.get(component_type)
-    if component is None:
-        errors.append(ValidationError("E_UNKNOWN_COMPONENT", _json_path(path + ["type"]), "Unknown component"))
-        return
-
-    allowed_props = set(component.key_params)
-    if strict and component.strict_params:
-        allowed_props = {param.name for param in component.strict_params if param.name}
-
-    props = node.get("props", {})
-    if isinstance(props, dict):
-        for key in props.keys():
-            if key not in allowed_props:
-                errors.append(
-                    ValidationError("E_UNKNOWN_PROP", _json_path(path + ["props", key]), "Unknown prop")
-                )
-    events = node.get("events", {})
-    if isinstance(events, dict):
-        for key in events.keys():
-            if key not in EVENT_WHITELIST:
-                errors.append(
-                    ValidationError("E_UNKNOWN_EVENT", _json_path(path + ["events", key]), "Unknown event")
-                )
-
-    children = node.get("children", [])
-    if isinstance(children, list):
-        for idx, child in enumerate(children):
-            _validate_node(child, whitelist, strict, errors, path + ["children", idx])
-
-
-def validate_ir(
-    ir: Dict[str, Any],
-    whitelist: LibraryWhitelist,
-    strict: bool = False,
-) -> Dict[str, Any]:
-    errors: List[ValidationError] = []
+@functools.lru_cache(maxsize=None)
+def _schema_validator() -> Any:
+    # jsonschema is slow to import and only needed once the fast path has found a problem.
+    from jsonschema import Draft7Validator
+
+    return Draft7Validator(IR_SCHEMA)
+
+
+_EVENTS = frozenset(EVENT_WHITELIST)
+_BINDING_KEYS = frozenset(BINDING_KEYS)
+
+# Node paths are (parent, child_index) links rooted at None ($.tree); they are
+# only rendered to strings when an error is reported.
+_NodePath = Optional[Tuple["_NodePath", int]]
+
+
+def _node_path(path: _NodePath, *suffix: Any) -> str:
+    indexes: List[int] = []
+    while path is not None:
+        path, idx = path
+        indexes.append(idx)
+    parts: List[Any] = ["tree"]
+    for idx in reversed(indexes):
+        parts.extend(("children", idx))
+    parts.extend(suffix)
+    return _json_path(parts)
+
+
+class IRValidator:
+    def __init__(self, whitelist: LibraryWhitelist, fast_schema: bool = True) -> None:
+        self.whitelist = whitelist
+        self.fast_schema = fast_schema
+        self._props: Dict[str, FrozenSet[str]] = {}
+        self._strict_props: Dict[str, FrozenSet[str]] = {}
+        for component_type, component in whitelist.components.items():
+            props = frozenset(component.key_params)
+            self._props[component_type] = props
+            strict_props = frozenset(param.name for param in component.strict_params if param.name)
+            self._strict_props[component_type] = strict_props if component.strict_params else props
+
+    def _check_node(
+        self,
+        node: Dict[str, Any],
+        path: _NodePath,
+        allowed_by_type: Dict[str, FrozenSet[str]],
+        errors: List[ValidationError],
+    ) -> bool:
+        allowed_props = allowed_by_type.get(node.get("type"))
+        if allowed_props is None:
+            errors.append(ValidationError("E_UNKNOWN_COMPONENT", _node_path(path, "type"), "Unknown component"))
+            return False
+        props = node.get("props", {})
+        if isinstance(props, dict):
+            for key in props:
+                if key not in allowed_props:
+                    errors.append(ValidationError("E_UNKNOWN_PROP", _node_path(path, "props", key), "Unknown prop"))
+        events = node.get("events", {})
+        if isinstance(events, dict):
+            for key in events:
+                if key not in _EVENTS:
+                    errors.append(ValidationError("E_UNKNOWN_EVENT", _node_path(path, "events", key), "Unknown event"))
+        return True
+
+    def node_errors(self, node: Dict[str, Any], path: _NodePath, strict: bool = False) -> List[ValidationError]:
+        """Whitelist errors for one node, ignoring its children."""
+        errors: List[ValidationError] = []
+        self._check_node(node, path, self._strict_props if strict else self._props, errors)
+        return errors
+
+    def validate(self, ir: Dict[str, Any], strict: bool = False) -> Dict[str, Any]:
+        errors: List[ValidationError] = []
+        # The generic engine only runs to describe failures the fast path found.
+        if not self.fast_schema or not is_valid_ir_structure(ir):
+            for error in _schema_validator().iter_errors(ir):
+                errors.append(ValidationError("E_SCHEMA", _json_path(list(error.path)), error.message))
+            if errors:
+                return build_report(errors, schema_pass=False)
+
+        allowed_by_type = self._strict_props if strict else self._props
+        variables = ir.get("variables", [])
+        variable_names = _extract_variable_names(variables if isinstance(variables, list) else [])
+        binding_errors: List[ValidationError] = []
+        # Whitelist checks stop below an unknown component; binding checks do not.
+        stack: List[Tuple[Dict[str, Any], _NodePath, bool]] = [(ir.get("tree", {}), None, True)]
+        while stack:
+            node, path, check_whitelist = stack.pop()
+            props = node.get("props", {})
+            if check_whitelist:
+                check_whitelist = self._check_node(node, path, allowed_by_type, errors)
+            if isinstance(props, dict):
+                for key, value in props.items():
+                    if key in _BINDING_KEYS and isinstance(value, str):
+                        name = _normalize_binding(value)
+                        if name not in variable_names:
+                            binding_errors.append(
+                                ValidationError(
+                                    "E_UNKNOWN_BINDING_VAR",
+                                    _node_path(path, "props", key),
+                                    f"Unknown binding var {name}",
+                                )
+                            )
+            children = node.get("children", []) or []
+            for idx in range(len(children) - 1, -1, -1):
+                stack.append((children[idx], (path, idx), check_whitelist))
+        errors.extend(binding_errors)
 
-    schema_validator = Draft7Validator(IR_SCHEMA)
-    for error in schema_validator.iter_errors(ir):
-        errors.append(ValidationError("E_SCHEMA", _json_path(list(error.path)), error.message))
+        theme = ir.get("theme")
+        if not isinstance(theme, dict):
+            errors.append(ValidationError("E_INVALID_THEME", "$.theme", "Theme must be object"))
 
-    if errors:
-        return _build_report(errors, schema_pass=False)
+        return build_report(errors, schema_pass=True)
 
-    _validate_node(ir.get("tree", {}), whitelist, strict, errors, ["tree"])
 
-    variables = ir.get("variables", [])
-    variable_names = _extract_variable_names(variables if isinstance(variables, list) else [])
-    binding_errors: List[ValidationError] = []
+_COMPILED_LOCK = threading.Lock()
+_COMPILED: "OrderedDict[int, IRValidator]" = OrderedDict()
+_COMPILED_MAX = 8
 
-    def walk_bindings(node: Dict[str, Any], path: List[Any]) -> None:
-        props = node.get("props", {})
-        if isinstance(props, dict):
-            for key, value in props.items():
-                if key in BINDING_KEYS and isinstance(value, str):
-                    name = _normalize_binding(value)
-                    if name not in variable_names:
-                        binding_errors.append(
-                            ValidationError(
-                                "E_UNKNOWN_BINDING_VAR",
-                                _json_path(path + ["props", key]),
-                                f"Unknown binding var {name}",
-                            )
-                        )
-        for idx, child in enumerate(node.get("children", []) or []):
-            walk_bindings(child, path + ["children", idx])
 
-    walk_bindings(ir.get("tree", {}), ["tree"])
-    errors.extend(binding_errors)
+def compile_validator(whitelist: LibraryWhitelist) -> IRValidator:
+    # Keyed by identity; the cached validator keeps its whitelist alive, so ids are not reused.
+    with _COMPILED_LOCK:
+        validator = _COMPILED.get(id(whitelist))
+        if validator is not None and validator.whitelist is whitelist:
+            _COMPILED.move_to_end(id(whitelist))
+            return validator
+        validator = IRValidator(whitelist)
+        _COMPILED[id(whitelist)] = validator
+        while len(_COMPILED) > _COMPILED_MAX:
+            _COMPILED.popitem(last=False)
+        return validator
 
-    theme = ir.get("theme")
-    if not isinstance(theme, dict):
-        errors.append(ValidationError("E_INVALID_THEME", "$.theme", "Theme must be object"))
 
-    return _build_report(errors, schema_pass=True)
+def validate_ir(
+    ir: Dict[str, Any],
+    whitelist: LibraryWhitelist,
+    strict: bool = False,
+) -> Dict[str, Any]:
+    return compile_validator(whitelist).validate(ir, strict=strict)
 
 
-def _build_report(errors: List[ValidationError], schema_pass: bool) -> Dict[str, Any]:
+def build_report(errors: List[ValidationError], schema_pass: bool) -> Dict[str, Any]:
     error_dicts = [error.__dict__ for error in errors]
     return {
         "SchemaPass": schema_pass,
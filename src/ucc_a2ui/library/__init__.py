@@ -1,5 +1,6 @@
 from .export import export_library
 from .json_loader import load_component_schema_json
+from .snapshot import load_whitelist
 from .theme import merge_theme_tokens
 from .whitelist import EVENT_WHITELIST, LibraryWhitelist, build_whitelist
 
@@ -10,4 +11,5 @@ __all__ = [
     "EVENT_WHITELIST",
     "LibraryWhitelist",
     "build_whitelist",
+    "load_whitelist",
 ]
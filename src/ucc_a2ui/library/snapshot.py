@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+from .json_loader import JSONParamRecord, load_component_schema_json
+from .whitelist import ComponentWhitelist, LibraryWhitelist, build_whitelist
+
+SNAPSHOT_FORMAT = "ucc-whitelist-snapshot@v1"
+
+# Snapshot layout: one JSON header line describing the source it was compiled
+# from, then one compact JSON line holding the whitelist as positional lists,
+# so loading is a single json.loads plus dataclass construction.
+
+
+def _source_stamp(source_path: Path) -> Dict[str, Any]:
+    stat = source_path.stat()
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _encode(whitelist: LibraryWhitelist) -> Dict[str, Any]:
+    return {
+        "components": [
+            [
+                component.component_type,
+                component.name_cn,
+                component.name_en,
+                component.key_params,
+                [
+                    [
+                        param.name,
+                        param.category,
+                        param.value_type,
+                        param.enum_values,
+                        param.description,
+                        param.default_value,
+                        param.required,
+                        param.notes,
+                    ]
+                    for param in component.strict_params
+                ],
+            ]
+            for component in whitelist.components.values()
+        ],
+        "theme_tokens": whitelist.theme_tokens,
+    }
+
+
+def _decode(body: Dict[str, Any]) -> LibraryWhitelist:
+    components: Dict[str, ComponentWhitelist] = {}
+    for component_type, name_cn, name_en, key_params, params in body["components"]:
+        components[component_type] = ComponentWhitelist(
+            component_type=component_type,
+            name_cn=name_cn,
+            name_en=name_en,
+            key_params=key_params,
+            strict_params=[JSONParamRecord(*param) for param in params],
+        )
+    return LibraryWhitelist(components=components, theme_tokens=body["theme_tokens"])
+
+
+def _snapshot_header(source_path: Path) -> Dict[str, Any]:
+    header = {"format": SNAPSHOT_FORMAT, "source": str(source_path)}
+    header.update(_source_stamp(source_path))
+    header["sha256"] = _sha256(source_path)
+    return header
+
+
+def write_whitelist_snapshot(
+    path: str | Path,
+    whitelist: LibraryWhitelist,
+    source_path: str | Path,
+    header: Dict[str, Any] | None = None,
+) -> None:
+    """Writes the snapshot atomically; ``header`` should be taken before the source was parsed."""
+    path = Path(path)
+    header = header or _snapshot_header(Path(source_path))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.tmp{os.getpid()}")
+    with tmp_path.open("w", encoding="utf-8") as handle:
+        handle.write(json.dumps(header) + "\n")
+        handle.write(json.dumps(_encode(whitelist), ensure_ascii=False, separators=(",", ":")) + "\n")
+    # Readers in other processes see either the old snapshot or the new one.
+    os.replace(tmp_path, path)
+
+
+def read_whitelist_snapshot(path: str | Path, source_path: str | Path) -> LibraryWhitelist | None:
+    """Returns the snapshot's whitelist, or None when it is missing, corrupt or stale."""
+    path = Path(path)
+    source_path = Path(source_path)
+    try:
+        with path.open("r", encoding="utf-8") as handle:
+            header = json.loads(handle.readline())
+            if header.get("format") != SNAPSHOT_FORMAT or header.get("source") != str(source_path):
+                return None
+            stamp = _source_stamp(source_path)
+            touched = stamp != {"mtime_ns": header.get("mtime_ns"), "size": header.get("size")}
+            # Touched but possibly unchanged (checkout, copy): the content hash decides.
+            if touched and header.get("sha256") != _sha256(source_path):
+                return None
+            whitelist = _decode(json.loads(handle.readline()))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if touched:
+        # Refresh the header so the next load is back to a single stat.
+        try:
+            write_whitelist_snapshot(path, whitelist, source_path)
+        except OSError:
+            pass
+    return whitelist
+
+
+def load_whitelist(
+    source_path: str | Path, snapshot_path: str | Path | None = None, refresh: bool = False
+) -> LibraryWhitelist:
+    """Loads the whitelist from its snapshot, recompiling it from the source JSON when stale."""
+    if snapshot_path and not refresh:
+        whitelist = read_whitelist_snapshot(snapshot_path, source_path)
+        if whitelist is not None:
+            return whitelist
+    # Stamp the source before parsing it, so an edit racing this load makes the snapshot stale.
+    header = _snapshot_header(Path(source_path)) if snapshot_path else None
+    components, _ = load_component_schema_json(source_path)
+    whitelist = build_whitelist(components)
+    if snapshot_path:
+        try:
+            write_whitelist_snapshot(snapshot_path, whitelist, source_path, header)
+        except OSError as exc:
+            print(f"[library] warning: could not write whitelist snapshot {snapshot_path}: {exc}")
+    return whitelist
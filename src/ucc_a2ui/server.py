@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+
+from .config import Config
+from .embed import build_embedder
+from .embed.index_faiss import FaissIndex, index_version, load_faiss_index
+from .embed.query_cache import build_query_cache, cache_metadata
+from .embed.search import SEARCH_MODES, search_loaded_index
+from .generator import generate_ui, validate_ir
+from .generator.context import build_component_retriever
+from .generator.generate import build_llm
+from .library.whitelist import LibraryWhitelist
+
+
+class ServiceError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+MAX_SEARCH_K = 1000
+MAX_BODY_BYTES = 4 * 1024 * 1024
+
+
+def _int_field(body: Dict[str, Any], name: str, default: int, minimum: int, maximum: int) -> int:
+    value = body.get(name, default)
+    # bool is an int subclass; "k": true is a client error, not 1.
+    if isinstance(value, bool) or not isinstance(value, int) or not minimum <= value <= maximum:
+        raise ServiceError(400, f"{name} must be an integer between {minimum} and {maximum}")
+    return value
+
+
+def _bool_field(body: Dict[str, Any], name: str, default: bool) -> bool:
+    value = body.get(name, default)
+    if not isinstance(value, bool):
+        raise ServiceError(400, f"{name} must be true or false")
+    return value
+
+
+def _file_stamp(path: str | Path) -> Tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ServiceState:
+    def __init__(self, config: Config, load_whitelist: Callable[[Config], LibraryWhitelist]) -> None:
+        self.config = config
+        self._load_whitelist = load_whitelist
+        self._lock = threading.Lock()
+        embed_config = config.get_resolved("embed", default={})
+        self.index_dir = Path(embed_config.get("index_dir", "index/ucc_docs"))
+        self.search_params = dict(embed_config.get("index_params") or {})
+        self.search_mode = str(embed_config.get("search_mode", "vector"))
+        self.embedder, self.result_cache = build_query_cache(embed_config, build_embedder(embed_config))
+        self.strict = bool(config.get("library", "strict_params", default=False))
+        self.max_body_bytes = int(config.get("server", "max_body_bytes", default=MAX_BODY_BYTES))
+        self.whitelist: LibraryWhitelist | None = None
+        self.llm = None
+        self.faiss_index: FaissIndex | None = None
+        self._library_stamp: Tuple[int, int] | None = None
+        self._index_version: str | None = None
+        # Prompt context comes from the index this service already keeps loaded.
+        self.retriever = build_component_retriever(
+            config, embedder=self.embedder, load_index=lambda: self.faiss_index, result_cache=self.result_cache
+        )
+        self.refresh()
+
+    def refresh(self) -> None:
+        library_stamp = _file_stamp(self.config.get("library", "component_path", default=""))
+        version = index_version(self.index_dir)
+        if library_stamp == self._library_stamp and version == self._index_version and self.whitelist is not None:
+            return
+        with self._lock:
+            if self.whitelist is None or library_stamp != self._library_stamp:
+                whitelist = self._load_whitelist(self.config)
+                self.llm = build_llm(self.config.get_resolved("llm", default={}), whitelist)
+                self.whitelist = whitelist
+                self._library_stamp = library_stamp
+                print(f"[serve] whitelist loaded components={len(whitelist.components)}")
+            if version != self._index_version:
+                # In-flight requests keep the FaissIndex they started with; its vectors are
+                # in memory and its chunk store stays mapped even once gc_versions drops it.
+                self.faiss_index = load_faiss_index(self.index_dir, self.search_params) if version else None
+                self._index_version = version
+                if self.faiss_index is not None:
+                    print(f"[serve] index loaded vectors={self.faiss_index.index.ntotal}")
+
+    def search(self, body: Dict[str, Any]) -> Any:
+        query = body.get("query")
+        if not isinstance(query, str) or not query:
+            raise ServiceError(400, "query is required")
+        top_k = _int_field(body, "k", 5, 1, MAX_SEARCH_K)
+        self.refresh()
+        faiss_index = self.faiss_index
+        if faiss_index is None:
+            raise ServiceError(503, f"index not found in {self.index_dir}; run sync first")
+        mode = body.get("mode", self.search_mode)
+        if mode not in SEARCH_MODES:
+            raise ServiceError(400, f"mode must be one of {', '.join(SEARCH_MODES)}")
+        if mode != "vector" and faiss_index.lexical is None:
+            raise ServiceError(503, f"index in {self.index_dir} has no lexical index; run sync first")
+        results = search_loaded_index(
+            faiss_index, query, self.embedder, top_k=top_k, result_cache=self.result_cache, mode=mode
+        )
+        return {
+            "query": query,
+            "results": [result.__dict__ for result in results],
+            "meta": cache_metadata(self.embedder, self.result_cache),
+        }
+
+    def validate(self, body: Dict[str, Any]) -> Any:
+        ir = body.get("ir")
+        if not isinstance(ir, dict):
+            raise ServiceError(400, "ir must be an object")
+        self.refresh()
+        return validate_ir(ir, self.whitelist, strict=self.strict)
+
+    def _out_dir(self, out: Any) -> Path | None:
+        # Requests are unauthenticated: they may only pick a subdirectory of output.dir.
+        if out is None:
+            return None
+        if not isinstance(out, str) or not out:
+            raise ServiceError(400, "out must be a non-empty string")
+        root = Path(self.config.get("output", "dir", default="out")).resolve()
+        path = (root / out).resolve()
+        if path != root and root not in path.parents:
+            raise ServiceError(400, "out must be a path under the configured output dir")
+        return path
+
+    def generate(self, body: Dict[str, Any]) -> Any:
+        prompt = body.get("prompt")
+        if not isinstance(prompt, str) or not prompt:
+            raise ServiceError(400, "prompt is required")
+        out_dir = self._out_dir(body.get("out"))
+        save_plan = _bool_field(body, "save_plan", False)
+        use_cache = _bool_field(body, "cache", True)
+        self.refresh()
+        ir, report = generate_ui(
+            prompt,
+            config=self.config,
+            whitelist=self.whitelist,
+            out_dir=out_dir,
+            save_plan=save_plan,
+            llm=self.llm,
+            retriever=self.retriever,
+            use_cache=use_cache,
+        )
+        return {"ir": ir, "report": report}
+
+
+def _make_handler(state: ServiceState) -> type[BaseHTTPRequestHandler]:
+    routes = {
+        "/search": state.search,
+        "/validate": state.validate,
+        "/generate": state.generate,
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, status: int, payload: Any) -> None:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_body(self) -> bytes:
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+            except ValueError:
+                length = -1
+            if not 0 <= length <= state.max_body_bytes:
+                # The unread body would be parsed as the next request on this connection.
+                self.close_connection = True
+                if length < 0:
+                    raise ServiceError(400, "invalid Content-Length")
+                raise ServiceError(413, f"request body exceeds {state.max_body_bytes} bytes")
+            return self.rfile.read(length)
+
+        def do_GET(self) -> None:
+            if self.path != "/health":
+                self._send_json(404, {"error": f"unknown path {self.path}"})
+                return
+            self._send_json(200, {"status": "ok", "index_loaded": state.faiss_index is not None})
+
+        def do_POST(self) -> None:
+            route = routes.get(self.path)
+            if route is None:
+                self._send_json(404, {"error": f"unknown path {self.path}"})
+                return
+            try:
+                body = json.loads(self._read_body() or b"{}")
+                if not isinstance(body, dict):
+                    raise ServiceError(400, "request body must be a JSON object")
+                self._send_json(200, route(body))
+            except (json.JSONDecodeError, UnicodeDecodeError) as exc:
+                self._send_json(400, {"error": f"invalid JSON: {exc}"})
+            except ServiceError as exc:
+                self._send_json(exc.status, {"error": str(exc)})
+            except Exception as exc:  # pragma: no cover - surfaced to the client
+                self._send_json(500, {"error": str(exc)})
+
+        def log_message(self, format: str, *args: Any) -> None:
+            print(f"[serve] {self.address_string()} {format % args}")
+
+    return Handler
+
+
+def build_server(state: ServiceState, host: str, port: int) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), _make_handler(state))
+    server.daemon_threads = True
+    return server
+
+
+def serve(
+    config: Config,
+    load_whitelist: Callable[[Config], LibraryWhitelist],
+    host: str,
+    port: int,
+) -> int:
+    state = ServiceState(config, load_whitelist)
+    server = build_server(state, host, port)
+    print(f"[serve] listening on http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("[serve] shutting down")
+    finally:
+        server.server_close()
+    return 0
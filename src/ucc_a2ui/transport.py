@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import email.utils
+import gzip
+import json
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+_SESSIONS: Dict[Tuple[str, int], requests.Session] = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+def get_session(url: str, pool_size: int = 10) -> requests.Session:
+    parts = urlsplit(url)
+    key = (f"{parts.scheme}://{parts.netloc}", pool_size)
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount(key[0], adapter)
+            _SESSIONS[key] = session
+        return session
+
+
+def _retry_after_s(response: requests.Response) -> float | None:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class HTTPTransport:
+    def __init__(
+        self,
+        retries: int = 2,
+        backoff_s: float = 0.5,
+        max_backoff_s: float = 30.0,
+        pool_size: int = 10,
+        gzip_requests: bool = False,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.retries = max(0, int(retries))
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.pool_size = max(1, int(pool_size))
+        self.gzip_requests = gzip_requests
+        self.sleep = sleep
+
+    def _delay_s(self, attempt: int, response: requests.Response | None) -> float:
+        if response is not None:
+            retry_after = _retry_after_s(response)
+            if retry_after is not None:
+                return min(retry_after, self.max_backoff_s)
+        # Full jitter keeps concurrent workers from retrying in lockstep.
+        return random.uniform(0, min(self.max_backoff_s, self.backoff_s * (2**attempt)))
+
+    def _send(
+        self, url: str, payload: Any, headers: Dict[str, str], timeout_s: float, stream: bool
+    ) -> requests.Response:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        headers = dict(headers)
+        headers.setdefault("Content-Type", "application/json")
+        if self.gzip_requests:
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        session = get_session(url, self.pool_size)
+        attempt = 0
+        while True:
+            response = None
+            try:
+                response = session.post(url, data=body, headers=headers, timeout=timeout_s, stream=stream)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    if response.status_code >= 400:
+                        response.close()
+                    response.raise_for_status()
+                    return response
+                response.close()
+            self.sleep(self._delay_s(attempt, response))
+            attempt += 1
+
+    def post_json(self, url: str, payload: Any, headers: Dict[str, str], timeout_s: float) -> Any:
+        return self._send(url, payload, headers, timeout_s, stream=False).json()
+
+    def post_stream(self, url: str, payload: Any, headers: Dict[str, str], timeout_s: float) -> Iterator[str]:
+        """Yields response lines; retries only happen before the first line is read.
+
+        Closing the generator closes the connection, which cancels the request.
+        """
+        response = self._send(url, payload, headers, timeout_s, stream=True)
+        try:
+            for line in response.iter_lines():
+                # SSE bodies are UTF-8; requests would guess latin-1 without a charset.
+                yield line.decode("utf-8")
+        finally:
+            response.close()
+
+
+def iter_sse_data(lines: Iterable[str]) -> Iterator[str]:
+    for line in lines:
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        if data:
+            yield data
+
+
+def build_transport(config: Dict[str, Any], pool_size: int | None = None) -> HTTPTransport:
+    return HTTPTransport(
+        retries=int(config.get("retries", 2)),
+        backoff_s=float(config.get("backoff_s", 0.5)),
+        max_backoff_s=float(config.get("max_backoff_s", 30.0)),
+        pool_size=int(config.get("pool_size", pool_size or 10)),
+        gzip_requests=bool(config.get("gzip_requests", False)),
+    )
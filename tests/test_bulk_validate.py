@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from ucc_a2ui import cli
+from ucc_a2ui.config import Config
+from ucc_a2ui.generator.bulk_validate import PassRateCounter, iter_ir_items, validate_many
+
+
+def _ir(component_type: str) -> dict:
+    return {
+        "version": "ucc-ui-ir@v0",
+        "theme": {},
+        "variables": [],
+        "tree": {"type": component_type, "props": {}, "events": {}, "children": []},
+    }
+
+
+@pytest.fixture()
+def config(tmp_path: Path) -> Config:
+    schema = {
+        "components": [
+            {"type": "button", "group": "基础组件", "component_name": "Button", "props_by_category": {}}
+        ]
+    }
+    (tmp_path / "schema.json").write_text(json.dumps(schema), encoding="utf-8")
+    library = {"component_path": str(tmp_path / "schema.json"), "snapshot_path": str(tmp_path / "whitelist.snapshot")}
+    return Config({"library": library})
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_validate_many_over_jsonl(tmp_path: Path, config: Config, workers: int) -> None:
+    lines = [json.dumps({"id": f"item-{idx}", "ir": _ir("button" if idx % 3 else "ghost")}) for idx in range(10)]
+    lines.insert(4, "{broken")
+    (tmp_path / "irs.jsonl").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    counter = PassRateCounter()
+    results = list(
+        validate_many(iter_ir_items(str(tmp_path / "irs.jsonl")), config, cli._load_whitelist, workers=workers, chunk_size=3)
+    )
+    for result in results:
+        counter.add(result)
+    assert [result["id"] for result in results][:6] == ["item-0", "item-1", "item-2", "item-3", f"{tmp_path / 'irs.jsonl'}:5", "item-4"]
+    summary = counter.summary()
+    assert (summary["total"], summary["passed"], summary["invalid"]) == (11, 6, 1)
+    assert summary["flags"]["SchemaPass"]["pass"] == 10
+    assert summary["flags"]["ComponentWhitelistPass"] == {"pass": 6, "rate": round(6 / 11, 4)}
+
+
+def test_validate_cli_over_directory(tmp_path: Path, config: Config, capsys) -> None:
+    ir_dir = tmp_path / "irs"
+    (ir_dir / "nested").mkdir(parents=True)
+    (ir_dir / "a.json").write_text(json.dumps(_ir("button")), encoding="utf-8")
+    (ir_dir / "nested" / "b.json").write_text(json.dumps(_ir("button")), encoding="utf-8")
+    args = cli.argparse.Namespace(input=str(ir_dir), out=None, workers=1)
+    assert cli._run_validate(args, config) == 0
+    captured = capsys.readouterr()
+    reports = [json.loads(line) for line in captured.out.splitlines()]
+    assert [Path(report["id"]).name for report in reports] == ["a.json", "b.json"]
+    assert json.loads(captured.err)["pass_rate"] == 1.0
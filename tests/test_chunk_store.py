@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from ucc_a2ui.embed.chunk_store import (
+    CHUNKS_FILE,
+    ChunkStore,
+    ChunkStoreWriter,
+    IndexedChunk,
+    count_chunks,
+    migrate_jsonl_store,
+    open_chunk_store,
+    write_chunk_store,
+)
+
+
+def _chunks() -> list[IndexedChunk]:
+    chunks = []
+    for idx in range(150):
+        source = f"docs/components/c{idx % 7}.md"
+        text = f"组件 {idx} `textBinding`\n" * (idx % 5 + 1)
+        chunks.append(
+            IndexedChunk(
+                text=text,
+                source=source,
+                doc_hash=hashlib.sha256(source.encode("utf-8")).hexdigest(),
+                chunk_hash=hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            )
+        )
+    chunks.append(IndexedChunk(text="", source="bare.md"))
+    return chunks
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_chunk_store_roundtrip(tmp_path: Path, compress: bool) -> None:
+    chunks = _chunks()
+    path = write_chunk_store(tmp_path / CHUNKS_FILE, chunks, compress=compress)
+
+    store = ChunkStore(path)
+    assert len(store) == len(chunks) == count_chunks(path)
+    assert store.compressed is compress
+    assert len(store.sources) == 8
+    assert store.get_many([149, 0, 70, 150]) == [chunks[149], chunks[0], chunks[70], chunks[150]]
+    assert list(store.iter_chunks(batch_size=32)) == chunks
+    assert store.doc_hashes()["bare.md"] is None
+    store.close()
+
+
+def test_migrate_jsonl_store(tmp_path: Path) -> None:
+    chunks = _chunks()[:10]
+    offsets = []
+    with (tmp_path / "chunks.jsonl").open("wb") as handle:
+        for chunk in chunks:
+            offsets.append(handle.tell())
+            handle.write((json.dumps(chunk.__dict__, ensure_ascii=False) + "\n").encode("utf-8"))
+    np.save(tmp_path / "chunks.offsets.npy", np.asarray(offsets, dtype=np.int64))
+
+    assert migrate_jsonl_store(tmp_path) == 10
+    assert not (tmp_path / "chunks.jsonl").exists()
+    store = open_chunk_store(tmp_path)
+    assert isinstance(store, ChunkStore)
+    assert list(store.iter_chunks()) == chunks
+
+
+def test_chunk_store_tombstones(tmp_path: Path) -> None:
+    chunks = _chunks()[:20]
+    store = ChunkStore(write_chunk_store(tmp_path / "old.bin", chunks))
+    stale = store.rows_for_sources(["docs/components/c1.md"])
+    assert stale.tolist() == [1, 8, 15]
+
+    writer = ChunkStoreWriter(tmp_path / CHUNKS_FILE)
+    writer.add_store(store, delete_rows=stale)
+    updated = ChunkStore(writer.close())
+    assert len(updated) == 20
+    assert updated.live_count == 17
+    assert updated.get(8).text == ""
+    assert updated.get(9) == chunks[9]
+    assert "docs/components/c1.md" not in updated.doc_hashes()
+    assert updated.rows_for_sources(["docs/components/c1.md"]).size == 0
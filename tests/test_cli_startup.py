@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import pytest
+
+from ucc_a2ui.embed import MockEmbedder
+from ucc_a2ui.embed.index_faiss import IndexedChunk, build_faiss_index, save_faiss_index
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+# Milliseconds of import time spent after interpreter startup; scale with UCC_IMPORT_BUDGET_SCALE on slow runners.
+BUDGET_SCALE = float(os.environ.get("UCC_IMPORT_BUDGET_SCALE", "1"))
+HEAVY = ("faiss", "numpy", "requests", "jsonschema")
+
+
+def _ir() -> dict:
+    return {
+        "version": "ucc-ui-ir@v0",
+        "theme": {},
+        "variables": [],
+        "tree": {"type": "button", "props": {}, "events": {}, "children": []},
+    }
+
+
+@pytest.fixture()
+def workdir(tmp_path: Path) -> Path:
+    schema = {
+        "components": [
+            {"type": "button", "group": "基础组件", "component_name": "Button", "props_by_category": {}}
+        ]
+    }
+    (tmp_path / "schema.json").write_text(json.dumps(schema), encoding="utf-8")
+    (tmp_path / "ir.json").write_text(json.dumps(_ir()), encoding="utf-8")
+    embedder = MockEmbedder()
+    chunks = [IndexedChunk(text="button 文档", source="docs/components/button.md")]
+    save_faiss_index(tmp_path / "index", build_faiss_index(embedder.embed([chunks[0].text]).vectors, chunks))
+    config = {
+        "library": {"component_path": "schema.json", "snapshot_path": "whitelist.snapshot"},
+        "embed": {"index_dir": "index"},
+        "output": {"dir": "out"},
+    }
+    # YAML is a superset of JSON.
+    (tmp_path / "config.yaml").write_text(json.dumps(config), encoding="utf-8")
+    return tmp_path
+
+
+def _run_with_importtime(workdir: Path, *args: str) -> Tuple[Dict[str, float], float]:
+    """Runs the CLI under ``-X importtime``; returns per-module cumulative ms and the post-startup total."""
+    script = "import sys\nfrom ucc_a2ui import cli\nsys.argv = ['ucc-a2ui', *sys.argv[1:]]\nsys.exit(cli.main())"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(SRC_DIR), os.environ.get("PYTHONPATH", "")]))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script, *args, "--config", "config.yaml"],
+        cwd=workdir,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    modules: Dict[str, float] = {}
+    top_level: List[Tuple[str, float]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        modules[name.strip()] = int(cumulative) / 1000
+        if not name.startswith("  "):
+            top_level.append((name.strip(), int(cumulative) / 1000))
+    # Everything up to ``site`` is interpreter startup (and whatever .pth hooks the environment has).
+    names = [name for name, _ in top_level]
+    after_site = names.index("site") + 1 if "site" in names else 0
+    return modules, sum(ms for _, ms in top_level[after_site:])
+
+
+def test_validate_skips_heavy_imports(workdir: Path) -> None:
+    _run_with_importtime(workdir, "validate", "--in", "ir.json")  # writes the whitelist snapshot
+    modules, total_ms = _run_with_importtime(workdir, "validate", "--in", "ir.json")
+    assert "ucc_a2ui.cli" in modules
+    loaded = [name for name in modules if name.split(".")[0] in HEAVY]
+    assert loaded == []
+    assert "ucc_a2ui.embed" not in modules
+    assert "ucc_a2ui.generator.generate" not in modules
+    assert total_ms < 150 * BUDGET_SCALE, f"validate imports took {total_ms:.0f} ms"
+
+
+def test_search_skips_llm_stack(workdir: Path) -> None:
+    modules, total_ms = _run_with_importtime(workdir, "search", "--query", "button")
+    assert "faiss" in modules
+    assert "ucc_a2ui.generator.generate" not in modules
+    assert "jsonschema" not in modules
+    assert not any(name.startswith("ucc_a2ui.generator.llm_") for name in modules)
+    assert total_ms < 800 * BUDGET_SCALE, f"search imports took {total_ms:.0f} ms"
+
+
+def test_generate_skips_bulk_validation(workdir: Path) -> None:
+    # Retrieval context (the default) needs the index, so faiss is expected here.
+    modules, total_ms = _run_with_importtime(workdir, "generate", "--prompt", "一个按钮")
+    assert "ucc_a2ui.generator.generate" in modules
+    assert "ucc_a2ui.generator.bulk_validate" not in modules
+    assert total_ms < 800 * BUDGET_SCALE, f"generate imports took {total_ms:.0f} ms"
+
+
+def test_generate_whitelist_context_skips_index_stack(workdir: Path) -> None:
+    config = json.loads((workdir / "config.yaml").read_text(encoding="utf-8"))
+    config["generator"] = {"context_mode": "whitelist"}
+    (workdir / "config.yaml").write_text(json.dumps(config), encoding="utf-8")
+    modules, _ = _run_with_importtime(workdir, "generate", "--prompt", "一个按钮")
+    assert "ucc_a2ui.generator.generate" in modules
+    assert "faiss" not in modules
+    assert not any(name.startswith("ucc_a2ui.embed") for name in modules)
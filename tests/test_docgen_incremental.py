@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+from ucc_a2ui.docs import generate_docs
+from ucc_a2ui.library import build_whitelist
+from ucc_a2ui.library.json_loader import JSONComponentRecord, JSONParamRecord
+
+
+def _whitelist(names: dict[str, str]):
+    components = [
+        JSONComponentRecord(
+            component_type,
+            "基础组件",
+            name,
+            {"Data": [JSONParamRecord("text", "Data", "string", [], "", None, False, "")]},
+        )
+        for component_type, name in names.items()
+    ]
+    return build_whitelist(components)
+
+
+def test_docgen_rewrites_only_changed_docs(tmp_path: Path) -> None:
+    names = {f"comp_{idx}": f"Comp{idx}" for idx in range(4)}
+    first = generate_docs(tmp_path, _whitelist(names))
+    assert len(first.changed) == 4 and first.unchanged == [] and first.removed == []
+    for source, doc_hash in first.doc_hashes.items():
+        assert hashlib.sha256(Path(source).read_text(encoding="utf-8").encode("utf-8")).hexdigest() == doc_hash
+    mtimes = {path: path.stat().st_mtime_ns for path in first.paths}
+
+    second = generate_docs(tmp_path, _whitelist(names))
+    assert second.changed == [] and len(second.unchanged) == 4
+    assert second.doc_hashes == first.doc_hashes
+    assert {path: path.stat().st_mtime_ns for path in second.paths} == mtimes
+
+    names["comp_1"] = "Renamed"
+    del names["comp_3"]
+    third = generate_docs(tmp_path, _whitelist(names))
+    assert third.changed == [tmp_path / "comp_1.md"]
+    assert third.removed == [tmp_path / "comp_3.md"]
+    assert not (tmp_path / "comp_3.md").exists()
+    assert "Renamed" in (tmp_path / "comp_1.md").read_text(encoding="utf-8")
+    assert [path.name for path in third.paths] == ["comp_0.md", "comp_1.md", "comp_2.md"]
+
+
+def test_docgen_restores_edited_doc(tmp_path: Path) -> None:
+    whitelist = _whitelist({"label": "Label"})
+    first = generate_docs(tmp_path, whitelist)
+    doc = tmp_path / "label.md"
+    doc.write_text("hand edited\n", encoding="utf-8")
+    second = generate_docs(tmp_path, whitelist)
+    assert second.changed == [doc]
+    assert second.doc_hashes == first.doc_hashes
+
+
+def test_docgen_without_manifest_removes_unknown_docs(tmp_path: Path) -> None:
+    generate_docs(tmp_path, _whitelist({"label": "Label", "button": "Button"}))
+    (tmp_path / ".docgen_manifest.json").unlink()
+    result = generate_docs(tmp_path, _whitelist({"label": "Label"}))
+    assert result.removed == [tmp_path / "button.md"]
+    assert result.unchanged == [tmp_path / "label.md"]
+    assert [path.name for path in tmp_path.glob("*.md")] == ["label.md"]
+
+
+def test_docgen_process_pool_matches_serial(tmp_path: Path) -> None:
+    whitelist = _whitelist({f"comp_{idx}": f"Comp{idx}" for idx in range(6)})
+    serial = generate_docs(tmp_path / "serial", whitelist)
+    pooled = generate_docs(tmp_path / "pooled", whitelist, workers=2)
+    assert [path.name for path in pooled.paths] == [path.name for path in serial.paths]
+    assert sorted(pooled.doc_hashes.values()) == sorted(serial.doc_hashes.values())
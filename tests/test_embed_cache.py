@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+import numpy as np
+
+from ucc_a2ui.embed.embed_cache import EmbeddingCache
+from ucc_a2ui.embed.embedder_mock import MockEmbedder
+
+
+class CountingEmbedder(MockEmbedder):
+    def __init__(self, dim: int = 8) -> None:
+        super().__init__(dim=dim)
+        self.texts: list[str] = []
+
+    def embed(self, texts):
+        self.texts.extend(texts)
+        return super().embed(texts)
+
+
+def _hashes(texts: list[str]) -> list[str]:
+    return [hashlib.sha256(text.encode("utf-8")).hexdigest() for text in texts]
+
+
+def test_cache_hits_persist_across_reopen(tmp_path: Path) -> None:
+    embedder = CountingEmbedder()
+    texts = ["alpha", "beta", "gamma"]
+    cache = EmbeddingCache(tmp_path, "mock", "m")
+    first = cache.embed(embedder, texts, _hashes(texts))
+    cache.flush()
+    assert (cache.hits, cache.misses) == (0, 3)
+
+    embedder.texts.clear()
+    reopened = EmbeddingCache(tmp_path, "mock", "m")
+    mixed = ["gamma", "delta", "alpha"]
+    vectors = reopened.embed(embedder, mixed, _hashes(mixed))
+    assert embedder.texts == ["delta"]
+    assert (reopened.hits, reopened.misses) == (2, 1)
+    np.testing.assert_array_equal(vectors[0], first[2])
+    np.testing.assert_array_equal(vectors[2], first[0])
+    np.testing.assert_allclose(vectors[1], np.asarray(embedder.embed(["delta"]).vectors[0], dtype="float32"))
+
+
+def test_cache_is_namespaced_by_model(tmp_path: Path) -> None:
+    embedder = CountingEmbedder()
+    EmbeddingCache(tmp_path, "mock", "a").embed(embedder, ["x"], _hashes(["x"]))
+    other = EmbeddingCache(tmp_path, "mock", "b")
+    other.embed(embedder, ["x"], _hashes(["x"]))
+    assert other.misses == 1
+
+
+def test_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    embedder = CountingEmbedder()
+    cache = EmbeddingCache(tmp_path, "mock", "m", max_entries=3)
+    for text in ["a", "b", "c"]:
+        cache.embed(embedder, [text], _hashes([text]))
+    cache.embed(embedder, ["a"], _hashes(["a"]))
+    cache.embed(embedder, ["d"], _hashes(["d"]))
+    assert len(cache) == 3
+
+    embedder.texts.clear()
+    cache.embed(embedder, ["a", "c", "d"], _hashes(["a", "c", "d"]))
+    assert embedder.texts == []
+    cache.embed(embedder, ["b"], _hashes(["b"]))
+    assert embedder.texts == ["b"]
+
+
+def test_cache_resets_when_dimension_changes(tmp_path: Path) -> None:
+    EmbeddingCache(tmp_path, "mock", "m").embed(CountingEmbedder(dim=8), ["x"], _hashes(["x"]))
+    cache = EmbeddingCache(tmp_path, "mock", "m")
+    vectors = cache.embed(CountingEmbedder(dim=4), ["y", "x"], _hashes(["y", "x"]))
+    assert vectors.shape == (2, 4)
+    assert cache.dim == 4
+    assert cache.misses == 2
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import hashlib
+import random
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from ucc_a2ui.embed.embed_cache import EmbeddingCache
+from ucc_a2ui.embed.embedder_mock import MockEmbedder
+from ucc_a2ui.embed.executor import EmbeddingExecutor
+from ucc_a2ui.embed.index_faiss import IndexedChunk
+
+
+class SlowEmbedder(MockEmbedder):
+    def __init__(self) -> None:
+        super().__init__(dim=8)
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def embed(self, texts):
+        with self._lock:
+            self.active += 1
+            self.calls += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(random.uniform(0.005, 0.03))
+        with self._lock:
+            self.active -= 1
+        return super().embed(texts)
+
+
+def _batches(count: int, size: int = 3) -> list[list[IndexedChunk]]:
+    batches = []
+    for batch_idx in range(count):
+        batch = []
+        for idx in range(size):
+            text = f"chunk {batch_idx}-{idx}"
+            batch.append(
+                IndexedChunk(text=text, source="a.md", chunk_hash=hashlib.sha256(text.encode("utf-8")).hexdigest())
+            )
+        batches.append(batch)
+    return batches
+
+
+def test_executor_keeps_order_with_requests_in_flight() -> None:
+    embedder = SlowEmbedder()
+    batches = _batches(12)
+    results = list(EmbeddingExecutor(embedder, max_in_flight=4).map(iter(batches)))
+    assert [batch for batch, _ in results] == batches
+    for batch, vectors in results:
+        expected = MockEmbedder(dim=8).embed([chunk.text for chunk in batch]).vectors
+        np.testing.assert_array_equal(vectors, expected)
+    assert 1 < embedder.peak <= 4
+
+
+def test_executor_only_sends_cache_misses(tmp_path: Path) -> None:
+    embedder = SlowEmbedder()
+    cache = EmbeddingCache(tmp_path, "mock", "m")
+    batches = _batches(6)
+    list(EmbeddingExecutor(embedder, max_in_flight=3, cache=cache).map(iter(batches[:3])))
+    embedder.calls = 0
+    results = list(EmbeddingExecutor(embedder, max_in_flight=3, cache=cache).map(iter(batches)))
+    assert embedder.calls == 3
+    assert (cache.hits, cache.misses) == (9, 18)
+    expected = MockEmbedder(dim=8).embed([chunk.text for chunk in batches[1]]).vectors
+    np.testing.assert_array_equal(results[1][1], expected)
+
+
+def _chunk(text: str) -> IndexedChunk:
+    return IndexedChunk(text=text, source="a.md", chunk_hash=hashlib.sha256(text.encode("utf-8")).hexdigest())
+
+
+def test_executor_sends_repeated_texts_once_across_in_flight_batches(tmp_path: Path) -> None:
+    class RecordingEmbedder(SlowEmbedder):
+        def __init__(self) -> None:
+            super().__init__()
+            self.texts: list[str] = []
+
+        def embed(self, texts):
+            with self._lock:
+                self.texts.extend(texts)
+            return super().embed(texts)
+
+    embedder = RecordingEmbedder()
+    cache = EmbeddingCache(tmp_path, "mock", "m")
+    # Boilerplate repeated in every batch (twice in the first), sent before any batch is collected.
+    batches = [[_chunk("footer"), _chunk(f"unique {idx}"), _chunk("footer")] for idx in range(8)]
+    results = list(EmbeddingExecutor(embedder, max_in_flight=4, cache=cache).map(iter(batches)))
+    assert sorted(embedder.texts) == sorted(["footer"] + [f"unique {idx}" for idx in range(8)])
+    for batch, vectors in results:
+        expected = MockEmbedder(dim=8).embed([chunk.text for chunk in batch]).vectors
+        np.testing.assert_array_equal(vectors, expected)
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+
+from ucc_a2ui.config import Config
+from ucc_a2ui.generator.batch import generate_batch, iter_prompts, load_completed_ids
+from ucc_a2ui.generator.llm_client_base import LLMResponse
+from ucc_a2ui.generator.llm_mock import MockLLM
+from ucc_a2ui.library import build_whitelist
+from ucc_a2ui.library.json_loader import JSONComponentRecord
+
+
+class FlakyLLM(MockLLM):
+    def __init__(self, whitelist) -> None:
+        super().__init__(whitelist)
+        self.calls: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def complete(self, messages):
+        prompt = messages[-1]["content"]
+        with self._lock:
+            self.calls[prompt] = self.calls.get(prompt, 0) + 1
+            calls = self.calls[prompt]
+        if "flaky" in prompt and calls == 1:
+            raise ConnectionError("reset by peer")
+        if "garbled" in prompt:
+            return LLMResponse(content="no json here")
+        return super().complete(messages)
+
+
+def _setup(tmp_path: Path):
+    whitelist = build_whitelist([JSONComponentRecord("label", "基础组件", "Label", {})])
+    prompts = ["页面 0", "flaky 页面", "garbled 页面"] + [f"页面 {idx}" for idx in range(3, 8)]
+    prompts_path = tmp_path / "prompts.jsonl"
+    prompts_path.write_text(
+        "".join(json.dumps({"id": f"p{idx}", "prompt": prompt}, ensure_ascii=False) + "\n" for idx, prompt in enumerate(prompts)),
+        encoding="utf-8",
+    )
+    return whitelist, prompts_path
+
+
+def test_generate_batch_records_and_retries(tmp_path: Path) -> None:
+    whitelist, prompts_path = _setup(tmp_path)
+    llm = FlakyLLM(whitelist)
+    sink = tmp_path / "out" / "results.jsonl"
+    stats = generate_batch(iter_prompts(prompts_path), Config({}), whitelist, llm, sink, workers=3, max_attempts=2)
+    assert (stats["written"], stats["passed"], stats["failed"], stats["skipped"]) == (8, 7, 1, 0)
+
+    records = {record["id"]: record for record in map(json.loads, sink.read_text(encoding="utf-8").splitlines())}
+    assert sorted(records) == [f"p{idx}" for idx in range(8)]
+    assert records["p1"]["attempts"] == 2 and "error" not in records["p1"]
+    assert records["p2"]["attempts"] == 2
+    assert records["p2"]["report"]["errors"][0]["code"] == "E_JSON_PARSE"
+    assert records["p0"]["ir"]["tree"]["type"] == "label"
+    assert records["p0"]["latency_ms"] >= 0
+
+
+def test_generate_batch_resumes_after_torn_write(tmp_path: Path) -> None:
+    whitelist, prompts_path = _setup(tmp_path)
+    sink = tmp_path / "results.jsonl"
+    first = [json.loads(line) for line in prompts_path.read_text(encoding="utf-8").splitlines()[:3]]
+    sink.write_text(
+        "".join(json.dumps({"id": record["id"], "latency_ms": 1}) + "\n" for record in first[:2]) + '{"id": "p2", "ir',
+        encoding="utf-8",
+    )
+    assert load_completed_ids(sink) == {"p0", "p1"}
+    assert sink.read_text(encoding="utf-8").endswith("}\n")
+
+    llm = FlakyLLM(whitelist)
+    stats = generate_batch(iter_prompts(prompts_path), Config({}), whitelist, llm, sink, workers=2)
+    assert (stats["skipped"], stats["written"]) == (2, 6)
+    assert not any("flaky" in prompt for prompt in llm.calls)
+    ids = [json.loads(line)["id"] for line in sink.read_text(encoding="utf-8").splitlines()]
+    assert sorted(ids) == [f"p{idx}" for idx in range(8)]
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from ucc_a2ui.config import Config
+from ucc_a2ui.embed import MockEmbedder
+from ucc_a2ui.embed.index_faiss import IndexedChunk, build_faiss_index, save_faiss_index
+from ucc_a2ui.generator import generate_ui
+from ucc_a2ui.generator.context import ComponentRetriever, build_component_retriever
+from ucc_a2ui.generator.llm_client_base import LLMClientBase, LLMResponse
+from ucc_a2ui.generator.prompt_builder import build_library_summary, estimate_tokens, select_components
+from ucc_a2ui.library import build_whitelist
+from ucc_a2ui.library.json_loader import JSONComponentRecord, JSONParamRecord
+
+TYPES = [f"widget{idx:02d}" for idx in range(30)]
+
+
+def _whitelist():
+    components = []
+    for component_type in TYPES:
+        params = [
+            JSONParamRecord(f"{component_type}_p{n}", "Data", "string", [], "", None, False, "") for n in range(3)
+        ]
+        components.append(JSONComponentRecord(component_type, "基础组件", component_type.title(), {"Data": params}))
+    return build_whitelist(components)
+
+
+def _write_index(index_dir: Path) -> None:
+    embedder = MockEmbedder()
+    chunks = [
+        IndexedChunk(text=f"{component_type} 文档 {part}", source=f"docs/components/{component_type}.md")
+        for component_type in TYPES
+        for part in range(2)
+    ]
+    vectors = embedder.embed([chunk.text for chunk in chunks]).vectors
+    save_faiss_index(index_dir, build_faiss_index(vectors, chunks))
+
+
+def test_select_components_packs_to_budget() -> None:
+    whitelist = _whitelist()
+    assert len(select_components(whitelist)) == 20
+    assert build_library_summary(whitelist) == build_library_summary(whitelist, components=select_components(whitelist))
+    packed = select_components(whitelist, token_budget=60)
+    summary = build_library_summary(whitelist, components=packed)
+    assert 0 < len(packed) < 20
+    assert estimate_tokens(summary) <= 60
+    # The first component is always kept, even when it alone exceeds the budget.
+    assert len(select_components(whitelist, token_budget=1)) == 1
+
+
+def test_estimate_tokens_counts_cjk_per_character() -> None:
+    assert estimate_tokens("组件白名单") == 5
+    assert estimate_tokens("abcdefgh") == 2
+
+
+def test_retriever_orders_components_by_doc_match(tmp_path: Path) -> None:
+    whitelist = _whitelist()
+    _write_index(tmp_path / "index")
+    config = Config({"embed": {"index_dir": str(tmp_path / "index")}, "generator": {"context_top_k": 3}})
+    retriever = build_component_retriever(config)
+    picked = retriever.retrieve("widget17 文档 1", whitelist)
+    assert [component.component_type for component in picked][:1] == ["widget17"]
+    assert len(picked) == 3
+    assert len({component.component_type for component in picked}) == 3
+
+
+def test_retriever_without_index_falls_back_to_whitelist(tmp_path: Path) -> None:
+    whitelist = _whitelist()
+    retriever = ComponentRetriever(lambda: None, MockEmbedder())
+    assert retriever.retrieve("任意", whitelist) is None
+    assert build_component_retriever(Config({"generator": {"context_mode": "whitelist"}})) is None
+    config = Config({"embed": {"index_dir": str(tmp_path / "missing")}})
+    _, report = generate_ui("页面", config, whitelist, out_dir=None)
+    assert report["usage"]["context"] == "whitelist"
+    assert report["usage"]["context_components"] == 20
+
+
+def test_generate_records_retrieval_usage(tmp_path: Path) -> None:
+    whitelist = _whitelist()
+    _write_index(tmp_path / "index")
+    config = Config({"embed": {"index_dir": str(tmp_path / "index")}, "generator": {"context_top_k": 4}})
+    messages = []
+
+    class RecordingLLM(LLMClientBase):
+        def complete(self, sent):
+            messages.extend(sent)
+            return LLMResponse(content='{"ir": {}}', prompt_tokens=321)
+
+    _, report = generate_ui("widget05 文档 0", config, whitelist, out_dir=None, llm=RecordingLLM())
+    context = messages[1]["content"]
+    assert "- widget05 (Widget05)" in context
+    assert context.count("\n- ") == 4
+    assert report["usage"]["context"] == "retrieval"
+    assert report["usage"]["context_components"] == 4
+    assert report["usage"]["prompt_tokens"] == 321
+    assert report["usage"]["prompt_tokens_est"] == sum(estimate_tokens(message["content"]) for message in messages)
+
+
+def test_empty_retrieval_falls_back_to_unbudgeted_whitelist(tmp_path: Path) -> None:
+    whitelist = _whitelist()
+    embedder = MockEmbedder()
+    chunks = [IndexedChunk(text=f"旧组件 {idx}", source=f"docs/components/removed{idx}.md") for idx in range(3)]
+    save_faiss_index(tmp_path / "index", build_faiss_index(embedder.embed([c.text for c in chunks]).vectors, chunks))
+    config = Config(
+        {"embed": {"index_dir": str(tmp_path / "index")}, "generator": {"context_token_budget": 60}}
+    )
+    assert build_component_retriever(config).retrieve("旧组件", whitelist) is None
+    _, report = generate_ui("旧组件", config, whitelist, out_dir=None)
+    assert report["usage"]["context"] == "whitelist"
+    assert report["usage"]["context_components"] == 20
+
+
+def test_retrieval_failure_falls_back_to_whitelist() -> None:
+    class BrokenRetriever(ComponentRetriever):
+        def __init__(self) -> None:
+            super().__init__(lambda: None, MockEmbedder())
+
+        def retrieve(self, prompt, whitelist):
+            raise ConnectionError("embedding service unreachable")
+
+    _, report = generate_ui("任意", Config({}), _whitelist(), out_dir=None, retriever=BrokenRetriever())
+    assert report["usage"]["context"] == "whitelist"
+    assert report["usage"]["context_components"] == 20
+    assert report["usage"]["context_error"] == "ConnectionError: embedding service unreachable"
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ucc_a2ui.config import Config
+from ucc_a2ui.generator import generate_ui
+from ucc_a2ui.generator.llm_client_base import LLMClientBase, LLMResponse
+from ucc_a2ui.generator.llm_dashscope_qwen import DashScopeQwenLLM
+from ucc_a2ui.generator.llm_openai_compat import OpenAICompatibleLLM
+from ucc_a2ui.library import build_whitelist
+from ucc_a2ui.library.json_loader import JSONComponentRecord
+
+PIECES = ["好的：```json\n{\"ir\": {\"version\": \"v\", ", "\"theme\": {}, \"variables\": [], ", "\"tree\": {\"type\": \"按钮\"}}}\n```"]
+
+
+@pytest.fixture()
+def sse_server():
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            self.send_response(200)
+            # No charset on purpose: the client must still decode UTF-8.
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for piece in PIECES:
+                if "stream" in body:
+                    event = {"choices": [{"delta": {"content": piece}}]}
+                else:
+                    assert self.headers["X-DashScope-SSE"] == "enable"
+                    assert body["parameters"]["incremental_output"] is True
+                    event = {"output": {"text": piece}}
+                self.wfile.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.write(b"data: [DONE]\n\n")
+
+        def log_message(self, format: str, *args) -> None:
+            return
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_openai_compatible_stream_decodes_sse(sse_server: str) -> None:
+    llm = OpenAICompatibleLLM(sse_server, "", "m", 0.2, 100, 5)
+    assert list(llm.complete_stream([{"role": "user", "content": "hi"}])) == PIECES
+
+
+def test_dashscope_stream_uses_incremental_output(sse_server: str) -> None:
+    llm = DashScopeQwenLLM("key", "m", 0.2, 100, 5)
+    llm.base_url = sse_server
+    assert "".join(llm.complete_stream([{"role": "user", "content": "hi"}])) == "".join(PIECES)
+
+
+class ScriptedLLM(LLMClientBase):
+    def __init__(self, content: str) -> None:
+        self.content = content
+        self.pulled = 0
+        self.closed = False
+
+    def complete(self, messages):
+        return LLMResponse(content=self.content)
+
+    def complete_stream(self, messages):
+        try:
+            for start in range(0, len(self.content), 8):
+                self.pulled += 1
+                yield self.content[start : start + 8]
+        finally:
+            self.closed = True
+
+
+def _whitelist():
+    return build_whitelist([JSONComponentRecord("label", "基础组件", "Label", {})])
+
+
+def _content(first_type: str, fenced: bool = True) -> str:
+    nodes = [{"type": "label", "props": {}, "events": {}, "children": []} for _ in range(40)]
+    tree = {"type": first_type, "props": {}, "events": {}, "children": nodes}
+    ir = {"version": "ucc-ui-ir@v0", "theme": {}, "variables": [], "tree": tree}
+    payload = json.dumps({"plan": {"widgets": [first_type]}, "ir": ir})
+    return "```json\n" + payload + "\n```" if fenced else payload
+
+
+def test_stream_aborts_on_unknown_component() -> None:
+    llm = ScriptedLLM(_content("ghost"))
+    config = Config({"llm": {"stream": True}})
+    ir, report = generate_ui("页面", config, _whitelist(), out_dir=None, llm=llm)
+    assert ir == {}
+    assert [error["code"] for error in report["errors"]] == ["E_UNKNOWN_COMPONENT", "E_STREAM_ABORTED"]
+    assert report["errors"][0]["path"] == "$.tree.type"
+    assert not report["ComponentWhitelistPass"]
+    assert llm.closed
+    assert llm.pulled < len(llm.content) // 8 // 4
+
+
+@pytest.mark.parametrize(
+    ("preamble", "fenced"),
+    [
+        ("请填写{标题}和{内容}，格式如下：\n", True),
+        ("请填写{标题}和{内容}，格式如下：\n", False),
+        ('示例：{"name": "x"}，按 "{字段}" 填写：\n', True),
+        ('示例：{"name": "x"}，按 "{字段}" 填写：\n', False),
+        # An unbalanced quote swallows what follows; only a fence recovers from it.
+        ('注意 {"未闭合 的引号}\n', True),
+    ],
+)
+def test_stream_skips_braces_in_prose_preamble(preamble: str, fenced: bool) -> None:
+    llm = ScriptedLLM(preamble + _content("ghost", fenced=fenced))
+    _, report = generate_ui("页面", Config({"llm": {"stream": True}}), _whitelist(), out_dir=None, llm=llm)
+    assert [error["code"] for error in report["errors"]] == ["E_UNKNOWN_COMPONENT", "E_STREAM_ABORTED"]
+    assert llm.closed
+    assert llm.pulled < len(llm.content) // 8 // 4
+
+
+def test_stream_matches_blocking_result() -> None:
+    whitelist = _whitelist()
+    content = _content("label")
+    streamed = generate_ui("页面", Config({"llm": {"stream": True}}), whitelist, out_dir=None, llm=ScriptedLLM(content))
+    blocking = generate_ui("页面", Config({}), whitelist, out_dir=None, llm=ScriptedLLM(content))
+    assert streamed == blocking
+    assert streamed[1]["SchemaPass"] and not streamed[1]["errors"]
+
+
+def test_stream_without_abort_reports_full_validation() -> None:
+    config = Config({"llm": {"stream": True, "stream_abort": False}})
+    llm = ScriptedLLM(_content("ghost"))
+    _, report = generate_ui("页面", config, _whitelist(), out_dir=None, llm=llm)
+    assert [error["code"] for error in report["errors"]] == ["E_UNKNOWN_COMPONENT"]
+    assert llm.pulled == -(-len(llm.content) // 8)
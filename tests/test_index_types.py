@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from ucc_a2ui.embed.index_faiss import IndexBuilder, apply_search_params, create_empty_index, index_type_of
+
+
+def _vectors(count: int, dim: int = 32) -> np.ndarray:
+    return np.random.default_rng(7).standard_normal((count, dim)).astype("float32")
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf_flat", "ivf_pq", "hnsw", "sq8"])
+def test_create_empty_index_types(index_type: str) -> None:
+    index = create_empty_index(32, index_type, {"nlist": 4, "pq_m": 8, "pq_nbits": 4, "hnsw_m": 8})
+    assert index_type_of(index) == index_type
+
+
+def test_index_builder_trains_and_reports_recall() -> None:
+    builder = IndexBuilder("ivf_flat", {"nlist": 4, "train_size": 200, "nprobe": 4, "recall_queries": 20})
+    vectors = _vectors(300)
+    for start in range(0, 300, 64):
+        builder.add(vectors[start : start + 64])
+    index = builder.finish()
+    assert index_type_of(index) == "ivf_flat"
+    assert index.ntotal == 300
+    report = builder.recall_report()
+    assert report["queries"] == 20
+    assert report["recall"] == pytest.approx(1.0)
+
+
+def test_index_builder_falls_back_to_flat_when_untrainable() -> None:
+    builder = IndexBuilder("ivf_flat", {"nlist": 64})
+    builder.add(_vectors(10))
+    index = builder.finish()
+    assert index_type_of(index) == "flat"
+    assert index.ntotal == 10
+    assert builder.fallback_reason
+
+
+def test_apply_search_params() -> None:
+    index = create_empty_index(32, "hnsw", {"hnsw_m": 8})
+    apply_search_params(index, {"ef_search": 77, "nprobe": 3})
+    assert index.hnsw.efSearch == 77
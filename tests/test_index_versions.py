@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+import faiss
+
+from ucc_a2ui.embed import MockEmbedder
+from ucc_a2ui.embed.chunk_store import write_chunk_store
+from ucc_a2ui.embed.index_faiss import IndexedChunk, build_faiss_index, load_faiss_index, save_faiss_index
+from ucc_a2ui.embed.index_versions import (
+    CURRENT_FILE,
+    create_version_dir,
+    current_version,
+    gc_versions,
+    list_versions,
+)
+from ucc_a2ui.embed.search import search_loaded_index
+
+
+def _faiss_index(texts: list[str]):
+    embedder = MockEmbedder()
+    chunks = [IndexedChunk(text=text, source=f"{text}.md") for text in texts]
+    return build_faiss_index(embedder.embed(texts).vectors, chunks)
+
+
+def test_publish_flips_current_and_readers_stay_pinned(tmp_path: Path) -> None:
+    save_faiss_index(tmp_path, _faiss_index(["按钮组件"]))
+    pinned = load_faiss_index(tmp_path)
+    assert pinned.version == "v000001"
+    assert (tmp_path / CURRENT_FILE).read_text(encoding="utf-8").strip() == "v000001"
+
+    save_faiss_index(tmp_path, _faiss_index(["文本组件", "列表组件"]), keep=1)
+    assert current_version(tmp_path) == "v000002"
+    assert [path.name for _, path in list_versions(tmp_path)] == ["v000002"]
+    fresh = load_faiss_index(tmp_path)
+    assert fresh.version == "v000002" and fresh.index.ntotal == 2
+
+    # The collected version's files stay readable through the reader's open mapping.
+    assert pinned.index.ntotal == 1
+    assert [result.text for result in search_loaded_index(pinned, "按钮组件", MockEmbedder(), top_k=1)] == ["按钮组件"]
+
+
+def test_gc_keeps_retention_and_in_progress_versions(tmp_path: Path) -> None:
+    for idx in range(5):
+        save_faiss_index(tmp_path, _faiss_index([f"doc{idx}"]), keep=10)
+    building = create_version_dir(tmp_path)
+    removed = gc_versions(tmp_path, keep=3)
+    assert sorted(path.name for path in removed) == ["v000001", "v000002"]
+    assert [path.name for _, path in list_versions(tmp_path)] == ["v000003", "v000004", "v000005", building.name]
+    assert load_faiss_index(tmp_path).version == "v000005"
+
+
+def test_flat_layout_is_read_then_replaced_on_publish(tmp_path: Path) -> None:
+    flat = _faiss_index(["旧索引"])
+    write_chunk_store(tmp_path / "chunks.bin", flat.chunks.iter_chunks())
+    faiss.write_index(flat.index, str(tmp_path / "index.faiss"))
+    legacy = load_faiss_index(tmp_path)
+    assert legacy.version and not legacy.version.startswith("v")
+    assert legacy.chunks.get(0).text == "旧索引"
+
+    save_faiss_index(tmp_path, legacy)
+    assert current_version(tmp_path) == "v000001"
+    assert not (tmp_path / "index.faiss").exists() and not (tmp_path / "chunks.bin").exists()
+    assert load_faiss_index(tmp_path).chunks.get(0).text == "旧索引"
+
+
+def test_readers_never_see_a_partial_version(tmp_path: Path) -> None:
+    save_faiss_index(tmp_path, _faiss_index(["v0"]))
+    errors: list[BaseException] = []
+    done = threading.Event()
+
+    def read() -> None:
+        while not done.is_set():
+            try:
+                faiss_index = load_faiss_index(tmp_path)
+                # Index and chunks always come from the same version.
+                assert faiss_index.index.ntotal == len(faiss_index.chunks)
+                assert faiss_index.lexical is not None
+                assert faiss_index.chunks.get(0).text == f"v{int(faiss_index.version[1:]) - 1}"
+                faiss_index.chunks.close()
+            except BaseException as exc:  # noqa: BLE001 - surfaced below
+                errors.append(exc)
+                return
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for idx in range(1, 20):
+            save_faiss_index(tmp_path, _faiss_index([f"v{idx}"] + [f"extra{n}" for n in range(idx)]), keep=2)
+    finally:
+        done.set()
+        reader.join()
+    assert errors == []
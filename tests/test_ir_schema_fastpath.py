@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import copy
+import json
+import random
+from pathlib import Path
+
+import pytest
+from jsonschema import Draft7Validator
+
+from ucc_a2ui.generator.ir_schema import IR_SCHEMA, is_valid_ir_structure
+from ucc_a2ui.generator.validator import IRValidator
+from ucc_a2ui.library import build_whitelist
+from ucc_a2ui.library.json_loader import JSONComponentRecord
+
+CORPUS = [
+    json.loads(line)
+    for line in (Path(__file__).parent / "fixtures" / "ir_schema_corpus.jsonl").read_text(encoding="utf-8").splitlines()
+]
+
+
+def _whitelist():
+    return build_whitelist([JSONComponentRecord("button", "基础组件", "Button", {})])
+
+
+def _mutations(seed: int, count: int) -> list:
+    rng = random.Random(seed)
+    valid_node = {"type": "button", "props": {}, "events": {}, "children": []}
+    values = [None, True, 0, 1.5, "s", [], {}, [{}], {"type": "x"}, valid_node, valid_node, valid_node]
+    valid_cases = [case for case in CORPUS if case["name"].startswith("valid_")]
+    items = []
+    for _ in range(count):
+        ir = copy.deepcopy(rng.choice(valid_cases if rng.random() < 0.5 else CORPUS)["ir"])
+        for _ in range(rng.randint(1, 3)):
+            target = ir
+            # Walk down to a random container and replace, add or drop one entry.
+            while isinstance(target, (dict, list)) and target and rng.random() < 0.6:
+                key = rng.choice(list(target)) if isinstance(target, dict) else rng.randrange(len(target))
+                if not isinstance(target[key], (dict, list)):
+                    break
+                target = target[key]
+            if isinstance(target, dict) and target:
+                key = rng.choice(list(target))
+                roll = rng.random()
+                if roll < 0.4:
+                    target[f"extra_{rng.randrange(3)}"] = copy.deepcopy(rng.choice(values))
+                elif roll < 0.55:
+                    del target[key]
+                else:
+                    target[key] = copy.deepcopy(rng.choice(values))
+            elif isinstance(target, list):
+                target.append(copy.deepcopy(rng.choice(values)))
+        items.append(ir)
+    return items
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=[case["name"] for case in CORPUS])
+def test_fast_path_matches_jsonschema_on_corpus(case: dict) -> None:
+    ir = case["ir"]
+    assert is_valid_ir_structure(ir) == (not list(Draft7Validator(IR_SCHEMA).iter_errors(ir)))
+    if isinstance(ir, dict):
+        whitelist = _whitelist()
+        assert IRValidator(whitelist).validate(ir) == IRValidator(whitelist, fast_schema=False).validate(ir)
+
+
+def test_fast_path_matches_jsonschema_on_mutations() -> None:
+    schema_validator = Draft7Validator(IR_SCHEMA)
+    whitelist = _whitelist()
+    fast, slow = IRValidator(whitelist), IRValidator(whitelist, fast_schema=False)
+    for ir in _mutations(seed=7, count=2000):
+        assert is_valid_ir_structure(ir) == (not list(schema_validator.iter_errors(ir))), ir
+        if isinstance(ir, dict):
+            assert fast.validate(ir) == slow.validate(ir), ir
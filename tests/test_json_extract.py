@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import time
+
 import pytest
 
 from ucc_a2ui.generator.json_extract import JSONExtractError, extract_first_json
@@ -18,3 +20,65 @@ def test_extract_first_json() -> None:
 def test_extract_invalid_json() -> None:
     with pytest.raises(JSONExtractError):
         extract_first_json("no json")
+
+
+def test_extract_ignores_braces_in_strings() -> None:
+    text = 'Sure: {"ir": {"tree": {"type": "label", "props": {"text": "a } b { c"}}}} done'
+    assert extract_first_json(text)["ir"]["tree"]["props"]["text"] == "a } b { c"
+
+
+def test_extract_skips_invalid_candidates() -> None:
+    text = 'Use {placeholders} like {name}; result: {"ok": true} and {"later": 1}'
+    assert extract_first_json(text) == {"ok": True}
+    assert extract_first_json('{"broken": {"a": 1}, oops}') == {"a": 1}
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        'Note: {"a": "b} then {"ok": 1}',
+        'Template "{" then {"ok": 1}',
+        'He said "hi {" and here: {"ok": 1}',
+    ],
+)
+def test_extract_finds_objects_swallowed_by_failed_strings(text: str) -> None:
+    assert extract_first_json(text) == {"ok": 1}
+
+
+def test_extract_arrays() -> None:
+    assert extract_first_json("ids: [1, 2, 3]") == [1, 2, 3]
+    assert extract_first_json('ids: [1, 2] then {"a": 1}', allow_arrays=False) == {"a": 1}
+
+
+def test_extract_prefers_fenced_blocks_in_order() -> None:
+    text = 'Template {"x": 0}\n```text\nnot json\n```\n```json\n{"a": 1}\n```\n```json\n{"b": 2}\n```'
+    assert extract_first_json(text) == {"a": 1}
+    assert extract_first_json('```json {"inline": true}```') == {"inline": True}
+    # A truncated completion leaves the last fence open.
+    assert extract_first_json('```json\n{"open": 1}\n') == {"open": 1}
+
+
+def _noise(units: int) -> str:
+    return 'Step {n}: set "x} to [y] {"draft": ' * units + "{{{ [[[ " * (4 * units)
+
+
+def test_extract_long_noisy_output() -> None:
+    noise = _noise(5000)
+    text = noise + '```json\n{"ir": {"tree": {"type": "label"}}}\n```'
+    assert extract_first_json(text) == {"ir": {"tree": {"type": "label"}}}
+    assert extract_first_json(noise + '{"tail": 1}') == {"tail": 1}
+
+
+def test_extract_is_linear() -> None:
+    def best_time(units: int) -> float:
+        text = _noise(units) + '{"tail": 1}'
+        timings = []
+        for _ in range(5):
+            started = time.perf_counter()
+            assert extract_first_json(text) == {"tail": 1}
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    # Each doubling of the input roughly doubles the time; a quadratic scan
+    # quadruples it. Two doublings keep the gap wide of timing noise.
+    assert best_time(4000) < 8 * best_time(1000)
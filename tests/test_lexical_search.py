@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from ucc_a2ui.embed import MockEmbedder
+from ucc_a2ui.embed.index_faiss import IndexedChunk, build_faiss_index, load_faiss_index, save_faiss_index
+from ucc_a2ui.embed.lexical import LEXICAL_FILE, LexicalIndex, tokenize, write_lexical_index
+from ucc_a2ui.embed.query_cache import ResultCache
+from ucc_a2ui.embed.search import search_loaded_index
+
+DOCS = {
+    "table.md": "表格组件 Table: 属性 onRowClick 行点击回调, rowKey 行主键",
+    "text.md": "文本组件 Text: 属性 textBinding 绑定显示的文本",
+    "button.md": "按钮组件 Button: 属性 onClick 点击回调, disabled 禁用",
+    "image.md": "图片组件 Image: 属性 src 图片地址, fit 填充方式",
+}
+
+
+def test_tokenize_splits_identifiers_and_cjk() -> None:
+    assert tokenize("onRowClick text_binding") == [
+        "onrowclick", "on", "row", "click", "text_binding", "text", "binding"
+    ]
+    assert tokenize("HTMLParser") == ["htmlparser", "html", "parser"]
+    assert tokenize("按钮组件") == ["按", "钮", "组", "件", "按钮", "钮组", "组件"]
+    assert tokenize("Image 图片") == ["image", "图", "片", "图片"]
+
+
+def test_lexical_index_scores_bm25(tmp_path: Path) -> None:
+    write_lexical_index(tmp_path / LEXICAL_FILE, ["apple apple", "apple pie", "banana split", ""])
+    lexical = LexicalIndex(tmp_path / LEXICAL_FILE)
+    assert len(lexical) == 4 and lexical.live_rows == 4
+    rows, scores = lexical.search("apple", 10)
+    assert rows.tolist() == [0, 1] and scores[0] > scores[1] > 0
+    assert lexical.search("split banana", 1)[0].tolist() == [2]
+    assert lexical.search("cherry", 5)[0].size == 0
+    lexical.close()
+
+
+@pytest.fixture()
+def saved_index(tmp_path: Path):
+    embedder = MockEmbedder()
+    chunks = [IndexedChunk(text=text, source=source) for source, text in DOCS.items()]
+    save_faiss_index(tmp_path, build_faiss_index(embedder.embed([c.text for c in chunks]).vectors, chunks))
+    return load_faiss_index(tmp_path), embedder
+
+
+def test_search_modes(saved_index) -> None:
+    faiss_index, embedder = saved_index
+    assert faiss_index.lexical is not None
+
+    lexical = search_loaded_index(faiss_index, "textBinding", embedder, top_k=2, mode="lexical")
+    assert [result.source for result in lexical] == ["text.md"]
+    assert search_loaded_index(faiss_index, "行点击", embedder, top_k=1, mode="lexical")[0].source == "table.md"
+    # Split parts match too: "row click" finds onRowClick.
+    assert search_loaded_index(faiss_index, "row click", embedder, top_k=1, mode="lexical")[0].source == "table.md"
+
+    hybrid = search_loaded_index(faiss_index, "onRowClick", embedder, top_k=4, mode="hybrid")
+    assert hybrid[0].source == "table.md"
+    assert len({result.source for result in hybrid}) == len(hybrid)
+    assert all(a.score >= b.score for a, b in zip(hybrid, hybrid[1:]))
+
+    with pytest.raises(ValueError, match="Unknown search mode"):
+        search_loaded_index(faiss_index, "x", embedder, mode="fuzzy")
+    faiss_index.lexical = None
+    with pytest.raises(ValueError, match="run sync"):
+        search_loaded_index(faiss_index, "x", embedder, mode="hybrid")
+
+
+def test_result_cache_keeps_modes_apart(saved_index) -> None:
+    faiss_index, embedder = saved_index
+    cache = ResultCache()
+    vector = search_loaded_index(faiss_index, "按钮", embedder, top_k=2, result_cache=cache)
+    lexical = search_loaded_index(faiss_index, "按钮", embedder, top_k=2, result_cache=cache, mode="lexical")
+    assert lexical[0].source == "button.md" and lexical != vector
+    assert search_loaded_index(faiss_index, "按钮", embedder, top_k=2, result_cache=cache, mode="lexical") == lexical
+    assert (cache.hits, cache.misses) == (1, 2)
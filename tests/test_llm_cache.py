@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from ucc_a2ui.config import Config
+from ucc_a2ui.generator import generate_ui
+from ucc_a2ui.generator.generate import build_llm
+from ucc_a2ui.generator.llm_cache import CachedLLM, CompletionCache
+from ucc_a2ui.generator.llm_client_base import LLMClientBase, LLMResponse
+from ucc_a2ui.library import build_whitelist
+from ucc_a2ui.library.json_loader import JSONComponentRecord
+
+PARAMS = {"mode": "mock", "model": "m", "temperature": 0.0, "max_tokens": 100}
+
+
+class CountingLLM(LLMClientBase):
+    def __init__(self, tree_type: str = "label") -> None:
+        self.calls = 0
+        self.tree_type = tree_type
+
+    def complete(self, messages):
+        self.calls += 1
+        ir = {"version": "ucc-ui-ir@v0", "theme": {}, "variables": [], "tree": {"type": self.tree_type}}
+        return LLMResponse(content=json.dumps({"ir": ir}), prompt_tokens=42)
+
+    def complete_stream(self, messages):
+        content = self.complete(messages).content
+        for start in range(0, len(content), 8):
+            yield content[start : start + 8]
+
+
+def _whitelist():
+    return build_whitelist([JSONComponentRecord("label", "基础组件", "Label", {})])
+
+
+def test_completion_cache_ttl_and_lru(tmp_path: Path, monkeypatch) -> None:
+    clock = [1000.0]
+    monkeypatch.setattr("ucc_a2ui.generator.llm_cache.time.time", lambda: clock[0])
+    cache = CompletionCache(tmp_path / "c.sqlite", ttl_s=60, max_entries=10)
+    for idx in range(10):
+        cache.put(f"k{idx}", LLMResponse(content=str(idx)))
+        clock[0] += 1
+    assert cache.get("k0").content == "0"
+    clock[0] += 1
+    cache.put("k10", LLMResponse(content="10"))
+    # Over the cap: the least recently used tenth goes, k0 was just read.
+    assert len(cache) == 9
+    assert cache.get("k0") is not None and cache.get("k1") is None and cache.get("k2") is None
+    clock[0] += 120
+    assert cache.get("k10") is None
+    reopened = CompletionCache(tmp_path / "c.sqlite", ttl_s=60, max_entries=10)
+    assert len(reopened) == 0
+
+
+def test_generate_reuses_cached_completion(tmp_path: Path) -> None:
+    inner = CountingLLM()
+    llm = CachedLLM(inner, CompletionCache(tmp_path / "c.sqlite"), PARAMS)
+    config = Config({})
+    first = generate_ui("页面", config, _whitelist(), out_dir=None, llm=llm)
+    second = generate_ui("页面", config, _whitelist(), out_dir=None, llm=llm)
+    assert inner.calls == 1
+    assert not first[1]["cache_hit"] and second[1]["cache_hit"]
+    assert first[0] == second[0]
+    assert second[1]["usage"]["prompt_tokens"] == 42
+
+    bypass = generate_ui("页面", config, _whitelist(), out_dir=None, llm=llm, use_cache=False)
+    assert inner.calls == 2 and not bypass[1]["cache_hit"]
+    generate_ui("另一个页面", config, _whitelist(), out_dir=None, llm=llm)
+    assert inner.calls == 3
+
+    other_params = CachedLLM(inner, llm.cache, dict(PARAMS, temperature=0.7))
+    assert not generate_ui("页面", config, _whitelist(), out_dir=None, llm=other_params)[1]["cache_hit"]
+
+
+def test_cancelled_stream_is_not_cached(tmp_path: Path) -> None:
+    config = Config({"llm": {"stream": True}})
+    cache = CompletionCache(tmp_path / "c.sqlite")
+    aborted = CachedLLM(CountingLLM("ghost"), cache, PARAMS)
+    _, report = generate_ui("页面", config, _whitelist(), out_dir=None, llm=aborted)
+    assert report["errors"][-1]["code"] == "E_STREAM_ABORTED"
+    assert len(cache) == 0
+
+    inner = CountingLLM()
+    llm = CachedLLM(inner, cache, PARAMS)
+    generate_ui("页面", config, _whitelist(), out_dir=None, llm=llm)
+    _, report = generate_ui("页面", config, _whitelist(), out_dir=None, llm=llm)
+    assert inner.calls == 1 and report["cache_hit"]
+
+
+def test_build_llm_wraps_when_enabled(tmp_path: Path) -> None:
+    whitelist = _whitelist()
+    assert not isinstance(build_llm({"mode": "mock"}, whitelist), CachedLLM)
+    llm = build_llm({"mode": "mock", "cache": True, "cache_path": str(tmp_path / "c.sqlite")}, whitelist)
+    assert isinstance(llm, CachedLLM)
+    messages = [{"role": "user", "content": "x"}]
+    assert llm.complete(messages).content == llm.complete(messages).content
+    assert llm.cache.hits == 1
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+
+from ucc_a2ui.embed.embedder_mock import MockEmbedder
+from ucc_a2ui.embed.index_faiss import IndexedChunk, build_faiss_index, load_faiss_index, save_faiss_index
+from ucc_a2ui.embed.query_cache import CachedQueryEmbedder, ResultCache, build_query_cache, cache_metadata
+from ucc_a2ui.embed.search import search_loaded_index
+
+
+class CountingEmbedder(MockEmbedder):
+    def __init__(self) -> None:
+        super().__init__(dim=8)
+        self.texts: list[str] = []
+
+    def embed(self, texts):
+        self.texts.extend(texts)
+        return super().embed(texts)
+
+
+def test_query_vectors_are_cached_with_lru_bound() -> None:
+    inner = CountingEmbedder()
+    embedder = CachedQueryEmbedder(inner, max_entries=2)
+    first = embedder.embed(["按钮", "表格"]).vectors
+    again = embedder.embed(["表格", "按钮"]).vectors
+    np.testing.assert_array_equal(again, first[::-1])
+    assert inner.texts == ["按钮", "表格"]
+    embedder.embed(["列表"])
+    embedder.embed(["按钮"])
+    embedder.embed(["表格"])
+    assert inner.texts == ["按钮", "表格", "列表", "表格"]
+    assert (embedder.hits, embedder.misses) == (3, 4)
+
+
+def test_query_vectors_persist_on_disk(tmp_path: Path) -> None:
+    config = {"mode": "mock", "model": "m", "cache_dir": str(tmp_path), "query_cache_disk": True}
+    inner = CountingEmbedder()
+    embedder, _ = build_query_cache(config, inner)
+    embedder.embed(["按钮"])
+    reopened, _ = build_query_cache(config, inner)
+    reopened.embed(["按钮"])
+    assert inner.texts == ["按钮"]
+    assert (tmp_path / "queries").is_dir()
+
+
+def test_result_cache_follows_index_version(tmp_path: Path) -> None:
+    inner = CountingEmbedder()
+    chunks = [IndexedChunk(text=f"组件 {idx}", source=f"{idx}.md") for idx in range(3)]
+    save_faiss_index(tmp_path, build_faiss_index(inner.embed([chunk.text for chunk in chunks]).vectors, chunks))
+    embedder = CachedQueryEmbedder(inner)
+    result_cache = ResultCache()
+
+    faiss_index = load_faiss_index(tmp_path)
+    first = search_loaded_index(faiss_index, "组件 1", embedder, top_k=2, result_cache=result_cache)
+    assert search_loaded_index(faiss_index, "组件 1", embedder, top_k=2, result_cache=result_cache) == first
+    assert search_loaded_index(faiss_index, "组件 1", embedder, top_k=1, result_cache=result_cache) == first[:1]
+    assert (result_cache.hits, result_cache.misses) == (1, 2)
+
+    chunks.append(IndexedChunk(text="组件 9", source="9.md"))
+    save_faiss_index(tmp_path, build_faiss_index(inner.embed([chunk.text for chunk in chunks]).vectors, chunks))
+    reloaded = load_faiss_index(tmp_path)
+    assert reloaded.version != faiss_index.version
+    search_loaded_index(reloaded, "组件 1", embedder, top_k=2, result_cache=result_cache)
+    meta = cache_metadata(embedder, result_cache)
+    assert meta["result_misses"] == 3
+    assert (meta["query_vector_hits"], meta["query_vector_misses"]) == (2, 1)
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import http.client
+import json
+import threading
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from ucc_a2ui.config import Config
+from ucc_a2ui.embed import build_embedder
+from ucc_a2ui.embed.index_faiss import IndexedChunk, build_faiss_index, save_faiss_index
+from ucc_a2ui.library import build_whitelist, load_component_schema_json
+from ucc_a2ui.server import ServiceError, ServiceState, build_server
+
+
+def _write_json(component_path: Path) -> None:
+    component_path.write_text(
+        """
+{
+  "schema_version": "ucc-component-params@v0",
+  "components": [
+    {
+      "type": "button",
+      "group": "基础组件",
+      "component_name": "Button",
+      "props_by_category": {
+        "Data": [
+          {
+            "name": "text",
+            "type": "string",
+            "enum": [],
+            "description": "按钮文本",
+            "default": null,
+            "required": true,
+            "notes": ""
+          }
+        ]
+      }
+    }
+  ]
+}
+""",
+        encoding="utf-8",
+    )
+
+
+def _load_whitelist(config: Config):
+    components, _ = load_component_schema_json(config.get("library", "component_path"))
+    return build_whitelist(components)
+
+
+def _write_index(index_dir: Path, texts: list[str]) -> None:
+    embedder = build_embedder({"mode": "mock"})
+    vectors = embedder.embed(texts).vectors
+    chunks = [IndexedChunk(text=text, source=f"{idx}.md") for idx, text in enumerate(texts)]
+    save_faiss_index(index_dir, build_faiss_index(vectors, chunks))
+
+
+def _post(base_url: str, path: str, payload: dict) -> dict:
+    request = urllib.request.Request(
+        base_url + path,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def test_serve_endpoints_and_index_reload(tmp_path: Path) -> None:
+    component_path = tmp_path / "schema.json"
+    _write_json(component_path)
+    index_dir = tmp_path / "index"
+    _write_index(index_dir, ["按钮组件"])
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(
+        f"library:\n  component_path: {component_path}\n"
+        f"embed:\n  mode: mock\n  index_dir: {index_dir}\n"
+        "llm:\n  mode: mock\n",
+        encoding="utf-8",
+    )
+    state = ServiceState(Config.load(config_path), _load_whitelist)
+    server = build_server(state, "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        results = _post(base_url, "/search", {"query": "按钮", "k": 5})
+        assert [item["text"] for item in results["results"]] == ["按钮组件"]
+        repeated = _post(base_url, "/search", {"query": "按钮", "k": 5})
+        assert repeated["results"] == results["results"]
+        assert repeated["meta"]["result_hits"] == 1
+        assert repeated["meta"]["query_vector_misses"] == 1
+
+        generated = _post(base_url, "/generate", {"prompt": "创建按钮"})
+        assert generated["report"]["SchemaPass"]
+
+        report = _post(base_url, "/validate", {"ir": generated["ir"]})
+        assert report["ComponentWhitelistPass"]
+
+        _write_index(index_dir, ["按钮组件", "文本组件"])
+        results = _post(base_url, "/search", {"query": "按钮", "k": 5})
+        assert len(results["results"]) == 2
+        assert results["meta"]["result_hits"] == 1
+        assert results["meta"]["query_vector_hits"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_generate_keeps_out_under_output_dir(tmp_path: Path) -> None:
+    component_path = tmp_path / "schema.json"
+    _write_json(component_path)
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(
+        f"library:\n  component_path: {component_path}\n"
+        f"embed:\n  mode: mock\n  index_dir: {tmp_path / 'index'}\n"
+        f"llm:\n  mode: mock\noutput:\n  dir: {tmp_path / 'out'}\n",
+        encoding="utf-8",
+    )
+    state = ServiceState(Config.load(config_path), _load_whitelist)
+    for out in ("../escaped", str(tmp_path / "elsewhere"), "", 7):
+        with pytest.raises(ServiceError) as excinfo:
+            state.generate({"prompt": "创建按钮", "out": out})
+        assert excinfo.value.status == 400
+    assert not (tmp_path / "escaped").exists() and not (tmp_path / "elsewhere").exists()
+
+    state.generate({"prompt": "创建按钮", "out": "run1"})
+    assert (tmp_path / "out" / "run1" / "ui_report.json").exists()
+
+
+@pytest.mark.parametrize(
+    ("route", "body"),
+    [
+        ("search", {"query": "按钮", "k": "five"}),
+        ("search", {"query": "按钮", "k": 0}),
+        ("search", {"query": "按钮", "k": True}),
+        ("search", {"query": "按钮", "k": 10**9}),
+        ("generate", {"prompt": "创建按钮", "save_plan": "yes"}),
+        ("generate", {"prompt": "创建按钮", "cache": 0}),
+    ],
+)
+def test_bad_request_fields_are_400(tmp_path: Path, route: str, body: dict) -> None:
+    component_path = tmp_path / "schema.json"
+    _write_json(component_path)
+    _write_index(tmp_path / "index", ["按钮组件"])
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(
+        f"library:\n  component_path: {component_path}\n"
+        f"embed:\n  mode: mock\n  index_dir: {tmp_path / 'index'}\n"
+        "llm:\n  mode: mock\n",
+        encoding="utf-8",
+    )
+    state = ServiceState(Config.load(config_path), _load_whitelist)
+    with pytest.raises(ServiceError) as excinfo:
+        getattr(state, route)(body)
+    assert excinfo.value.status == 400
+
+
+@pytest.mark.parametrize(
+    ("length", "payload", "status"),
+    [
+        ("-1", b"", 400),
+        ("ten", b"", 400),
+        ("65", b"{" + b" " * 63 + b"}", 413),
+        (None, b'{"ir": "\xff"}', 400),
+    ],
+)
+def test_bad_request_bodies(tmp_path: Path, length: str | None, payload: bytes, status: int) -> None:
+    component_path = tmp_path / "schema.json"
+    _write_json(component_path)
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(
+        f"library:\n  component_path: {component_path}\n"
+        f"embed:\n  mode: mock\n  index_dir: {tmp_path / 'index'}\n"
+        "llm:\n  mode: mock\nserver:\n  max_body_bytes: 64\n",
+        encoding="utf-8",
+    )
+    server = build_server(ServiceState(Config.load(config_path), _load_whitelist), "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+        connection.putrequest("POST", "/validate")
+        connection.putheader("Content-Length", str(len(payload)) if length is None else length)
+        connection.endheaders(payload)
+        response = connection.getresponse()
+        assert response.status == status
+        assert "error" in json.loads(response.read())
+        connection.close()
+    finally:
+        server.shutdown()
+        server.server_close()
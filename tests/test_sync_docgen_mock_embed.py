@@ -5,8 +5,9 @@ from pathlib import Path
 from ucc_a2ui.docs import generate_docs
 from ucc_a2ui.embed import build_embedder
 from ucc_a2ui.embed.chunker import chunk_documents_with_sources
-from ucc_a2ui.embed.index_faiss import IndexedChunk, build_faiss_index, save_faiss_index
-from ucc_a2ui.embed.search import search_index
+from ucc_a2ui.embed.index_faiss import IndexedChunk, build_faiss_index, open_chunk_store, save_faiss_index
+from ucc_a2ui.embed.embedder_mock import MockEmbedder
+from ucc_a2ui.embed.search import search_index, search_many
 from ucc_a2ui.library import build_whitelist, load_component_schema_json
 
 
@@ -49,7 +50,7 @@ def test_sync_docgen_and_search(tmp_path: Path) -> None:
     whitelist = build_whitelist(components)
 
     docs_dir = tmp_path / "docs"
-    docs = generate_docs(docs_dir, whitelist)
+    docs = generate_docs(docs_dir, whitelist).paths
     assert docs
 
     documents = [(Path(doc).read_text(encoding="utf-8"), str(doc)) for doc in docs]
@@ -64,3 +65,40 @@ def test_sync_docgen_and_search(tmp_path: Path) -> None:
 
     results = search_index(str(index_dir), "列表", embedder, top_k=3)
     assert results
+
+
+def test_chunk_store_get_many(tmp_path: Path) -> None:
+    chunks = [IndexedChunk(text=f"块 {idx}\n\"quoted\"", source=f"{idx}.md") for idx in range(5)]
+    vectors = build_embedder({"mode": "mock"}).embed([chunk.text for chunk in chunks]).vectors
+    save_faiss_index(tmp_path, build_faiss_index(vectors, chunks))
+
+    store = open_chunk_store(tmp_path)
+    assert len(store) == 5
+    assert store.get_many([3, 0, 3]) == [chunks[3], chunks[0], chunks[3]]
+    assert store.get(4) == chunks[4]
+    assert store.get_many([]) == []
+
+
+class BatchCountingEmbedder(MockEmbedder):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = 0
+
+    def embed(self, texts):
+        self.calls += 1
+        return super().embed(texts)
+
+
+def test_search_many_matches_single_queries(tmp_path: Path) -> None:
+    chunks = [IndexedChunk(text=f"组件 {idx}", source=f"{idx}.md") for idx in range(20)]
+    embedder = BatchCountingEmbedder()
+    save_faiss_index(tmp_path, build_faiss_index(embedder.embed([chunk.text for chunk in chunks]).vectors, chunks))
+    queries = [f"组件 {idx}" for idx in range(7)] + ["按钮"]
+
+    embedder.calls = 0
+    results = list(search_many(str(tmp_path), iter(queries), embedder, top_k=3, batch_size=3))
+    assert embedder.calls == 3
+    assert [query for query, _ in results] == queries
+    for query, hits in results:
+        assert hits == search_index(str(tmp_path), query, embedder, top_k=3)
+    assert results[2][1][0].text == "组件 2"
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from ucc_a2ui import cli, embed
+from ucc_a2ui.config import Config
+from ucc_a2ui.embed import index_faiss
+from ucc_a2ui.embed.embedder_mock import MockEmbedder
+from ucc_a2ui.embed.index_faiss import load_faiss_index
+from ucc_a2ui.embed.index_manifest import read_index_manifest
+from ucc_a2ui.embed.index_versions import current_version, list_versions, resolve_index_dir
+from ucc_a2ui.embed.lexical import LEXICAL_FILE
+from ucc_a2ui.embed.search import search_loaded_index
+
+
+class CountingEmbedder(MockEmbedder):
+    def __init__(self) -> None:
+        super().__init__(dim=16)
+        self.texts: list[str] = []
+
+    def embed(self, texts):
+        self.texts.extend(texts)
+        return super().embed(texts)
+
+
+def _component(component_type: str, name: str) -> dict:
+    return {
+        "type": component_type,
+        "group": "基础组件",
+        "component_name": name,
+        "props_by_category": {
+            "Data": [{"name": "text", "type": "string", "enum": [], "description": "", "default": None}]
+        },
+    }
+
+
+def _write_schema(path: Path, components: list[dict]) -> None:
+    path.write_text(json.dumps({"components": components}, ensure_ascii=False), encoding="utf-8")
+
+
+@pytest.fixture()
+def sync_env(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.chdir(tmp_path)
+    embedder = CountingEmbedder()
+    monkeypatch.setattr(embed, "build_embedder", lambda config: embedder)
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(
+        "library:\n  component_path: schema.json\n"
+        "embed:\n  mode: mock\n  index_dir: index\n  chunk_size: 4000\n  chunk_overlap: 0\n",
+        encoding="utf-8",
+    )
+    return tmp_path, Config.load(config_path), embedder
+
+
+def test_sync_changed_and_removed_docs_only_embed_changes(sync_env) -> None:
+    tmp_path, config, embedder = sync_env
+    components = [_component(f"comp_{idx}", f"Comp{idx}") for idx in range(5)]
+    _write_schema(tmp_path / "schema.json", components)
+    assert cli._run_sync(config) == 0
+    assert len(embedder.texts) == 5
+
+    embedder.texts.clear()
+    components[1] = _component("comp_1", "Renamed")
+    del components[3]
+    _write_schema(tmp_path / "schema.json", components)
+    (tmp_path / "docs/components/comp_3.md").unlink()
+    assert cli._run_sync(config) == 0
+    assert len(embedder.texts) == 1
+    assert "Renamed" in embedder.texts[0]
+
+    faiss_index = load_faiss_index(tmp_path / "index")
+    assert faiss_index.index.ntotal == 4
+    assert faiss_index.chunks.live_count == 4
+    assert sorted(faiss_index.chunks.doc_hashes()) == sorted(
+        f"docs/components/comp_{idx}.md" for idx in (0, 1, 2, 4)
+    )
+
+
+def test_sync_rebuild_reuses_cached_embeddings(sync_env) -> None:
+    tmp_path, config, embedder = sync_env
+    _write_schema(tmp_path / "schema.json", [_component(f"comp_{idx}", f"Comp{idx}") for idx in range(3)])
+    assert cli._run_sync(config) == 0
+    assert len(embedder.texts) == 3
+
+    embedder.texts.clear()
+    (resolve_index_dir(tmp_path / "index") / "index.faiss").unlink()
+    assert cli._run_sync(config) == 0
+    assert embedder.texts == []
+    assert load_faiss_index(tmp_path / "index").index.ntotal == 3
+
+
+def test_sync_manifest_skips_index_load_when_unchanged(sync_env, monkeypatch: pytest.MonkeyPatch) -> None:
+    tmp_path, config, embedder = sync_env
+    components = [_component(f"comp_{idx}", f"Comp{idx}") for idx in range(4)]
+    _write_schema(tmp_path / "schema.json", components)
+    assert cli._run_sync(config) == 0
+    components[2] = _component("comp_2", "Renamed")
+    _write_schema(tmp_path / "schema.json", components)
+    assert cli._run_sync(config) == 0
+
+    manifest = read_index_manifest(tmp_path / "index")
+    store = load_faiss_index(tmp_path / "index").chunks
+    assert manifest.totals == {"rows": 5, "live_chunks": 4, "vectors": 4, "sources": 4}
+    for source in manifest.sources:
+        assert manifest.rows_for_sources([source]).tolist() == store.rows_for_sources([source]).tolist()
+    store.close()
+
+    live_index = resolve_index_dir(tmp_path / "index") / "index.faiss"
+    index_stat = live_index.stat()
+
+    def fail_load(*args, **kwargs):
+        raise AssertionError("unchanged sync must not load the index")
+
+    monkeypatch.setattr(index_faiss, "load_faiss_index", fail_load)
+    embedder.texts.clear()
+    assert cli._run_sync(config) == 0
+    assert embedder.texts == []
+    assert resolve_index_dir(tmp_path / "index") / "index.faiss" == live_index
+    assert live_index.stat().st_mtime_ns == index_stat.st_mtime_ns
+
+
+def test_sync_rebuilds_when_chunking_changes(sync_env) -> None:
+    tmp_path, config, embedder = sync_env
+    _write_schema(tmp_path / "schema.json", [_component(f"comp_{idx}", f"Comp{idx}") for idx in range(2)])
+    assert cli._run_sync(config) == 0
+    assert len(embedder.texts) == 2
+
+    embedder.texts.clear()
+    config.data["embed"]["chunk_size"] = 200
+    assert cli._run_sync(config) == 0
+    assert len(embedder.texts) > 2
+    assert read_index_manifest(tmp_path / "index").chunking == {"chunk_size": 200, "chunk_overlap": 0}
+
+
+def test_sync_publishes_versions_and_collects_old_ones(sync_env) -> None:
+    tmp_path, config, _ = sync_env
+    config.data["embed"]["index_retention"] = 2
+    components = [_component(f"comp_{idx}", f"Comp{idx}") for idx in range(2)]
+    for round_idx in range(3):
+        components.append(_component(f"extra_{round_idx}", f"Extra{round_idx}"))
+        _write_schema(tmp_path / "schema.json", components)
+        assert cli._run_sync(config) == 0
+    assert current_version(tmp_path / "index") == "v000003"
+    assert [path.name for _, path in list_versions(tmp_path / "index")] == ["v000002", "v000003"]
+
+    assert cli._run_sync(config) == 0
+    assert current_version(tmp_path / "index") == "v000003"
+    assert load_faiss_index(tmp_path / "index").chunks.live_count == 5
+
+
+def test_sync_carries_lexical_postings_and_backfills_them(sync_env) -> None:
+    tmp_path, config, _ = sync_env
+    components = [_component(f"comp_{idx}", f"Comp{idx}") for idx in range(3)]
+    _write_schema(tmp_path / "schema.json", components)
+    assert cli._run_sync(config) == 0
+    components[1] = _component("comp_1", "RenamedWidget")
+    _write_schema(tmp_path / "schema.json", components)
+    assert cli._run_sync(config) == 0
+
+    faiss_index = load_faiss_index(tmp_path / "index")
+    assert len(faiss_index.lexical) == len(faiss_index.chunks) == 4
+    assert faiss_index.lexical.live_rows == 3
+    results = search_loaded_index(faiss_index, "renamedWidget", MockEmbedder(dim=16), top_k=3, mode="lexical")
+    assert [result.source for result in results] == ["docs/components/comp_1.md"]
+    rows, _ = faiss_index.lexical.search("comp1", 3)
+    assert rows.size == 0
+    faiss_index.lexical.close()
+
+    # Indexes synced before lexical.bin existed get it on the next sync, without a new version.
+    (resolve_index_dir(tmp_path / "index") / LEXICAL_FILE).unlink()
+    assert cli._run_sync(config) == 0
+    assert current_version(tmp_path / "index") == "v000002"
+    assert load_faiss_index(tmp_path / "index").lexical.live_rows == 3
+
+
+def test_sync_stores_new_doc_hash_after_change(sync_env) -> None:
+    tmp_path, config, embedder = sync_env
+    components = [_component(f"comp_{idx}", f"Comp{idx}") for idx in range(3)]
+    _write_schema(tmp_path / "schema.json", components)
+    assert cli._run_sync(config) == 0
+    components[1] = _component("comp_1", "Renamed")
+    _write_schema(tmp_path / "schema.json", components)
+    for _ in range(3):
+        # Without a manifest, sync diffs against the hashes in the chunk store.
+        (resolve_index_dir(tmp_path / "index") / "manifest.json").unlink()
+        embedder.texts.clear()
+        assert cli._run_sync(config) == 0
+    assert embedder.texts == []
+
+    source = "docs/components/comp_1.md"
+    store = load_faiss_index(tmp_path / "index").chunks
+    assert store.doc_hashes()[source] == read_index_manifest(tmp_path / "index").sources[source]["doc_hash"]
+    assert store.get_many(store.rows_for_sources([source]))[0].doc_hash == store.doc_hashes()[source]
+    assert len(store) == 4
+    store.close()
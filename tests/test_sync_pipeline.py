@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import time
+
+import numpy as np
+import pytest
+
+from ucc_a2ui.embed.embedder_mock import MockEmbedder
+from ucc_a2ui.embed.executor import EmbeddingExecutor
+from ucc_a2ui.embed.index_faiss import IndexedChunk
+from ucc_a2ui.embed.pipeline import SyncPipeline, chunk_batches
+
+
+class SleepyEmbedder(MockEmbedder):
+    def __init__(self, delay_s: float = 0.0, fail_on: str | None = None) -> None:
+        super().__init__(dim=8)
+        self.delay_s = delay_s
+        self.fail_on = fail_on
+
+    def embed(self, texts):
+        if self.fail_on in texts:
+            raise RuntimeError("embedding service down")
+        time.sleep(self.delay_s)
+        return super().embed(texts)
+
+
+def _batches(count: int, produced: list[int] | None = None):
+    for batch_idx in range(count):
+        if produced is not None:
+            produced.append(batch_idx)
+        yield [IndexedChunk(text=f"chunk {batch_idx}-{idx}", source=f"doc{batch_idx}.md") for idx in range(2)]
+
+
+def test_pipeline_keeps_order_and_reports_bottleneck() -> None:
+    written: list[str] = []
+
+    def write(batch, vectors: np.ndarray) -> None:
+        assert vectors.shape == (len(batch), 8)
+        written.extend(chunk.text for chunk in batch)
+
+    pipeline = SyncPipeline(EmbeddingExecutor(SleepyEmbedder(delay_s=0.01), max_in_flight=2), queue_size=2)
+    report = pipeline.run(_batches(12), write)
+    assert written == [f"chunk {batch_idx}-{idx}" for batch_idx in range(12) for idx in range(2)]
+    assert report["bottleneck"] == "embed"
+    for stage in ("chunk", "embed", "write"):
+        assert report["stages"][stage]["items"] == 24
+        assert report["stages"][stage]["batches"] == 12
+    assert report["stages"]["embed"]["busy_s"] >= 0.05
+
+
+def test_pipeline_backpressure_bounds_batches_in_flight() -> None:
+    produced: list[int] = []
+    ahead: list[int] = []
+
+    def write(batch, vectors) -> None:
+        time.sleep(0.01)
+        ahead.append(len(produced) - int(batch[0].source[3:-3]))
+
+    queue_size, max_in_flight = 1, 1
+    pipeline = SyncPipeline(EmbeddingExecutor(SleepyEmbedder(), max_in_flight=max_in_flight), queue_size=queue_size)
+    report = pipeline.run(_batches(30, produced), write)
+    # One batch held by each stage, plus the queues and the in-flight embedding requests.
+    assert max(ahead) <= 2 * queue_size + max_in_flight + 3
+    assert report["bottleneck"] == "write"
+    assert report["stages"]["chunk"]["blocked_s"] > 0
+
+
+def test_pipeline_surfaces_stage_errors() -> None:
+    def broken_batches():
+        yield from _batches(2)
+        raise OSError("doc vanished")
+
+    with pytest.raises(OSError, match="doc vanished"):
+        SyncPipeline(EmbeddingExecutor(SleepyEmbedder())).run(broken_batches(), lambda batch, vectors: None)
+
+    with pytest.raises(RuntimeError, match="embedding service down"):
+        SyncPipeline(EmbeddingExecutor(SleepyEmbedder(fail_on="chunk 3-0"))).run(
+            _batches(6), lambda batch, vectors: None
+        )
+
+    def failing_write(batch, vectors) -> None:
+        raise ValueError("disk full")
+
+    started = time.perf_counter()
+    with pytest.raises(ValueError, match="disk full"):
+        SyncPipeline(EmbeddingExecutor(SleepyEmbedder()), queue_size=1).run(_batches(100), failing_write)
+    assert time.perf_counter() - started < 5
+
+
+def test_chunk_batches_keeps_sources_contiguous(tmp_path) -> None:
+    sources = []
+    for name in ("a", "b"):
+        path = tmp_path / f"{name}.md"
+        path.write_text(name * 25, encoding="utf-8")
+        sources.append(str(path))
+    batches = list(chunk_batches(sources, {source: "0" * 64 for source in sources}, 10, 0, 4))
+    assert [len(batch) for batch in batches] == [4, 2]
+    assert [chunk.source for batch in batches for chunk in batch] == [sources[0]] * 3 + [sources[1]] * 3
+    assert all(chunk.chunk_hash and chunk.doc_hash == "0" * 64 for batch in batches for chunk in batch)
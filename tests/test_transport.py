@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from ucc_a2ui.embed import OpenAICompatibleEmbedder
+from ucc_a2ui.generator.llm_openai_compat import OpenAICompatibleLLM
+from ucc_a2ui.transport import HTTPTransport, get_session
+
+
+@pytest.fixture()
+def stand_in():
+    state = {"failures": [], "bodies": [], "calls": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self) -> None:
+            state["calls"] += 1
+            raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if self.headers.get("Content-Encoding") == "gzip":
+                raw = gzip.decompress(raw)
+            body = json.loads(raw)
+            state["bodies"].append(body)
+            if state["failures"]:
+                status, retry_after = state["failures"].pop(0)
+                self.send_response(status)
+                if retry_after is not None:
+                    self.send_header("Retry-After", retry_after)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if self.path.endswith("/embeddings"):
+                payload = {"data": [{"embedding": [1.0, 2.0]} for _ in body["input"]]}
+            else:
+                payload = {"choices": [{"message": {"content": "ok"}}]}
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format: str, *args) -> None:
+            return
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", state
+    server.shutdown()
+    server.server_close()
+
+
+def test_transport_retries_and_honours_retry_after(stand_in) -> None:
+    base_url, state = stand_in
+    delays: list[float] = []
+    transport = HTTPTransport(retries=2, backoff_s=0.01, sleep=delays.append, gzip_requests=True)
+    state["failures"] = [(503, "3"), (429, None)]
+    embedder = OpenAICompatibleEmbedder(base_url, "", "m", transport=transport)
+    assert embedder.embed(["a", "b"]).vectors == [[1.0, 2.0], [1.0, 2.0]]
+    assert state["calls"] == 3
+    assert delays[0] == 3.0
+    assert 0 <= delays[1] <= 0.02
+    assert state["bodies"][-1]["input"] == ["a", "b"]
+
+
+def test_transport_gives_up_after_retries(stand_in) -> None:
+    base_url, state = stand_in
+    state["failures"] = [(500, None)] * 3
+    llm = OpenAICompatibleLLM(base_url, "", "m", 0.2, 100, 5, transport=HTTPTransport(retries=1, sleep=lambda _: None))
+    with pytest.raises(requests.HTTPError):
+        llm.complete([{"role": "user", "content": "hi"}])
+    assert state["calls"] == 2
+
+
+def test_transport_does_not_retry_client_errors(stand_in) -> None:
+    base_url, state = stand_in
+    state["failures"] = [(400, None)]
+    llm = OpenAICompatibleLLM(base_url, "", "m", 0.2, 100, 5, transport=HTTPTransport(sleep=lambda _: None))
+    with pytest.raises(requests.HTTPError):
+        llm.complete([{"role": "user", "content": "hi"}])
+    assert state["calls"] == 1
+    assert llm.complete([{"role": "user", "content": "hi"}]).content == "ok"
+
+
+def test_sessions_are_shared_per_base_url() -> None:
+    assert get_session("http://example.test/v1/embeddings") is get_session("http://example.test/v1/chat/completions")
+    assert get_session("http://example.test/a") is not get_session("http://other.test/a")
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from pathlib import Path
 
-from ucc_a2ui.generator.validator import validate_ir
+from ucc_a2ui.generator.validator import compile_validator, validate_ir
 from ucc_a2ui.library import build_whitelist, load_component_schema_json
 
 
@@ -119,3 +119,39 @@ def test_validator_binding_sanity(tmp_path: Path) -> None:
     }
     report = validate_ir(ir, whitelist, strict=False)
     assert not report["BindingSanity"]
+
+
+def test_validator_single_pass_order_and_paths(tmp_path: Path) -> None:
+    whitelist = _load_whitelist(tmp_path)
+    leaf = {"type": "button", "props": {"bad": 1, "textBinding": "@gone"}, "events": {"onTap": "x"}, "children": []}
+    unknown = {"type": "ghost", "props": {"valueBinding": "lost"}, "events": {}, "children": [dict(leaf)]}
+    ir = {
+        "version": "ucc-ui-ir@v0",
+        "theme": {},
+        "variables": [],
+        "tree": {"type": "button", "props": {}, "events": {}, "children": [unknown, leaf]},
+    }
+    report = validate_ir(ir, whitelist, strict=False)
+    assert [(error["code"], error["path"]) for error in report["errors"]] == [
+        ("E_UNKNOWN_COMPONENT", "$.tree.children[0].type"),
+        ("E_UNKNOWN_PROP", "$.tree.children[1].props.bad"),
+        ("E_UNKNOWN_PROP", "$.tree.children[1].props.textBinding"),
+        ("E_UNKNOWN_EVENT", "$.tree.children[1].events.onTap"),
+        ("E_UNKNOWN_BINDING_VAR", "$.tree.children[0].props.valueBinding"),
+        ("E_UNKNOWN_BINDING_VAR", "$.tree.children[0].children[0].props.textBinding"),
+        ("E_UNKNOWN_BINDING_VAR", "$.tree.children[1].props.textBinding"),
+    ]
+
+
+def test_compiled_validator_strict_props(tmp_path: Path) -> None:
+    whitelist = _load_whitelist(tmp_path)
+    validator = compile_validator(whitelist)
+    assert compile_validator(whitelist) is validator
+    ir = {
+        "version": "ucc-ui-ir@v0",
+        "theme": {},
+        "variables": [],
+        "tree": {"type": "button", "props": {"text": "hi", "color": "red"}, "events": {}, "children": []},
+    }
+    assert validator.validate(ir, strict=True)["PropsWhitelistPass"]
+    assert validator.validate(ir, strict=False)["PropsWhitelistPass"]
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+from ucc_a2ui.library import build_whitelist, load_component_schema_json, load_whitelist
+from ucc_a2ui.library import snapshot as snapshot_module
+from ucc_a2ui.library.snapshot import read_whitelist_snapshot
+
+
+def _write_schema(path: Path, names: list[str]) -> None:
+    components = [
+        {
+            "type": name,
+            "group": "基础组件",
+            "component_name": name.title(),
+            "props_by_category": {
+                "Data": [{"name": "text", "type": "string", "enum": ["a"], "description": "文本", "default": None}]
+            },
+        }
+        for name in names
+    ]
+    path.write_text(json.dumps({"components": components}, ensure_ascii=False), encoding="utf-8")
+
+
+def test_snapshot_round_trips_the_whitelist(tmp_path: Path) -> None:
+    source = tmp_path / "schema.json"
+    snapshot = tmp_path / "cache" / "whitelist.snapshot"
+    _write_schema(source, ["Button", "TextInput"])
+    loaded = load_whitelist(source, snapshot)
+    assert loaded == build_whitelist(load_component_schema_json(source)[0])
+    assert read_whitelist_snapshot(snapshot, source) == loaded
+    header = json.loads(snapshot.read_text(encoding="utf-8").splitlines()[0])
+    assert header["format"] == "ucc-whitelist-snapshot@v1" and len(header["sha256"]) == 64
+
+
+def test_snapshot_skips_parsing_until_the_source_changes(tmp_path: Path, monkeypatch) -> None:
+    source = tmp_path / "schema.json"
+    snapshot = tmp_path / "whitelist.snapshot"
+    _write_schema(source, ["Button"])
+    load_whitelist(source, snapshot)
+
+    parses = []
+    original = snapshot_module.load_component_schema_json
+    monkeypatch.setattr(
+        snapshot_module, "load_component_schema_json", lambda path: parses.append(path) or original(path)
+    )
+    assert list(load_whitelist(source, snapshot).components) == ["button"]
+    assert parses == []
+
+    # Touched without a content change: the hash matches, so no re-parse.
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    load_whitelist(source, snapshot)
+    assert parses == []
+    header = json.loads(snapshot.read_text(encoding="utf-8").splitlines()[0])
+    assert header["mtime_ns"] == source.stat().st_mtime_ns
+
+    _write_schema(source, ["Button", "Slider"])
+    assert sorted(load_whitelist(source, snapshot).components) == ["button", "slider"]
+    assert len(parses) == 1
+    assert sorted(load_whitelist(source, snapshot).components) == ["button", "slider"]
+    assert len(parses) == 1
+    load_whitelist(source, snapshot, refresh=True)
+    assert len(parses) == 2
+
+
+def test_corrupt_or_foreign_snapshot_is_rebuilt(tmp_path: Path) -> None:
+    source = tmp_path / "schema.json"
+    snapshot = tmp_path / "whitelist.snapshot"
+    _write_schema(source, ["Button"])
+    snapshot.write_text("garbage", encoding="utf-8")
+    assert read_whitelist_snapshot(snapshot, source) is None
+    assert list(load_whitelist(source, snapshot).components) == ["button"]
+    assert read_whitelist_snapshot(snapshot, tmp_path / "other.json") is None